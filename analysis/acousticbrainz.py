@@ -6,10 +6,18 @@ The service shut down in 2022 but the API still works for lookups.
 No API key required. Data is CC0 licensed.
 """
 
-from time import sleep
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import monotonic, sleep, time
 
 import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from analysis.ratelimit import AdaptiveConcurrency, RateLimiter
 
 # AcousticBrainz API endpoints
 BASE_URL = "https://acousticbrainz.org/api/v1"
@@ -19,6 +27,85 @@ BULK_ENDPOINT = "{base}/low-level"
 # Rate limiting - be respectful to the read-only service
 REQUEST_DELAY = 0.1  # 100ms between requests
 BULK_BATCH_SIZE = 25  # Max MBIDs per bulk request
+BULK_WORKERS = 8  # Bulk requests in flight at once (adaptively reduced on throttling)
+TARGET_LATENCY = 5.0  # Bulk responses slower than this (seconds) halve concurrency
+THROTTLE_RETRIES = 3  # Retries for a batch answered with HTTP 429
+
+# Shared keep-alive session so batches reuse connections instead of a TLS handshake each
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=BULK_WORKERS, pool_maxsize=BULK_WORKERS))
+
+# Optional on-disk lookup cache so re-runs (e.g. of the tests) skip MBIDs already
+# answered. Off unless ACOUSTICBRAINZ_CACHE_PATH is set; relative paths are taken
+# from the repository root, not the working directory.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.getenv("ACOUSTICBRAINZ_CACHE_PATH", "")
+CACHE_EXPIRE_SECONDS = 30 * 86400
+
+
+class BpmCache:
+    """Thread-safe SQLite cache of MBID -> BPM lookups.
+
+    Only hits are stored unless cache_misses is set; then a NULL BPM records a
+    confirmed miss (404 / no rhythm data) so it isn't re-requested until it
+    expires. Network and server errors are never cached.
+    """
+
+    # Stay under SQLite's host-parameter limit in IN (...) lookups
+    _CHUNK = 500
+
+    def __init__(
+        self, path: str, expire_after: float = CACHE_EXPIRE_SECONDS, cache_misses: bool = False
+    ):
+        self.path = os.path.join(REPO_ROOT, path)
+        self.expire_after = expire_after
+        self.cache_misses = cache_misses
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS bpm "
+                "(mbid TEXT PRIMARY KEY, bpm REAL, fetched_at REAL NOT NULL)"
+            )
+        return self._connection
+
+    def get_many(self, mbids: list[str]) -> dict[str, float | None]:
+        """Unexpired entries for `mbids`; a None value is a cached miss."""
+        cutoff = time() - self.expire_after
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            for i in range(0, len(mbids), self._CHUNK):
+                chunk = mbids[i : i + self._CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                query = (
+                    "SELECT mbid, bpm FROM bpm "
+                    f"WHERE fetched_at >= ? AND mbid IN ({placeholders})"
+                )
+                found.update(connection.execute(query, (cutoff, *chunk)))
+        return found
+
+    def set_many(self, entries: dict[str, float | None]) -> None:
+        """Store lookup outcomes; None marks a miss (dropped unless cache_misses)."""
+        if not self.cache_misses:
+            entries = {mbid: bpm for mbid, bpm in entries.items() if bpm is not None}
+        if not entries:
+            return
+        now = time()
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO bpm (mbid, bpm, fetched_at) VALUES (?, ?, ?)",
+                [(mbid, bpm, now) for mbid, bpm in entries.items()],
+            )
+            connection.commit()
+
+
+cache = BpmCache(CACHE_PATH) if CACHE_PATH else None
 
 
 def get_bpm_by_mbid(mbid: str) -> float | None:
@@ -31,24 +118,30 @@ def get_bpm_by_mbid(mbid: str) -> float | None:
     Returns:
         BPM as float, or None if not found
     """
+    if cache is not None:
+        cached = cache.get_many([mbid])
+        if mbid in cached:
+            logger.debug(f"Cached AcousticBrainz result for MBID {mbid}: {cached[mbid]}")
+            return cached[mbid]
+
     url = SINGLE_ENDPOINT.format(base=BASE_URL, mbid=mbid)
 
     try:
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
             bpm = data.get("rhythm", {}).get("bpm")
             if bpm:
                 logger.info(f"Got BPM {bpm:.1f} for MBID {mbid}")
-                return float(bpm)
+                bpm = float(bpm)
             else:
                 logger.warning(f"No BPM in response for MBID {mbid}")
-                return None
+                bpm = None
 
         elif response.status_code == 404:
             logger.debug(f"No AcousticBrainz data for MBID {mbid}")
-            return None
+            bpm = None
         else:
             logger.error(f"AcousticBrainz API error {response.status_code} for MBID {mbid}")
             return None
@@ -57,30 +150,55 @@ def get_bpm_by_mbid(mbid: str) -> float | None:
         logger.error(f"Request failed for MBID {mbid}: {e}")
         return None
 
+    if cache is not None:
+        cache.set_many({mbid: bpm})
+    return bpm
 
-def bulk_get_bpm(mbids: list[str]) -> dict[str, float]:
-    """
-    Get BPM for multiple tracks in a single request.
 
-    Args:
-        mbids: List of MusicBrainz Recording IDs (max 25)
+def _throttle_delay(response, attempt: int) -> float:
+    """Seconds to back off after a 429, from AcousticBrainz's rate-limit headers."""
+    for header in ("Retry-After", "X-RateLimit-Reset-In"):
+        try:
+            return float(response.headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return float(2**attempt)
 
-    Returns:
-        Dict mapping MBID -> BPM for successful lookups
-    """
-    if not mbids:
-        return {}
 
-    if len(mbids) > BULK_BATCH_SIZE:
-        logger.warning(f"Bulk request exceeds {BULK_BATCH_SIZE} MBIDs, truncating")
-        mbids = mbids[:BULK_BATCH_SIZE]
+def _bulk_get_bpm_batch(
+    mbids: list[str],
+    limiter: RateLimiter,
+    concurrency: AdaptiveConcurrency,
+) -> dict[str, float] | None:
+    """
+    Run one bulk request (at most BULK_BATCH_SIZE MBIDs), retrying on HTTP 429.
 
+    Returns:
+        Dict mapping MBID -> BPM for successful lookups, or None if the request failed
+    """
     # Bulk endpoint uses semicolon-separated MBIDs
     recording_ids = ";".join(mbids)
     url = BULK_ENDPOINT.format(base=BASE_URL)
 
-    try:
-        response = requests.get(url, params={"recording_ids": recording_ids}, timeout=30)
+    for attempt in range(THROTTLE_RETRIES + 1):
+        concurrency.acquire()
+        limiter.wait()
+        started = monotonic()
+        throttled = False
+        try:
+            response = session.get(url, params={"recording_ids": recording_ids}, timeout=30)
+            throttled = response.status_code == 429
+        except requests.RequestException as e:
+            logger.error(f"Bulk request failed: {e}")
+            return None
+        finally:
+            concurrency.release(monotonic() - started, throttled)
+
+        if throttled:
+            delay = _throttle_delay(response, attempt)
+            logger.warning(f"AcousticBrainz rate limit hit; retrying batch in {delay:.1f}s")
+            sleep(delay)
+            continue
 
         if response.status_code == 200:
             data = response.json()
@@ -98,12 +216,59 @@ def bulk_get_bpm(mbids: list[str]) -> dict[str, float]:
             return results
         else:
             logger.error(f"Bulk API error {response.status_code}")
-            return {}
+            return None
 
-    except requests.RequestException as e:
-        logger.error(f"Bulk request failed: {e}")
+    logger.error(f"Giving up on bulk batch of {len(mbids)} MBIDs after repeated throttling")
+    return None
+
+
+def bulk_get_bpm(mbids: list[str], max_workers: int = BULK_WORKERS) -> dict[str, float]:
+    """
+    Get BPM for many tracks using the bulk endpoint.
+
+    MBIDs are split into BULK_BATCH_SIZE batches which are fetched concurrently
+    over the shared keep-alive session; MBIDs already in the on-disk cache (if
+    enabled) are not requested again. Request starts are paced REQUEST_DELAY apart and
+    concurrency backs off (AIMD) on HTTP 429 or slow responses.
+
+    Args:
+        mbids: List of MusicBrainz Recording IDs
+        max_workers: Maximum bulk requests in flight
+
+    Returns:
+        Dict mapping MBID -> BPM for successful lookups
+    """
+    if not mbids:
         return {}
 
+    results = {}
+    if cache is not None:
+        cached = cache.get_many(mbids)
+        results.update({mbid: bpm for mbid, bpm in cached.items() if bpm is not None})
+        mbids = [mbid for mbid in mbids if mbid not in cached]
+        if cached:
+            logger.info(f"Bulk lookup: {len(cached)} MBIDs answered from cache")
+        if not mbids:
+            return results
+
+    batches = [mbids[i : i + BULK_BATCH_SIZE] for i in range(0, len(mbids), BULK_BATCH_SIZE)]
+    limiter = RateLimiter(REQUEST_DELAY)
+    concurrency = AdaptiveConcurrency(
+        initial=max_workers, maximum=max_workers, target_latency=TARGET_LATENCY
+    )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetch = partial(_bulk_get_bpm_batch, limiter=limiter, concurrency=concurrency)
+        processed = 0
+        for batch, batch_results in zip(batches, executor.map(fetch, batches)):
+            processed += len(batch)
+            if batch_results is not None:
+                results.update(batch_results)
+                if cache is not None:
+                    cache.set_many({mbid: batch_results.get(mbid) for mbid in batch})
+            logger.info(f"Progress: {processed}/{len(mbids)} MBIDs ({len(results)} hits)")
+    return results
+
 
 def fetch_bpm_for_tracks(tracks: list[tuple], use_bulk: bool = True) -> dict[int, float]:
     """
@@ -125,41 +290,39 @@ def fetch_bpm_for_tracks(tracks: list[tuple], use_bulk: bool = True) -> dict[int
     logger.info(f"Starting AcousticBrainz lookup for {total} tracks")
 
     if use_bulk:
-        # Process in batches
-        for i in range(0, total, BULK_BATCH_SIZE):
-            batch = tracks[i : i + BULK_BATCH_SIZE]
-            mbid_to_track_id = {mbid: track_id for track_id, mbid in batch}
-            mbids = list(mbid_to_track_id.keys())
+        # Several tracks can share a recording MBID; look each MBID up once
+        mbid_to_track_ids = {}
+        for track_id, mbid in tracks:
+            mbid_to_track_ids.setdefault(mbid, []).append(track_id)
 
-            bpm_results = bulk_get_bpm(mbids)
+        bpm_results = bulk_get_bpm(list(mbid_to_track_ids))
 
-            for mbid, bpm in bpm_results.items():
-                track_id = mbid_to_track_id[mbid]
+        for mbid, bpm in bpm_results.items():
+            for track_id in mbid_to_track_ids[mbid]:
                 results[track_id] = bpm
                 hits += 1
 
-            misses += len(batch) - len(bpm_results)
-
-            # Progress logging
-            processed = min(i + BULK_BATCH_SIZE, total)
-            logger.info(f"Progress: {processed}/{total} ({hits} hits, {misses} misses)")
-
-            sleep(REQUEST_DELAY)
+        misses = total - hits
     else:
-        # Single requests (slower but more detailed logging)
-        for idx, (track_id, mbid) in enumerate(tracks):
-            bpm = get_bpm_by_mbid(mbid)
-
-            if bpm:
-                results[track_id] = bpm
-                hits += 1
-            else:
-                misses += 1
-
-            if (idx + 1) % 100 == 0:
-                logger.info(f"Progress: {idx + 1}/{total} ({hits} hits, {misses} misses)")
-
-            sleep(REQUEST_DELAY)
+        # Single requests (slower but more detailed logging), BULK_WORKERS in flight
+        # over the shared session with starts paced REQUEST_DELAY apart
+        limiter = RateLimiter(REQUEST_DELAY)
+
+        def lookup(mbid):
+            limiter.wait()
+            return get_bpm_by_mbid(mbid)
+
+        with ThreadPoolExecutor(max_workers=BULK_WORKERS) as executor:
+            bpms = executor.map(lookup, [mbid for _, mbid in tracks])
+            for idx, ((track_id, _), bpm) in enumerate(zip(tracks, bpms)):
+                if bpm:
+                    results[track_id] = bpm
+                    hits += 1
+                else:
+                    misses += 1
+
+                if (idx + 1) % 100 == 0:
+                    logger.info(f"Progress: {idx + 1}/{total} ({hits} hits, {misses} misses)")
 
     logger.info(f"AcousticBrainz lookup complete: {hits} hits, {misses} misses, {errors} errors")
     logger.info(f"Hit rate: {hits / total * 100:.1f}%" if total > 0 else "No tracks to process")
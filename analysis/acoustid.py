@@ -10,16 +10,19 @@ Requires: ACOUSTID_API_KEY environment variable (get one at https://acoustid.org
 """
 
 import os
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from loguru import logger
 
+from analysis.ratelimit import RateLimiter
+
 # AcoustID API endpoint
 LOOKUP_URL = "https://api.acoustid.org/v2/lookup"
 
 # Rate limiting
 REQUEST_DELAY = 0.34  # ~3 requests per second (API limit)
+LOOKUP_WORKERS = 4  # Requests in flight at once; starts stay paced REQUEST_DELAY apart
 
 
 def get_api_key() -> str | None:
@@ -91,6 +94,31 @@ def lookup_mbid_by_acoustid(acoustid: str, api_key: str | None = None) -> str |
         return None
 
 
+def _lookup_paced(acoustids: list[str], api_key: str, max_workers: int = LOOKUP_WORKERS):
+    """
+    Look up AcousticIDs concurrently, pacing request starts to the API limit.
+
+    Several requests can be in flight at once, so response latency overlaps the
+    REQUEST_DELAY budget instead of adding to it.
+
+    Args:
+        acoustids: AcousticIDs to look up
+        api_key: AcoustID API key
+        max_workers: Maximum requests in flight at once
+
+    Yields:
+        (acoustid, mbid or None) tuples in input order
+    """
+    limiter = RateLimiter(REQUEST_DELAY)
+
+    def lookup(acoustid):
+        limiter.wait()
+        return lookup_mbid_by_acoustid(acoustid, api_key)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from zip(acoustids, executor.map(lookup, acoustids))
+
+
 def bulk_lookup_mbid(
     acoustids: list[str],
     api_key: str | None = None,
@@ -99,7 +127,7 @@ def bulk_lookup_mbid(
     Look up MusicBrainz Recording IDs for multiple AcousticIDs.
 
     Note: AcoustID API doesn't have a true bulk endpoint, so this makes
-    individual requests with rate limiting.
+    individual requests, LOOKUP_WORKERS at a time with rate limiting.
 
     Args:
         acoustids: List of AcousticIDs to look up
@@ -120,8 +148,7 @@ def bulk_lookup_mbid(
 
     logger.info(f"Looking up MBIDs for {total} AcousticIDs")
 
-    for i, acoustid in enumerate(acoustids):
-        mbid = lookup_mbid_by_acoustid(acoustid, api_key)
+    for i, (acoustid, mbid) in enumerate(_lookup_paced(acoustids, api_key)):
         if mbid:
             results[acoustid] = mbid
 
@@ -129,10 +156,6 @@ def bulk_lookup_mbid(
         if (i + 1) % 50 == 0:
             logger.info(f"AcoustID progress: {i + 1}/{total} ({len(results)} resolved)")
 
-        # Rate limiting
-        if i < total - 1:  # Don't sleep after last request
-            sleep(REQUEST_DELAY)
-
     logger.info(f"AcoustID lookup complete: {len(results)}/{total} resolved to MBIDs")
     return results
 
@@ -163,18 +186,22 @@ def resolve_acoustids_to_mbids(
 
     logger.info(f"Resolving {total} AcousticIDs to MBIDs")
 
-    for i, (track_id, acoustid) in enumerate(tracks):
-        mbid = lookup_mbid_by_acoustid(acoustid, api_key)
+    # Duplicate files share an AcousticID; look each one up once
+    acoustid_to_track_ids = {}
+    for track_id, acoustid in tracks:
+        acoustid_to_track_ids.setdefault(acoustid, []).append(track_id)
+
+    done = 0
+    for acoustid, mbid in _lookup_paced(list(acoustid_to_track_ids), api_key):
+        track_ids = acoustid_to_track_ids[acoustid]
         if mbid:
-            results[track_id] = mbid
+            for track_id in track_ids:
+                results[track_id] = mbid
 
         # Progress logging
-        if (i + 1) % 50 == 0:
-            logger.info(f"AcoustID resolution progress: {i + 1}/{total} ({len(results)} resolved)")
-
-        # Rate limiting
-        if i < total - 1:
-            sleep(REQUEST_DELAY)
+        previous, done = done, done + len(track_ids)
+        if done // 50 > previous // 50:
+            logger.info(f"AcoustID resolution progress: {done}/{total} ({len(results)} resolved)")
 
     logger.info(f"AcoustID resolution complete: {len(results)}/{total} tracks resolved")
     return results
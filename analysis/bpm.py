@@ -18,6 +18,9 @@ except ImportError:
     ESSENTIA_AVAILABLE = False
     logger.warning("Essentia not installed - local BPM analysis unavailable")
 
+# Read size for prefetch_file() where posix_fadvise isn't available
+PREFETCH_CHUNK = 1024 * 1024
+
 
 def check_essentia_available() -> bool:
     """
@@ -29,6 +32,33 @@ def check_essentia_available() -> bool:
     return ESSENTIA_AVAILABLE
 
 
+def prefetch_file(filepath: str) -> None:
+    """
+    Pull an audio file into the OS page cache ahead of analysis.
+
+    Meant to run in a background thread while another file is being analyzed,
+    so the network read (CIFS/NFS) overlaps with CPU work instead of stalling
+    the next analysis. Failures are ignored; the analysis reads the file anyway.
+
+    Args:
+        filepath: Path to the audio file
+    """
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while os.read(fd, PREFETCH_CHUNK):
+                pass
+    except OSError as e:
+        logger.debug(f"Prefetch failed for {filepath}: {e}")
+    finally:
+        os.close(fd)
+
+
 def get_bpm_essentia(filepath: str) -> float | None:
     """
     Calculate BPM for an audio file using Essentia's RhythmExtractor2013.
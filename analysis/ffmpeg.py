@@ -1,10 +1,14 @@
 import json
 import os
 import subprocess as s
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from dotenv import load_dotenv
 from loguru import logger
 
+from config import bounded_map
 from db.database import Database
 
 load_dotenv()
@@ -15,6 +19,11 @@ MUSIC_PATH_PREFIX_LOCAL = os.getenv("MUSIC_PATH_PREFIX_LOCAL", "")
 MUSIC_PATH_PREFIX_PLEX_TEST = os.getenv("MUSIC_PATH_PREFIX_PLEX_TEST", "")
 MUSIC_PATH_PREFIX_LOCAL_TEST = os.getenv("MUSIC_PATH_PREFIX_LOCAL_TEST", "")
 
+# Concurrent ffprobe runs; each one mostly waits on the network mount, not the CPU
+PROBE_WORKERS = 16
+# Files submitted ahead of the database writes, per probe worker
+PROBE_WINDOW = 2
+
 
 def check_ffprobe_available() -> bool:
     """
@@ -415,11 +424,126 @@ def cleanup_temp_file(file_path: str):
         logger.error(f"Error removing temporary file {file_path}: {e}")
 
 
+class ProbeCache:
+    """
+    ffprobe results kept in a JSON file and reused while a file's mtime is unchanged.
+
+    Tags rarely change, so repeat runs over the same files (e.g. the e2e test
+    library) only re-probe files modified since the last save. Safe to share
+    between probe threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def probe(self, local_path: str) -> dict | None:
+        """Return ffprobe info for local_path, probing only if it changed since cached."""
+        try:
+            mtime = os.path.getmtime(local_path)
+        except OSError:
+            return ffmpeg_get_info(local_path)
+
+        entry = self._entries.get(local_path)
+        if entry and entry["mtime"] == mtime:
+            return entry["info"]
+
+        info = ffmpeg_get_info(local_path)
+        with self._lock:
+            self._entries[local_path] = {"mtime": mtime, "info": info}
+            self._dirty = True
+        return info
+
+    def save(self) -> None:
+        """Write the cache back to disk if anything was probed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            partial_path = f"{self.path}.partial"
+            with open(partial_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(partial_path, self.path)
+            self._dirty = False
+
+
+def _probe_plex_file(
+    plex_path: str, use_test_paths: bool = False, probe_cache: ProbeCache | None = None
+) -> tuple[bool, dict | None]:
+    """
+    Map a Plex path to the local mount and ffprobe it.
+
+    Returns:
+        (accessible, track_info) - track_info is None if the file is inaccessible
+        or ffprobe failed
+    """
+    local_path = map_plex_path_to_local(plex_path, use_test=use_test_paths)
+    if not local_path or not verify_path_accessible(local_path):
+        return False, None
+    if probe_cache is not None:
+        return True, probe_cache.probe(local_path)
+    return True, ffmpeg_get_info(local_path)
+
+
+def _store_track_ids(
+    database: Database, stats: dict, track: tuple, accessible: bool, track_info: dict | None
+) -> None:
+    """Write the MBID/AcousticID probed from one track's file, updating stats in place."""
+    track_id, _, existing_mbid, existing_acoustid = track
+    if not accessible:
+        stats["inaccessible"] += 1
+        return
+
+    stats["accessible"] += 1
+    if not track_info:
+        return
+
+    # Extract and update MBID if needed
+    needs_mbid = not existing_mbid or existing_mbid == ''
+    if needs_mbid:
+        mbid = ffmpeg_get_mbtid(track_info)
+        if mbid:
+            stats["mbid"]["extracted"] += 1
+            try:
+                database.execute_query(
+                    "UPDATE track_data SET musicbrainz_id = %s WHERE id = %s",
+                    (mbid, track_id)
+                )
+                stats["mbid"]["updated"] += 1
+            except Exception as e:
+                logger.error(f"Error updating track {track_id} with MBID {mbid}: {e}")
+                stats["mbid"]["errors"] += 1
+
+    # Extract and update AcousticID if needed
+    needs_acoustid = not existing_acoustid or existing_acoustid == ''
+    if needs_acoustid:
+        acoustid = ffmpeg_get_acoustid(track_info)
+        if acoustid:
+            stats["acoustid"]["extracted"] += 1
+            try:
+                database.execute_query(
+                    "UPDATE track_data SET acoustid = %s WHERE id = %s",
+                    (acoustid, track_id)
+                )
+                stats["acoustid"]["updated"] += 1
+            except Exception as e:
+                logger.error(f"Error updating track {track_id} with AcousticID: {e}")
+                stats["acoustid"]["errors"] += 1
+
+
 def process_mbid_from_files(
     database: Database,
     use_test_paths: bool = False,
     batch_size: int = 100,
     limit: int | None = None,
+    max_workers: int = PROBE_WORKERS,
+    probe_cache: ProbeCache | None = None,
 ) -> dict:
     """
     Extract MusicBrainz IDs and AcousticIDs from audio files and update database.
@@ -433,6 +557,8 @@ def process_mbid_from_files(
         use_test_paths: If True, use test path mapping; otherwise use production
         batch_size: Log progress every N tracks
         limit: Optional limit on number of tracks to process (for testing)
+        max_workers: Files probed concurrently; database updates stay on this thread
+        probe_cache: Optional ProbeCache to reuse results for unchanged files
 
     Returns:
         Dict with stats:
@@ -504,60 +630,24 @@ def process_mbid_from_files(
     stats["total"] = len(tracks)
     logger.info(f"Processing {stats['total']} tracks for MBID/AcousticID extraction")
 
-    # Process each track
-    for i, (track_id, plex_path, existing_mbid, existing_acoustid) in enumerate(tracks):
-        # Map Plex path to local path
-        local_path = map_plex_path_to_local(plex_path, use_test=use_test_paths)
+    # Probe files on worker threads; results come back in track order
+    probe = partial(_probe_plex_file, use_test_paths=use_test_paths, probe_cache=probe_cache)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = (track[1] for track in tracks)
+        probes = bounded_map(executor, probe, paths, PROBE_WINDOW * max_workers)
+        for i, (track, (accessible, track_info)) in enumerate(zip(tracks, probes)):
+            _store_track_ids(database, stats, track, accessible, track_info)
 
-        if not local_path or not verify_path_accessible(local_path):
-            stats["inaccessible"] += 1
-            continue
-
-        stats["accessible"] += 1
-
-        # Extract metadata from file
-        track_info = ffmpeg_get_info(local_path)
-        if not track_info:
-            continue
-
-        # Extract and update MBID if needed
-        needs_mbid = not existing_mbid or existing_mbid == ''
-        if needs_mbid:
-            mbid = ffmpeg_get_mbtid(track_info)
-            if mbid:
-                stats["mbid"]["extracted"] += 1
-                try:
-                    database.execute_query(
-                        "UPDATE track_data SET musicbrainz_id = %s WHERE id = %s",
-                        (mbid, track_id)
-                    )
-                    stats["mbid"]["updated"] += 1
-                except Exception as e:
-                    logger.error(f"Error updating track {track_id} with MBID {mbid}: {e}")
-                    stats["mbid"]["errors"] += 1
-
-        # Extract and update AcousticID if needed
-        needs_acoustid = not existing_acoustid or existing_acoustid == ''
-        if needs_acoustid:
-            acoustid = ffmpeg_get_acoustid(track_info)
-            if acoustid:
-                stats["acoustid"]["extracted"] += 1
-                try:
-                    database.execute_query(
-                        "UPDATE track_data SET acoustid = %s WHERE id = %s",
-                        (acoustid, track_id)
-                    )
-                    stats["acoustid"]["updated"] += 1
-                except Exception as e:
-                    logger.error(f"Error updating track {track_id} with AcousticID: {e}")
-                    stats["acoustid"]["errors"] += 1
+            # Progress logging
+            if (i + 1) % batch_size == 0:
+                logger.info(
+                    f"Progress: {i + 1}/{stats['total']} tracks processed, "
+                    f"{stats['mbid']['extracted']} MBIDs, "
+                    f"{stats['acoustid']['extracted']} AcousticIDs"
+                )
 
-        # Progress logging
-        if (i + 1) % batch_size == 0:
-            logger.info(
-                f"Progress: {i + 1}/{stats['total']} tracks processed, "
-                f"{stats['mbid']['extracted']} MBIDs, {stats['acoustid']['extracted']} AcousticIDs"
-            )
+    if probe_cache is not None:
+        probe_cache.save()
 
     logger.info(
         f"Metadata extraction complete: {stats['total']} tracks, "
@@ -571,6 +661,8 @@ def process_mbid_from_files(
 def process_artist_mbid_from_files(
     database: Database,
     use_test_paths: bool = False,
+    max_workers: int = PROBE_WORKERS,
+    probe_cache: ProbeCache | None = None,
 ) -> dict:
     """
     Extract MusicBrainz Artist IDs from audio files and update artists table.
@@ -580,6 +672,8 @@ def process_artist_mbid_from_files(
     Args:
         database: Database connection
         use_test_paths: If True, use test path mapping; otherwise use production
+        max_workers: Files probed concurrently; database updates stay on this thread
+        probe_cache: Optional ProbeCache to reuse results for unchanged files
 
     Returns:
         Dict with stats:
@@ -629,33 +723,33 @@ def process_artist_mbid_from_files(
     stats["total"] = len(artists)
     logger.info(f"Processing {stats['total']} artists for MBID extraction")
 
-    for artist_id, artist_name, plex_path in artists:
-        # Map Plex path to local path
-        local_path = map_plex_path_to_local(plex_path, use_test=use_test_paths)
-
-        if not local_path or not verify_path_accessible(local_path):
-            continue
-
-        # Extract artist MBID from file
-        track_info = ffmpeg_get_info(local_path)
-        if not track_info:
-            continue
-
-        artist_mbid = ffmpeg_get_artist_mbid(track_info)
-        if not artist_mbid:
-            continue
-
-        stats["extracted"] += 1
-
-        # Update database
-        try:
-            update_query = "UPDATE artists SET musicbrainz_id = %s WHERE id = %s"
-            database.execute_query(update_query, (artist_mbid, artist_id))
-            stats["updated"] += 1
-            logger.debug(f"Updated artist '{artist_name}' with MBID {artist_mbid}")
-        except Exception as e:
-            logger.error(f"Error updating artist {artist_id} with MBID {artist_mbid}: {e}")
-            stats["errors"] += 1
+    # Probe each artist's sample file on worker threads
+    probe = partial(_probe_plex_file, use_test_paths=use_test_paths, probe_cache=probe_cache)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = (artist[2] for artist in artists)
+        probes = bounded_map(executor, probe, paths, PROBE_WINDOW * max_workers)
+        for (artist_id, artist_name, _), (_, track_info) in zip(artists, probes):
+            if not track_info:
+                continue
+
+            artist_mbid = ffmpeg_get_artist_mbid(track_info)
+            if not artist_mbid:
+                continue
+
+            stats["extracted"] += 1
+
+            # Update database
+            try:
+                update_query = "UPDATE artists SET musicbrainz_id = %s WHERE id = %s"
+                database.execute_query(update_query, (artist_mbid, artist_id))
+                stats["updated"] += 1
+                logger.debug(f"Updated artist '{artist_name}' with MBID {artist_mbid}")
+            except Exception as e:
+                logger.error(f"Error updating artist {artist_id} with MBID {artist_mbid}: {e}")
+                stats["errors"] += 1
+
+    if probe_cache is not None:
+        probe_cache.save()
 
     logger.info(
         f"Artist MBID extraction complete: {stats['total']} artists, "
@@ -688,7 +782,11 @@ def refresh_mbid_for_artists(
         artist_mbids (updated, unchanged, errors), acoustids (extracted, updated, unchanged, errors),
         dry_run
     """
-    from db.db_functions import get_artist_names_found, get_tracks_by_artist_name
+    from db.db_functions import (
+        add_artist_lc_column,
+        get_artist_names_found,
+        get_tracks_by_artist_name,
+    )
 
     stats = {
         "artists_requested": len(artist_names),
@@ -723,7 +821,26 @@ def refresh_mbid_for_artists(
         logger.warning("No artist names provided")
         return stats
 
-    # Validate environment first
+    # Artist lookups match on artists.artist_lc (migration is idempotent)
+    add_artist_lc_column(database)
+
+    # Check which artists exist first: one indexed lookup is cheaper than the
+    # environment checks below, and settles unknown names on its own
+    found_artists = get_artist_names_found(database, artist_names)
+    stats["artists_found"] = len(found_artists)
+
+    # Identify missing artists (case-insensitive comparison)
+    found_lower = {a.lower() for a in found_artists}
+    stats["artists_not_found"] = [a for a in artist_names if a.lower() not in found_lower]
+
+    if stats["artists_not_found"]:
+        logger.warning(f"Artists not found in database: {stats['artists_not_found']}")
+
+    if not found_artists:
+        logger.warning("None of the requested artists were found in the database")
+        return stats
+
+    # Validate environment
     if not check_ffprobe_available():
         logger.warning("ffprobe not available - skipping MBID refresh")
         stats["skipped"] = True
@@ -742,21 +859,6 @@ def refresh_mbid_for_artists(
         stats["skipped"] = True
         return stats
 
-    # Check which artists exist
-    found_artists = get_artist_names_found(database, artist_names)
-    stats["artists_found"] = len(found_artists)
-
-    # Identify missing artists (case-insensitive comparison)
-    found_lower = {a.lower() for a in found_artists}
-    stats["artists_not_found"] = [a for a in artist_names if a.lower() not in found_lower]
-
-    if stats["artists_not_found"]:
-        logger.warning(f"Artists not found in database: {stats['artists_not_found']}")
-
-    if not found_artists:
-        logger.warning("None of the requested artists were found in the database")
-        return stats
-
     # Get all tracks for the specified artists
     tracks = get_tracks_by_artist_name(database, artist_names)
     stats["tracks"]["total"] = len(tracks)
@@ -1,10 +1,13 @@
 import json
 import os
+from urllib.parse import quote, urlencode
 
 import requests
 from dotenv import load_dotenv
 from loguru import logger
+from requests.adapters import HTTPAdapter
 
+from analysis.ratelimit import RateLimited, RateLimiter
 from db import DB_PASSWORD, DB_PATH, DB_USER, TEST_DB
 from db.database import Database
 
@@ -15,9 +18,30 @@ LASTFM_SHARED_SECRET = os.getenv("LASTFM_SHARED_SECRET", "")
 LASTFM_USERNAME = os.getenv("LASTFM_USERNAME", "")
 LASTFM_APP_NAME = os.getenv("LASTFM_APP_NAME", "")
 
+# Fixed part of each request URL; only the looked-up names/MBID are encoded per call
+API_ROOT = "http://ws.audioscrobbler.com/2.0/"
+ARTIST_INFO_URL = (
+    f"{API_ROOT}?method=artist.getinfo&autocorrect=1&api_key={LASTFM_API_KEY}&format=json"
+)
+TRACK_INFO_URL = f"{API_ROOT}?method=track.getInfo&api_key={LASTFM_API_KEY}&format=json"
+
+POOL_SIZE = 16  # Matches AdaptiveConcurrency's default maximum in-flight requests
+
+# Shared keep-alive session so each lookup reuses a connection instead of reconnecting
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+
 database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)  # Change to production db
 
 
+def _retry_after(response) -> float | None:
+    """Seconds from a Retry-After header, or None if absent/not numeric."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
 def get_artist_info(artist_name):
     """
     Retrieves information about a specific artist from the Last.fm API.
@@ -28,8 +52,8 @@ def get_artist_info(artist_name):
     Returns:
     dict: A JSON object containing information about the artist if the request is successful, otherwise None.
     """
-    url = f"http://ws.audioscrobbler.com/2.0/?method=artist.getinfo&autocorrect=1&artist={artist_name}&api_key={LASTFM_API_KEY}&format=json"
-    response = requests.get(url)
+    url = f"{ARTIST_INFO_URL}&{urlencode({'artist': artist_name}, quote_via=quote)}"
+    response = session.get(url, timeout=10)
     if response.status_code == 200:
         logger.debug(f"last_fm Response: {response.json()}")
         logger.info(f"Retrieved artist info for {artist_name}")
@@ -156,6 +180,7 @@ def get_last_fm_track_data(
     artist: str | None = None,
     track: str | None = None,
     mbid: str | None = None,
+    limiter: RateLimiter | None = None,
 ) -> dict | None:
     """
     Retrieves information about a specific track from the Last.fm API.
@@ -167,30 +192,35 @@ def get_last_fm_track_data(
         artist: The name of the artist (required if mbid not provided)
         track: The name of the track (required if mbid not provided)
         mbid: MusicBrainz ID for precise track lookup (preferred)
+        limiter: Optional RateLimiter to pace from the response's rate-limit headers
 
     Returns:
         dict: JSON response containing track info, or None on failure
+
+    Raises:
+        RateLimited: If Last.fm throttled the request (HTTP 429 or error 29)
     """
     if mbid:
-        url = (
-            f"http://ws.audioscrobbler.com/2.0/?method=track.getInfo"
-            f"&api_key={LASTFM_API_KEY}&mbid={mbid}&format=json"
-        )
+        url = f"{TRACK_INFO_URL}&{urlencode({'mbid': mbid}, quote_via=quote)}"
         lookup_desc = f"MBID {mbid}"
     elif artist and track:
-        url = (
-            f"http://ws.audioscrobbler.com/2.0/?method=track.getInfo"
-            f"&api_key={LASTFM_API_KEY}&artist={artist}&track={track}"
-            f"&autocorrect=1&format=json"
-        )
+        query = urlencode({"artist": artist, "track": track, "autocorrect": 1}, quote_via=quote)
+        url = f"{TRACK_INFO_URL}&{query}"
         lookup_desc = f"{artist} - {track}"
     else:
         logger.error("get_last_fm_track_data requires either mbid or artist+track")
         return None
 
-    response = requests.get(url)
+    response = session.get(url, timeout=10)
+    if limiter is not None:
+        limiter.observe(response.headers)
+    if response.status_code == 429:
+        raise RateLimited(_retry_after(response))
     if response.status_code == 200:
         result = response.json()
+        # Error 29 is Last.fm's in-band "Rate limit exceeded"
+        if result.get("error") == 29:
+            raise RateLimited(_retry_after(response))
         # Check for API error response (e.g., track not found)
         if "error" in result:
             logger.warning(
@@ -0,0 +1,117 @@
+"""
+Client-side rate limiting shared by the Last.fm, AcousticBrainz and AcoustID clients.
+
+RateLimiter paces request starts, AdaptiveConcurrency caps how many are in flight,
+and RateLimited is raised by a client when the server answers HTTP 429.
+"""
+
+import threading
+from time import monotonic, sleep, time
+
+
+class RateLimiter:
+    """Thread-safe token-bucket pacer for API requests.
+
+    Requests average at most one per `delay` seconds. Up to `burst` slots left
+    unused while idle can be spent back-to-back, so the first calls after a pause
+    don't wait. burst=1 spaces every request at least `delay` apart. Unlike a
+    fixed sleep between calls, the wait only covers whatever part of the interval
+    hasn't already elapsed, so request latency overlaps the rate budget when
+    several threads share one limiter.
+    """
+
+    # observe() pauses the bucket once the server reports fewer requests left than this
+    LOW_WATER = 3
+
+    def __init__(self, delay: float, burst: int = 1):
+        self.delay = delay
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        """Block until the caller's request slot comes up."""
+        with self._lock:
+            now = monotonic()
+            # Idle time banks at most `burst` slots
+            start = max(self._next_at, now - (self.burst - 1) * self.delay)
+            wait_for = start - now
+            self._next_at = start + self.delay
+        if wait_for > 0:
+            sleep(wait_for)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller's next request until `seconds` from now."""
+        with self._lock:
+            self._next_at = max(self._next_at, monotonic() + seconds)
+
+    def observe(self, headers) -> None:
+        """Pause until the quota resets if response headers say it's nearly spent.
+
+        Reads X-RateLimit-Remaining, then Retry-After or X-RateLimit-Reset (seconds,
+        or an epoch timestamp) for how long to wait. Without those headers the
+        bucket's own pacing applies unchanged.
+        """
+        try:
+            remaining = int(headers.get("X-RateLimit-Remaining"))
+        except (TypeError, ValueError):
+            return
+        if remaining >= self.LOW_WATER:
+            return
+        for header in ("Retry-After", "X-RateLimit-Reset"):
+            try:
+                value = float(headers.get(header))
+            except (TypeError, ValueError):
+                continue
+            # Values this large are epoch timestamps rather than a delay
+            self.pause(value - time() if value > 1e9 else value)
+            return
+
+
+class RateLimited(Exception):
+    """Raised when an API rejects a request for exceeding its rate limit."""
+
+    def __init__(self, retry_after: float | None = None):
+        super().__init__(f"Rate limit exceeded (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrency:
+    """Thread-safe AIMD cap on the number of in-flight API requests.
+
+    Each fast response raises the cap additively; a throttled or slow response
+    halves it, so concurrency settles just below where the API starts pushing back.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 16,
+        target_latency: float = 1.0,
+        increase: float = 0.5,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.increase = increase
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until fewer than `limit` requests are in flight."""
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, throttled: bool = False) -> None:
+        """Free a slot and adjust the cap from the finished request's outcome."""
+        with self._condition:
+            self._in_flight -= 1
+            if throttled or latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * 0.5)
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase)
+            self._condition.notify_all()
@@ -1,3 +1,4 @@
+from config.concurrency import bounded_map
 from config.logging import get_logger, setup_logging
 
-__all__ = ["setup_logging", "get_logger"]
+__all__ = ["setup_logging", "get_logger", "bounded_map"]
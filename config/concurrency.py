@@ -0,0 +1,41 @@
+"""
+Thread-pool helpers shared by the Plex extraction and file-probing stages.
+
+Usage:
+    from config import bounded_map
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for result in bounded_map(executor, fn, items, window=16):
+            ...
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor
+from itertools import islice
+
+
+def bounded_map(executor: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Like executor.map(fn, items), but with at most window calls submitted ahead.
+
+    executor.map() submits every item up front, so results pile up however slowly
+    they are consumed. Here the next item is only submitted as a result is taken,
+    which lets a bounded queue downstream apply real back-pressure.
+
+    Args:
+        executor: Executor to run fn on
+        fn: Function applied to each item
+        items: Iterable of inputs, read lazily
+        window: Maximum number of submitted-but-unconsumed calls
+
+    Yields:
+        fn(item) for each item, in input order
+    """
+    items = iter(items)
+    pending = deque(executor.submit(fn, item) for item in islice(items, window))
+    while pending:
+        future = pending.popleft()
+        # Refill before waiting so the workers stay busy
+        for item in islice(items, 1):
+            pending.append(executor.submit(fn, item))
+        yield future.result()
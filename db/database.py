@@ -1,10 +1,111 @@
+import os
 import sys
+from contextlib import contextmanager
+from time import sleep
 
 import mysql.connector
 from loguru import logger
+from mysql.connector import pooling
 
 create_table_methods = []
 
+# connect() retries transient connection errors with 1, 2, 4, 8s backoff
+CONNECT_ATTEMPTS = 5
+
+# Connections kept open per pool by Database(..., pooled=True)
+POOL_SIZE = 10
+
+# Pools shared by every pooled Database on the same server/user/schema
+_pools = {}
+
+# CREATE TABLE statements used by the create_*_table methods, keyed by table name
+_DDL = {
+    "artists": """CREATE TABLE IF NOT EXISTS artists(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , artist VARCHAR(255) NOT NULL
+        , last_fm_id VARCHAR(255)
+        , discogs_id VARCHAR(255)
+        , musicbrainz_id VARCHAR(255)
+        , artist_lc VARCHAR(255) AS (LOWER(artist)) STORED
+        )""",
+    "track_data": """
+        CREATE TABLE IF NOT EXISTS track_data(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , title VARCHAR (1000) NOT NULL
+        , artist VARCHAR (1000) NOT NULL
+        , album VARCHAR (1000) NOT NULL
+        , added_date VARCHAR (50)
+        , filepath VARCHAR (500)
+        , location VARCHAR (500)
+        , bpm INTEGER
+        , genre VARCHAR (1000)
+        , artist_id INTEGER
+        , plex_id INTEGER
+        , musicbrainz_id VARCHAR(255)
+        , acoustid VARCHAR(255)
+        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE)""",
+    "history": """
+        CREATE TABLE IF NOT EXISTS history(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , tx_date DATE
+        , records INTEGER (6)
+        , latest_entry DATE)""",
+    "similar_artists": """
+        CREATE TABLE IF NOT EXISTS similar_artists(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , artist_id INTEGER
+        , similar_artist_id INTEGER
+        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
+        , FOREIGN KEY (similar_artist_id) REFERENCES artists(id) ON DELETE CASCADE)""",
+    "genres": """
+        CREATE TABLE IF NOT EXISTS genres(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , genre VARCHAR(1000) NOT NULL
+        )
+        """,
+    "track_genres": """
+        CREATE TABLE IF NOT EXISTS track_genres(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , track_id INTEGER
+        , genre_id INTEGER
+        , FOREIGN KEY (track_id) REFERENCES track_data(id) ON DELETE CASCADE
+        , FOREIGN KEY (genre_id) REFERENCES genres(id) ON DELETE CASCADE
+        )
+        """,
+    "artist_genres": """
+        CREATE TABLE IF NOT EXISTS artist_genres(
+        id INTEGER PRIMARY KEY AUTO_INCREMENT
+        , artist_id INTEGER
+        , genre_id INTEGER
+        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
+        , FOREIGN KEY (genre_id) REFERENCES genres(id) ON DELETE CASCADE
+        )
+        """,
+}
+
+# Secondary indexes created right after their table
+_INDEX_DDL = {
+    # Tracks are linked to artists by name; artist_lc serves case-insensitive lookups
+    "artists": (
+        "CREATE INDEX ix_artist ON artists (artist)",
+        "CREATE INDEX ix_artist_lc ON artists (artist_lc)",
+    ),
+    "track_data": (
+        "CREATE INDEX ix_loc ON track_data (location)",
+        "CREATE INDEX ix_filepath ON track_data (filepath)",
+        "CREATE INDEX ix_bpm ON track_data (bpm)",
+        "CREATE INDEX ix_musicbrainz_id ON track_data (musicbrainz_id)",
+        # Artist -> file-backed tracks (refresh by artist); filepath is checked in the index
+        "CREATE INDEX ix_artist_filepath ON track_data (artist_id, filepath)",
+        # Unique so re-running insert_tracks() upserts instead of duplicating tracks
+        "CREATE UNIQUE INDEX ix_plex_id ON track_data (plex_id)",
+    ),
+    # Each genre is linked to an artist at most once; also serves the link lookups
+    "artist_genres": (
+        "CREATE UNIQUE INDEX ux_artist_genres ON artist_genres (artist_id, genre_id)",
+    ),
+}
+
 
 def register_create_table_method(func):
     """
@@ -35,9 +136,11 @@ class Database:
         the name of the database to connect to
     connection : mysql.connector.connection.MySQLConnection or None
         the connection object to the MySQL server
+    pooled : bool
+        whether connect() checks connections out of a shared pool
     """
 
-    def __init__(self, host, user, password, database):
+    def __init__(self, host, user, password, database, pooled=False):
         """
         Constructs all the necessary attributes for the Database object.
 
@@ -51,29 +154,72 @@ class Database:
             the password to connect to the MySQL server
         database : str
             the name of the database to connect to
+        pooled : bool, optional
+            check connections out of a process-wide pool instead of opening a
+            new one per connect(); close() then returns it to the pool
         """
         self.host = host
         self.user = user
         self.password = password
         self.database = database
+        self.pooled = pooled
         self.connection = None
+        self._held = 0
+        # execute_prepared() cursors by SQL text, valid for _prepared_connection only
+        self._prepared = {}
+        self._prepared_connection = None
 
     def connect(self):
         """
         Establishes a connection to the MySQL server.
         """
         if self.connection is not None:
+            if self._held:
+                # A held connection may have idled out between pipeline phases
+                self.ensure_connection()
             return
-        else:
+        for attempt in range(1, CONNECT_ATTEMPTS + 1):
             try:
-                self.connection = mysql.connector.connect(
-                    host=self.host, user=self.user, password=self.password, database=self.database
-                )
+                self.connection = self._open_connection()
                 logger.info("Connected to MySQL server")
+                return
+            except (mysql.connector.InterfaceError, mysql.connector.OperationalError) as error:
+                # Server unreachable / connection dropped: worth retrying
+                if attempt == CONNECT_ATTEMPTS:
+                    logger.error(f"There was an error connecting to MySQL server: {error}")
+                    sys.exit()
+                delay = 2 ** (attempt - 1)
+                logger.warning(f"MySQL connect failed ({error}); retrying in {delay}s")
+                sleep(delay)
             except mysql.connector.Error as error:
                 logger.error(f"There was an error connecting to MySQL server: {error}")
                 sys.exit()
 
+    def _open_connection(self):
+        """
+        Opens a new connection, or checks one out of the shared pool if pooled.
+        """
+        if not self.pooled:
+            return mysql.connector.connect(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+            )
+        key = (self.host, self.user, self.database)
+        pool = _pools.get(key)
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"music_organizer_{len(_pools)}",
+                pool_size=POOL_SIZE,
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+            )
+            _pools[key] = pool
+        return pool.get_connection()
+
     def ensure_connection(self) -> None:
         """Ensure connection is alive, reconnect if stale.
 
@@ -93,13 +239,69 @@ class Database:
 
     def close(self):
         """
-        Closes the connection to the MySQL server.
+        Closes the connection to the MySQL server (or returns it to the pool).
+
+        Does nothing while a session() is held, so helpers that connect() and
+        close() around each query share the held connection instead.
         """
+        if self._held:
+            return
+        self._drop_prepared()
         if self.connection:
             self.connection.close()
             self.connection = None
             logger.info("Connection closed")
 
+    @contextmanager
+    def session(self):
+        """
+        Holds one connection open for the duration of a with-block.
+
+        Inside the block, close() is a no-op and connect() reuses (and pings) the
+        existing connection, so a sequence of helper calls costs one handshake.
+        Sessions may be nested; the connection closes when the outermost exits.
+        """
+        self.connect()
+        self._held += 1
+        try:
+            yield self
+        finally:
+            self._held -= 1
+            self.close()
+
+    @contextmanager
+    def local_infile(self, directory):
+        """
+        Runs the with-block on a dedicated connection that may LOAD DATA LOCAL.
+
+        Only files under directory can be sent (allow_local_infile_in_path); every
+        other connection leaves local_infile off. The block's statements, including
+        temporary tables, share the connection, which is closed on exit and the
+        previous one (if any) restored.
+
+        Parameters
+        ----------
+        directory : str
+            the directory load_csv() files are read from
+        """
+        previous = self.connection
+        self.connection = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            allow_local_infile_in_path=os.path.abspath(directory),
+        )
+        self._held += 1
+        try:
+            yield self
+        finally:
+            self._held -= 1
+            if self._prepared_connection is self.connection:
+                self._drop_prepared()
+            self.connection.close()
+            self.connection = previous
+
     def drop_table(self, table_name):
         """
         Drops a table from the database if it exists.
@@ -140,6 +342,11 @@ class Database:
             the SQL query to execute
         params : tuple, optional
             the parameters to use with the SQL query
+
+        Returns
+        -------
+        int or None
+            the number of rows affected, or None if the query failed
         """
         if not self.connection:
             self.connect()
@@ -150,11 +357,153 @@ class Database:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
+            affected = cursor.rowcount
             self.connection.commit()
             cursor.close()
+            return affected
         except mysql.connector.Error as error:
             logger.error(f"Error executing query: {error}")
             # sys.exit()
+            return None
+
+    def _drop_prepared(self):
+        """
+        Closes the cached prepared-statement cursors.
+        """
+        for cursor in self._prepared.values():
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass
+        self._prepared = {}
+        self._prepared_connection = None
+
+    def _prepared_cursor(self, query):
+        """
+        Returns the cached prepared-statement cursor for a SQL text, creating it if needed.
+        """
+        if not self.connection:
+            self.connect()
+        if self._prepared_connection is not self.connection:
+            # Prepared statements don't survive a reconnect
+            self._drop_prepared()
+            self._prepared_connection = self.connection
+        cursor = self._prepared.get(query)
+        if cursor is None:
+            cursor = self._prepared[query] = self.connection.cursor(prepared=True)
+        return cursor
+
+    def execute_prepared(self, query, params):
+        """
+        Executes a write query as a server-side prepared statement.
+
+        The statement is prepared on the first call for each SQL text and its cursor
+        is reused for later calls on the same connection, so a loop issuing the same
+        UPDATE/INSERT skips the server's parse step after the first row.
+
+        Parameters
+        ----------
+        query : str
+            the SQL query to execute, with %s placeholders
+        params : tuple
+            the parameters to use with the SQL query
+
+        Returns
+        -------
+        int or None
+            the number of rows affected, or None if the query failed
+        """
+        try:
+            cursor = self._prepared_cursor(query)
+            logger.debug("Executing prepared query on MySQL server")
+            cursor.execute(query, params)
+            affected = cursor.rowcount
+            self.connection.commit()
+            return affected
+        except mysql.connector.Error as error:
+            logger.error(f"Error executing prepared query: {error}")
+            return None
+
+    def execute_many(self, query, seq_params):
+        """
+        Executes a SQL query once per parameter tuple, with a single commit.
+
+        mysql-connector rewrites an ``INSERT ... VALUES`` batch into one multi-row
+        statement, so this is one round trip instead of one per row.
+
+        Parameters
+        ----------
+        query : str
+            the SQL query to execute
+        seq_params : list of tuple
+            the parameters for each execution; nothing is run if empty
+
+        Returns
+        -------
+        bool
+            False if the batch failed and was rolled back, True otherwise
+        """
+        if not seq_params:
+            return True
+        if not self.connection:
+            self.connect()
+        try:
+            cursor = self.connection.cursor()
+            logger.debug(f"Executing batched query on MySQL server ({len(seq_params)} rows)")
+            cursor.executemany(query, seq_params)
+            self.connection.commit()
+            cursor.close()
+            return True
+        except mysql.connector.Error as error:
+            logger.error(f"Error executing batched query: {error}")
+            self.connection.rollback()
+            return False
+
+    def load_csv(self, csv_file, table, columns):
+        """
+        Bulk-loads a csv.writer-format file with LOAD DATA LOCAL INFILE.
+
+        The file is streamed to the server in one statement; its header line is
+        skipped. Must run inside local_infile() for the file's directory; fails
+        (returning None) if local_infile is disabled on the server.
+
+        Parameters
+        ----------
+        csv_file : str
+            path of the CSV file to load
+        table : str
+            the table to load into
+        columns : list of str
+            target column for each CSV field in file order; use a ``@variable``
+            to discard a field
+
+        Returns
+        -------
+        int or None
+            the number of rows loaded, or None if the load failed
+        """
+        if not self.connection:
+            self.connect()
+        query = f"""
+        LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY '\\r\\n'
+        IGNORE 1 LINES
+        ({", ".join(columns)})
+        """
+        try:
+            cursor = self.connection.cursor()
+            logger.debug(f"Loading {csv_file} into {table} on MySQL server")
+            cursor.execute(query, (os.path.abspath(csv_file),))
+            loaded = cursor.rowcount
+            self.connection.commit()
+            cursor.close()
+            return loaded
+        except mysql.connector.Error as error:
+            logger.warning(f"Error loading {csv_file} into {table}: {error}")
+            self.connection.rollback()
+            return None
 
     def execute_select_query(self, query, params=None):
         """
@@ -193,6 +542,22 @@ class Database:
         for method in create_table_methods:
             method(self)
 
+    def _recreate_table(self, table_name):
+        """
+        Drops and recreates a table from its _DDL entry, with foreign key checks off.
+
+        Parameters
+        ----------
+        table_name : str
+            the _DDL key (and name) of the table to recreate
+        """
+        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
+        self.drop_table(table_name)
+        self.create_table(_DDL[table_name])
+        for index_ddl in _INDEX_DDL.get(table_name, ()):
+            self.execute_query(index_ddl)
+        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+
     @register_create_table_method
     def create_artists_table(self, table_name="artists"):
         """
@@ -203,17 +568,7 @@ class Database:
         table_name : str, optional
             the name of the table to create (default is "artists")
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table(table_name)
-        artists_ddl = """CREATE TABLE IF NOT EXISTS artists(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , artist VARCHAR(255) NOT NULL
-        , last_fm_id VARCHAR(255)
-        , discogs_id VARCHAR(255)
-        , musicbrainz_id VARCHAR(255)
-        )"""
-        self.create_table(artists_ddl)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("artists")
 
     @register_create_table_method
     def create_track_data_table(self, table_name="track_data"):
@@ -227,36 +582,7 @@ class Database:
         table_name : str, optional
             the name of the table to create (default is "track_data")
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("track_data")
-        track_data_ddl = """
-        CREATE TABLE IF NOT EXISTS track_data(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , title VARCHAR (1000) NOT NULL
-        , artist VARCHAR (1000) NOT NULL
-        , album VARCHAR (1000) NOT NULL
-        , added_date VARCHAR (50)
-        , filepath VARCHAR (500)
-        , location VARCHAR (500)
-        , bpm INTEGER
-        , genre VARCHAR (1000)
-        , artist_id INTEGER
-        , plex_id INTEGER
-        , musicbrainz_id VARCHAR(255)
-        , acoustid VARCHAR(255)
-        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE)"""
-        self.create_table(track_data_ddl)
-        ix_loc = """CREATE INDEX ix_loc ON track_data (location)"""
-        ix_filepath = """CREATE INDEX ix_filepath ON track_data (filepath)"""
-        ix_bpm = """CREATE INDEX ix_bpm ON track_data (bpm)"""
-        ix_mbid = """CREATE INDEX ix_musicbrainz_id ON track_data (musicbrainz_id)"""
-        ix_plex = """CREATE INDEX ix_plex_id ON track_data (plex_id)"""
-        self.execute_query(ix_loc)
-        self.execute_query(ix_filepath)
-        self.execute_query(ix_bpm)
-        self.execute_query(ix_mbid)
-        self.execute_query(ix_plex)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("track_data")
 
     @register_create_table_method
     def create_history_table(self, table_name="history"):
@@ -268,16 +594,7 @@ class Database:
         table_name : str, optional
             the name of the table to create (default is "history")
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("history")
-        history_ddl = """
-        CREATE TABLE IF NOT EXISTS history(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , tx_date DATE
-        , records INTEGER (6)
-        , latest_entry DATE)"""
-        self.create_table(history_ddl)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("history")
 
     # @register_create_table_method
     # def create_tags_table(self):
@@ -295,78 +612,129 @@ class Database:
     #     , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
     #     , FOREIGN KEY (tag) REFERENCES genres(id) ON DELETE CASCADE)'''
     #     self.create_table(tags_ddl)
-    #     self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
 
     @register_create_table_method
     def create_similar_artists_table(self):
         """
         Creates the similar_artists table in the database.
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("similar_artists")
-        similar_artists_ddl = """
-        CREATE TABLE IF NOT EXISTS similar_artists(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , artist_id INTEGER
-        , similar_artist_id INTEGER
-        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
-        , FOREIGN KEY (similar_artist_id) REFERENCES artists(id) ON DELETE CASCADE)"""
-        self.create_table(similar_artists_ddl)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("similar_artists")
 
     @register_create_table_method
     def create_genres_table(self):
         """
         Creates the genres table in the database.
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("genres")
-        genres_ddl = """
-        CREATE TABLE IF NOT EXISTS genres(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , genre VARCHAR(1000) NOT NULL
-        )
-        """
-        self.create_table(genres_ddl)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("genres")
 
     @register_create_table_method
     def create_track_genres_table(self):
         """
         Creates the track_genres table in the database.
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("track_genres")
-        track_genres_ddl = """
-        CREATE TABLE IF NOT EXISTS track_genres(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , track_id INTEGER
-        , genre_id INTEGER
-        , FOREIGN KEY (track_id) REFERENCES track_data(id) ON DELETE CASCADE
-        , FOREIGN KEY (genre_id) REFERENCES genres(id) ON DELETE CASCADE
-        )
-        """
-        self.create_table(track_genres_ddl)
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        self._recreate_table("track_genres")
 
     @register_create_table_method
     def create_artist_genres_table(self):
         """
         Creates the artist_genres table in the database.
         """
-        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        self.drop_table("artist_genres")
-        artist_genres_ddl = """
-        CREATE TABLE IF NOT EXISTS artist_genres(
-        id INTEGER PRIMARY KEY AUTO_INCREMENT
-        , artist_id INTEGER
-        , genre_id INTEGER
-        , FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
-        , FOREIGN KEY (genre_id) REFERENCES genres(id) ON DELETE CASCADE
-        )
+        self._recreate_table("artist_genres")
+
+    @staticmethod
+    def table_names():
+        """
+        Returns the names of all tables created by create_all_tables().
+
+        Returns
+        -------
+        list
+            the table names, in registration order
+        """
+        return [
+            method.__name__.replace("create_", "").replace("_table", "")
+            for method in create_table_methods
+        ]
+
+    def has_all_tables(self):
+        """
+        Checks whether every table created by create_all_tables() already exists.
+
+        Returns
+        -------
+        bool
+            False on a first run against an empty (or partial) schema
+        """
+        self.connect()
+        existing = {row[0] for row in self.execute_select_query("SHOW TABLES")}
+        return all(table_name in existing for table_name in self.table_names())
+
+    def recreate_outdated_tables(self):
         """
-        self.create_table(artist_genres_ddl)
+        Recreates tables whose indexes don't match _INDEX_DDL, dropping their rows.
+
+        TRUNCATE keeps a table's old definition, so run this before
+        truncate_all_tables() for schema changes (new or now-UNIQUE indexes, and
+        the columns they cover) to reach an existing database.
+
+        Returns
+        -------
+        list of str
+            the tables that were recreated
+        """
+        self.connect()
+        existing = {
+            (table, index): non_unique == 0
+            for table, index, non_unique in self.execute_select_query("""
+                SELECT TABLE_NAME, INDEX_NAME, MIN(NON_UNIQUE)
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                GROUP BY TABLE_NAME, INDEX_NAME
+            """)
+        }
+        outdated = []
+        for table_name, index_ddls in _INDEX_DDL.items():
+            for index_ddl in index_ddls:
+                # "CREATE [UNIQUE] INDEX <name> ON <table> (...)"
+                index_name = index_ddl.split(" ON ")[0].split()[-1]
+                unique = index_ddl.startswith("CREATE UNIQUE")
+                if existing.get((table_name, index_name)) != unique:
+                    outdated.append(table_name)
+                    break
+        for table_name in outdated:
+            logger.info(f"Recreating table with an outdated schema: {table_name}")
+            self._recreate_table(table_name)
+        return outdated
+
+    def truncate_all_tables(self):
+        """
+        Empties all tables while keeping their schema, indexes and migrated columns.
+
+        Much cheaper than create_all_tables() when the schema already exists.
+        TRUNCATE is DDL in MySQL and commits implicitly, so this is not atomic.
+        TRUNCATE also recreates the table, so tables that are already empty
+        (found in one EXISTS query) are left alone.
+
+        Returns
+        -------
+        int
+            the number of tables truncated
+        """
+        self.connect()
+        table_names = self.table_names()
+        has_rows = self.execute_select_query(
+            "SELECT " + ", ".join(f"EXISTS(SELECT 1 FROM {name})" for name in table_names)
+        )
+        if has_rows:
+            table_names = [name for name, rows in zip(table_names, has_rows[0]) if rows]
+        self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
+        truncated = 0
+        for table_name in table_names:
+            self.execute_query(f"TRUNCATE TABLE {table_name}")
+            logger.info(f"Truncated table: {table_name}")
+            truncated += 1
         self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
+        return truncated
 
     def drop_all_tables(self):
         """
@@ -374,8 +742,7 @@ class Database:
         """
         self.connect()
         self.execute_query("SET FOREIGN_KEY_CHECKS = 0")
-        for method in create_table_methods:
-            table_name = method.__name__.replace("create_", "").replace("_table", "")
+        for table_name in self.table_names():
             self.drop_table(table_name)
         self.execute_query("SET FOREIGN_KEY_CHECKS = 1")
         self.close()
@@ -1,5 +1,7 @@
 import csv
 import datetime
+import os
+from collections.abc import Iterable
 
 from loguru import logger
 
@@ -10,32 +12,126 @@ from .database import Database
 database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)
 
 
-def insert_tracks(database: Database, csv_file):
+# CSV rows per multi-row INSERT in insert_tracks()
+INSERT_TRACKS_CHUNK_SIZE = 2000
+
+TRACK_CSV_COLUMNS = (
+    "title", "artist", "album", "genre", "added_date", "filepath", "location", "plex_id"
+)
+
+
+# Re-inserting a known plex_id refreshes its columns instead of adding a duplicate row.
+# Needs the unique ix_plex_id (add_unique_plex_id_index()); the incoming row is aliased
+# "new" (row alias, MySQL 8.0.19+) rather than read through the deprecated VALUES().
+TRACK_UPSERT = "ON DUPLICATE KEY UPDATE " + ", ".join(
+    f"{column} = new.{column}" for column in TRACK_CSV_COLUMNS if column != "plex_id"
+)
+
+
+def _insert_track_chunk(database: Database, query: str, chunk: list[tuple]) -> None:
+    """Insert one chunk in a single batch, falling back to row-by-row if it fails."""
+    if database.execute_many(query, chunk):
+        logger.info(f"Inserted {len(chunk)} track records")
+        return
+    logger.warning(f"Batch insert of {len(chunk)} tracks failed; retrying row by row")
+    for values in chunk:
+        database.execute_prepared(query, values)
+
+
+INSERT_TRACKS_QUERY = f"""
+    INSERT INTO track_data ({", ".join(TRACK_CSV_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(TRACK_CSV_COLUMNS))}) AS new
+    {TRACK_UPSERT}
+"""
+
+
+def insert_track_rows(
+    database: Database, rows: Iterable[dict], chunk_size: int = INSERT_TRACKS_CHUNK_SIZE
+) -> int:
+    """
+    Upsert track dicts chunk_size rows per multi-row INSERT.
+
+    Rows are consumed lazily, so rows may be a csv.DictReader or a generator fed
+    by Plex extraction. List values (genre) are stored in their CSV form.
+
+    Returns:
+        Number of rows sent to the database
+    """
+    sent = 0
+    chunk = []
+    for row in rows:
+        try:
+            chunk.append(
+                tuple(
+                    str(value) if isinstance(value, list) else value
+                    for value in (row[column] for column in TRACK_CSV_COLUMNS)
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error reading track record: {e}")
+            logger.debug(e)
+            continue
+        if len(chunk) >= chunk_size:
+            _insert_track_chunk(database, INSERT_TRACKS_QUERY, chunk)
+            sent += len(chunk)
+            chunk = []
+    _insert_track_chunk(database, INSERT_TRACKS_QUERY, chunk)
+    return sent + len(chunk)
+
+
+def _load_tracks(database: Database, csv_file, columns: list[str]) -> int | None:
+    """
+    LOAD DATA the CSV into a temporary copy of track_data, then upsert it on plex_id.
+
+    LOAD DATA itself can only REPLACE duplicates, which deletes the old row and
+    cascades to its track_genres, so the load goes through a staging table. All of
+    it runs on a local_infile() connection limited to the CSV's directory.
+    Returns the upsert's affected-row count, or None if the load failed.
+    """
+    with database.local_infile(os.path.dirname(os.path.abspath(csv_file))):
+        database.execute_query("DROP TEMPORARY TABLE IF EXISTS track_data_load")
+        if (
+            database.execute_query("CREATE TEMPORARY TABLE track_data_load LIKE track_data")
+            is None
+        ):
+            return None
+        try:
+            if database.load_csv(csv_file, "track_data_load", columns) is None:
+                return None
+            column_list = ", ".join(TRACK_CSV_COLUMNS)
+            return database.execute_query(
+                f"INSERT INTO track_data ({column_list}) "
+                f"SELECT * FROM (SELECT {column_list} FROM track_data_load) AS new "
+                f"{TRACK_UPSERT}"
+            )
+        finally:
+            database.execute_query("DROP TEMPORARY TABLE IF EXISTS track_data_load")
+
+
+def insert_tracks(database: Database, csv_file, chunk_size: int = INSERT_TRACKS_CHUNK_SIZE):
+    """
+    Insert track rows from a CSV written by export_track_data()/stream_export_tracks().
+
+    The file is bulk-loaded server-side with LOAD DATA LOCAL INFILE. If the server
+    refuses local_infile, it is read lazily and inserted chunk_size rows per batch
+    instead, so memory stays bounded by one chunk regardless of library size.
+    Either way tracks already present (by plex_id) are updated in place, so the
+    same export can be inserted again without duplicating rows.
+    """
+    add_unique_plex_id_index(database)
     database.connect()
-    query = """
-    INSERT INTO track_data (title, artist, album, genre, added_date, filepath, location, plex_id)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    with open(csv_file) as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                values = (
-                    row["title"],
-                    row["artist"],
-                    row["album"],
-                    row["genre"],
-                    row["added_date"],
-                    row["filepath"],
-                    row["location"],
-                    row["plex_id"],
-                )  # TODO : make this dynamic
-                database.execute_query(query, values)
-                logger.info(f"Inserted track record for {row['plex_id']}")
-            except Exception as e:
-                logger.error(f"Error inserting track record: {e}")
-                logger.debug(e)
-                continue
+    with open(csv_file, newline="") as f:
+        header = next(csv.reader(f), [])
+    # Map each CSV field to its column, discarding any the table doesn't take
+    columns = [column if column in TRACK_CSV_COLUMNS else "@skipped" for column in header]
+    if set(TRACK_CSV_COLUMNS) <= set(columns):
+        loaded = _load_tracks(database, csv_file, columns)
+        if loaded is not None:
+            logger.info(f"Bulk loaded track records from {csv_file} ({loaded} rows affected)")
+            return
+        logger.warning("LOAD DATA LOCAL INFILE unavailable; falling back to batched inserts")
+    with open(csv_file, newline="") as f:
+        insert_track_rows(database, csv.DictReader(f), chunk_size)
 
 
 def get_id_location(database: Database, cutoff=None):
@@ -67,10 +163,11 @@ def get_id_location(database: Database, cutoff=None):
     return results
 
 
-def export_results(results: list, file_path: str = "output/id_location.csv"):
+def export_results(results: Iterable, file_path: str = "output/id_location.csv"):
     """
-    Export the results of a query to a CSV file. 'results' is a list of tuples.
-    :param results: List of tuples containing the data to be written to CSV
+    Export the results of a query to a CSV file. 'results' is any iterable of tuples;
+    rows are written as they are consumed, so a generator is never materialized.
+    :param results: Iterable of tuples containing the data to be written to CSV
     :param file_path: Path to the CSV file
     :return: None
     """
@@ -135,15 +232,44 @@ def populate_artist_id_column(database: Database):
     logger.debug("Queried DB for id and artist")
     update_query = "UPDATE track_data SET artist_id = %s WHERE artist = %s"
 
-    for artist in artists:
-        params = (artist[0], artist[1])
-        database.execute_query(update_query, params)
-        logger.info(
-            f"Updated {artist[1]} in track_data table; {artists.index(artist) + 1} of {len(artists)}"
-        )
+    for i, (artist_id, artist_name) in enumerate(artists, start=1):
+        database.execute_prepared(update_query, (artist_id, artist_name))
+        logger.info(f"Updated {artist_name} in track_data table; {i} of {len(artists)}")
     logger.debug("Updated artist_id column in track_data table")
 
 
+def populate_artists_and_link(database: Database) -> int:
+    """Add every artist in track_data to the artists table and link track_data.artist_id.
+
+    Set-based replacement for populate_artists_table() + populate_artist_id_column():
+    one INSERT ... SELECT for artists not already present, then one joined UPDATE,
+    instead of a statement per artist. Safe to re-run.
+
+    Args:
+        database: Database connection
+
+    Returns:
+        Number of artists added
+    """
+    database.connect()
+    added = database.execute_query("""
+        INSERT INTO artists (artist)
+        SELECT DISTINCT td.artist
+        FROM track_data td
+        LEFT JOIN artists a ON td.artist = a.artist
+        WHERE a.id IS NULL
+    """)
+    linked = database.execute_query("""
+        UPDATE track_data td
+        JOIN artists a ON td.artist = a.artist
+        SET td.artist_id = a.id
+        WHERE td.artist_id IS NULL OR td.artist_id != a.id
+    """)
+    database.close()
+    logger.info(f"Added {added} artists, linked {linked} tracks to their artist")
+    return added
+
+
 def add_enrichment_attempted_column(database: Database) -> bool:
     """Add enrichment_attempted_at column to artists table.
 
@@ -230,6 +356,157 @@ def add_acoustid_column(database: Database) -> bool:
         return False
 
 
+def add_artist_lc_column(database: Database) -> bool:
+    """Add the indexed, generated artist_lc column (LOWER(artist)) to artists.
+
+    Lets case-insensitive name lookups compare against an index instead of
+    evaluating LOWER(artist) on every row. Those lookups fail without the column,
+    so a failed ALTER raises instead of being logged and skipped.
+
+    Args:
+        database: Database connection
+
+    Returns:
+        True if column was added, False if it already exists
+
+    Raises:
+        RuntimeError: if the column couldn't be added
+    """
+    database.connect()
+
+    check_query = """
+        SELECT COUNT(*)
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'artists'
+          AND COLUMN_NAME = 'artist_lc'
+    """
+    result = database.execute_select_query(check_query)
+
+    if result and result[0][0] > 0:
+        logger.info("artist_lc column already exists in artists")
+        database.close()
+        return False
+
+    alter_query = """
+        ALTER TABLE artists
+        ADD COLUMN artist_lc VARCHAR(255) AS (LOWER(artist)) STORED,
+        ADD INDEX ix_artist_lc (artist_lc)
+    """
+    if database.execute_query(alter_query) is None:
+        database.close()
+        raise RuntimeError("Could not add artist_lc column to artists")
+    logger.info("Added artist_lc column to artists table")
+    database.close()
+    return True
+
+
+# (table, index name, columns) for the artist-enrichment lookups. track_data(artist_id)
+# and similar_artists(artist_id) already carry InnoDB's implicit foreign-key indexes.
+ENRICHMENT_INDEXES = [
+    ("artists", "ix_artists_enrichment_attempted", "enrichment_attempted_at"),
+    ("artists", "ix_artists_musicbrainz_id", "musicbrainz_id"),
+    ("similar_artists", "ix_similar_artists_pair", "artist_id, similar_artist_id"),
+]
+
+
+def add_enrichment_indexes(database: Database) -> int:
+    """Add the indexes used by the artist-enrichment queries.
+
+    Supports get_primary_artists_without_similar() / get_stub_artists_without_mbid()
+    (filtered on enrichment_attempted_at), MBID lookups on artists, and the
+    NOT EXISTS pair check when inserting similar_artists rows. Run after
+    add_enrichment_attempted_column().
+
+    Args:
+        database: Database connection
+
+    Returns:
+        Number of indexes created (0 if all already exist)
+    """
+    database.connect()
+
+    check_query = """
+        SELECT COUNT(*)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND INDEX_NAME = %s
+    """
+    created = 0
+    for table, index_name, columns in ENRICHMENT_INDEXES:
+        result = database.execute_select_query(check_query, (table, index_name))
+        if result and result[0][0] > 0:
+            logger.debug(f"{index_name} already exists on {table}")
+            continue
+
+        if database.execute_query(f"CREATE INDEX {index_name} ON {table} ({columns})") is None:
+            logger.error(f"Failed to add index {index_name} on {table}")
+            continue
+        logger.info(f"Added index {index_name} on {table} ({columns})")
+        created += 1
+
+    database.close()
+    return created
+
+
+def add_unique_plex_id_index(database: Database) -> bool:
+    """Make track_data's plex_id index UNIQUE so track inserts can upsert.
+
+    Databases created before the index was unique keep accepting duplicate
+    plex_ids, and ON DUPLICATE KEY UPDATE then inserts instead of updating. Every
+    track insert path runs this first; if duplicates are already present (or the
+    ALTER fails) it raises rather than let the upsert keep duplicating rows.
+
+    Args:
+        database: Database connection
+
+    Returns:
+        True if the index was (re)built as unique, False if it already was
+
+    Raises:
+        RuntimeError: if duplicate plex_ids exist or the index couldn't be rebuilt
+    """
+    database.connect()
+
+    check_query = """
+        SELECT MIN(NON_UNIQUE)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'track_data'
+          AND INDEX_NAME = 'ix_plex_id'
+    """
+    result = database.execute_select_query(check_query)
+    non_unique = result[0][0] if result else None
+    if non_unique == 0:
+        logger.debug("ix_plex_id is already unique on track_data")
+        database.close()
+        return False
+
+    duplicates = database.execute_select_query("""
+        SELECT COUNT(*) FROM (
+            SELECT plex_id FROM track_data
+            WHERE plex_id IS NOT NULL
+            GROUP BY plex_id HAVING COUNT(*) > 1
+        ) d
+    """)
+    if duplicates and duplicates[0][0] > 0:
+        database.close()
+        raise RuntimeError(
+            f"{duplicates[0][0]} plex_ids are duplicated in track_data; remove the duplicate "
+            "rows so ix_plex_id can be made unique"
+        )
+
+    drop = "DROP INDEX ix_plex_id, " if non_unique is not None else ""
+    alter_query = f"ALTER TABLE track_data {drop}ADD UNIQUE INDEX ix_plex_id (plex_id)"
+    if database.execute_query(alter_query) is None:
+        database.close()
+        raise RuntimeError("Could not make ix_plex_id unique on track_data")
+    logger.info("Made ix_plex_id unique on track_data")
+    database.close()
+    return True
+
+
 def get_last_update_date(database: Database):
     """Get the date of the last pipeline run from history table."""
     database.connect()
@@ -322,6 +599,80 @@ def get_stub_artists_without_mbid(database: Database) -> list[tuple[int, str]]:
     return results
 
 
+def artist_has_similar(database: Database, artist_id: int) -> bool:
+    """Check whether an artist has any similar_artists rows.
+
+    Uses EXISTS, so the lookup stops at the first matching row instead of
+    counting them all.
+
+    Args:
+        database: Database connection object
+        artist_id: ID of the artist to check
+
+    Returns:
+        True if at least one similar artist is recorded
+    """
+    database.connect()
+    result = database.execute_select_query(
+        "SELECT EXISTS(SELECT 1 FROM similar_artists WHERE artist_id = %s)", (artist_id,)
+    )
+    database.close()
+    return bool(result and result[0][0])
+
+
+# Artists not yet enriched, flagged by whether they have tracks (primary) or not (stub)
+_UNENRICHED_ARTISTS_QUERY = """
+    SELECT a.id, a.artist,
+           EXISTS(SELECT 1 FROM track_data td WHERE td.artist_id = a.id) AS has_tracks
+    FROM artists a
+    WHERE a.enrichment_attempted_at IS NULL
+"""
+
+
+def count_artists_needing_enrichment(database: Database) -> tuple[int, int]:
+    """Count primary and stub artists needing enrichment in one query.
+
+    Args:
+        database: Database connection object
+
+    Returns:
+        (primary, stubs) counts: artists get_primary_artists_without_similar()
+        and get_stub_artists_without_mbid() would return
+    """
+    database.connect()
+    result = database.execute_select_query(f"""
+        SELECT COALESCE(SUM(has_tracks), 0), COALESCE(SUM(NOT has_tracks), 0)
+        FROM ({_UNENRICHED_ARTISTS_QUERY}) unenriched
+    """)
+    database.close()
+    if not result:
+        return 0, 0
+    primary, stubs = result[0]
+    return int(primary), int(stubs)
+
+
+def count_stub_artists_without_mbid(database: Database) -> int:
+    """Count the artists get_stub_artists_without_mbid() would return.
+
+    Args:
+        database: Database connection object
+
+    Returns:
+        Number of stub artists needing enrichment
+    """
+    database.connect()
+    query = """
+        SELECT COUNT(*)
+        FROM artists a
+        LEFT JOIN track_data td ON a.id = td.artist_id
+        WHERE td.id IS NULL
+          AND a.enrichment_attempted_at IS NULL
+    """
+    result = database.execute_select_query(query)
+    database.close()
+    return result[0][0] if result else 0
+
+
 def get_tracks_by_artist_name(
     database: Database,
     artist_names: list[str],
@@ -344,7 +695,7 @@ def get_tracks_by_artist_name(
         SELECT td.id, td.filepath, a.artist, td.musicbrainz_id, a.id, a.musicbrainz_id, td.acoustid
         FROM track_data td
         INNER JOIN artists a ON td.artist_id = a.id
-        WHERE LOWER(a.artist) IN ({placeholders})
+        WHERE a.artist_lc IN ({placeholders})
           AND td.filepath IS NOT NULL AND td.filepath != ''
     """
     params = tuple(name.lower() for name in artist_names)
@@ -374,7 +725,7 @@ def get_artist_names_found(
     query = f"""
         SELECT DISTINCT a.artist
         FROM artists a
-        WHERE LOWER(a.artist) IN ({placeholders})
+        WHERE a.artist_lc IN ({placeholders})
     """
     params = tuple(name.lower() for name in artist_names)
     results = database.execute_select_query(query, params)
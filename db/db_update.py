@@ -1,7 +1,9 @@
 import json
 import os
 import re
-from time import sleep
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
 
 from loguru import logger
 
@@ -9,11 +11,13 @@ import analysis.acousticbrainz as acousticbrainz
 import analysis.acoustid as acoustid
 import analysis.bpm as bpm_analysis
 import analysis.lastfm as lastfm
+import analysis.ratelimit as ratelimit
 from analysis.ffmpeg import (
     map_plex_path_to_local,
     validate_path_mapping,
     verify_path_accessible,
 )
+from config import bounded_map
 
 from . import DB_PASSWORD, DB_PATH, DB_USER, TEST_DB
 from .database import Database
@@ -21,25 +25,39 @@ from .database import Database
 # TODO change database for production
 database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)
 
+# Concurrent Last.fm track.getInfo requests in process_lastfm_track_data()
+LASTFM_TRACK_WORKERS = 4
+# Concurrent Last.fm artist.getInfo requests in enrich_artists_core()/enrich_artists_full()
+LASTFM_ARTIST_WORKERS = 4
+# Ceiling for the adaptive in-flight request cap in fetch_lastfm_track_data()
+LASTFM_TRACK_MAX_WORKERS = 16
+# Responses slower than this (seconds) count as backpressure and halve concurrency
+LASTFM_TARGET_LATENCY = 1.0
+# Times a throttled track request is retried before giving up on it
+LASTFM_THROTTLE_RETRIES = 3
+# Requests the Last.fm limiter lets through back-to-back after idle time
+LASTFM_RATE_BURST = 5
+# Last.fm requests submitted ahead of the consumer, per pool thread
+LASTFM_FETCH_WINDOW = 2
+# Parsed track results buffered per batched write in process_lastfm_track_data()
+LASTFM_TRACK_WRITE_BATCH = 2000
+# Tracks per CASE-WHEN UPDATE in _update_track_bpms()
+BPM_UPDATE_BATCH = 500
+# Files read into the page cache ahead of the one Essentia is analyzing
+ESSENTIA_PREFETCH = 4
+# Artists whose Last.fm results are buffered per batched write in enrich_artists_*()
+ARTIST_WRITE_BATCH = 100
+
 
 def populate_genres_table_from_track_data(database: Database):
     logger.debug("Starting to populate genres table from track data.")
     database.connect()
-    query = "SELECT genre FROM track_data"
-    results = database.execute_select_query(query)
-    genre_list = []
-
-    for result in results:
-        genre_str = result[0]
-        if genre_str != "[]":
-            try:
-                genre_str = genre_str.strip("[]").replace("'", "")
-                genres = [genre.strip() for genre in genre_str.split(",")]
-                genre_list.extend(genres)
-            except Exception as e:
-                logger.error(f"Error processing genre string: {e} - genre_str: {genre_str}")
-
-    genre_list = list(set(genre_list))
+    # Split in MySQL with the same rules populate_genres_from_track_data() uses
+    query = f"""
+        {TRACK_GENRE_SPLIT_CTE}
+        SELECT DISTINCT genre FROM track_genre_split WHERE genre != ''
+    """
+    genre_list = [result[0] for result in database.execute_select_query(query)]
     logger.info(f"Extracted genres: {genre_list}")
     database.close()
     logger.debug("Finished populating genres table from track data.")
@@ -98,6 +116,82 @@ def populate_track_genre_table(database: Database):
     return None
 
 
+# Splits track_data.genre ("['Rock', 'Alternative']") into (track_id, genre) rows
+# inside MySQL, with the same strip("[]") / drop quotes / split(",") / strip()
+# rules the Python helpers above apply. CHAR(39) is the single quote.
+TRACK_GENRE_SPLIT_CTE = """
+    WITH RECURSIVE track_genre_split (track_id, genre, rest) AS (
+        SELECT
+            id,
+            TRIM(SUBSTRING_INDEX(genre_list, ',', 1)),
+            IF(LOCATE(',', genre_list) > 0, SUBSTRING(genre_list, LOCATE(',', genre_list) + 1), NULL)
+        FROM (
+            SELECT id, REPLACE(TRIM(BOTH ']' FROM TRIM(BOTH '[' FROM genre)), CHAR(39), '') AS genre_list
+            FROM track_data
+            WHERE genre IS NOT NULL AND genre != '[]'
+        ) td
+        UNION ALL
+        SELECT
+            track_id,
+            TRIM(SUBSTRING_INDEX(rest, ',', 1)),
+            IF(LOCATE(',', rest) > 0, SUBSTRING(rest, LOCATE(',', rest) + 1), NULL)
+        FROM track_genre_split
+        WHERE rest IS NOT NULL
+    )
+"""
+
+
+def populate_genres_from_track_data(database: Database) -> None:
+    """Populate genres and track_genres from track_data.genre with set-based SQL.
+
+    Replaces the populate_genres_table_from_track_data() ->
+    insert_genres_if_not_exists() -> populate_track_genre_table() sequence, which
+    scanned track_data twice and issued a SELECT + INSERT per track-genre pair.
+    Here the genre strings are split in MySQL and each table is filled by one
+    INSERT ... SELECT. Both inserts skip rows that already exist, so re-running
+    after an incremental update doesn't duplicate track_genres.
+
+    Args:
+        database: Database connection object
+    """
+    logger.debug("Starting to populate genres and track genres from track data.")
+    database.connect()
+
+    database.execute_query(
+        f"""
+        INSERT INTO genres (genre)
+        {TRACK_GENRE_SPLIT_CTE}
+        SELECT DISTINCT s.genre
+        FROM track_genre_split s
+        WHERE s.genre != ''
+          AND NOT EXISTS (SELECT 1 FROM genres g WHERE g.genre = s.genre)
+        """
+    )
+    logger.info("Inserted new genres from track data")
+
+    database.execute_query(
+        f"""
+        INSERT INTO track_genres (track_id, genre_id)
+        {TRACK_GENRE_SPLIT_CTE}
+        SELECT DISTINCT p.track_id, p.genre_id
+        FROM (
+            SELECT s.track_id, MIN(g.id) AS genre_id
+            FROM track_genre_split s
+            INNER JOIN genres g ON g.genre = s.genre
+            GROUP BY s.track_id, s.genre
+        ) p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM track_genres tg
+            WHERE tg.track_id = p.track_id AND tg.genre_id = p.genre_id
+        )
+        """
+    )
+    logger.info("Inserted track-genre pairs from track data")
+
+    database.close()
+    logger.debug("Finished populating genres and track genres from track data.")
+
+
 def update_track_genre_table(database: Database, cutoff: str = None):
     logger.debug("Starting to update track genre table.")
     database.connect()
@@ -186,142 +280,205 @@ def check_tags_and_insert(database: Database, lastfm_json: json, genre_list: lis
     database.close()
 
 
-def _process_artist_mbid_and_genres(
+def _link_by_name(
     database: Database,
-    artist_id: int,
-    artist_name: str,
-    artist_info: dict,
-) -> dict:
-    """Process MBID and genres for a single artist (internal helper).
+    pairs: list[tuple[int, str]],
+    name_table: str,
+    name_column: str,
+    link_table: str,
+    link_column: str,
+    owner_column: str = "artist_id",
+) -> int:
+    """Link artists (or tracks) to named rows in a few batched statements (internal helper).
+
+    The pairs are staged in a temporary table whose name column copies
+    name_table.name_column, so names are matched by MySQL under that column's
+    collation (case, accents, trailing spaces) rather than by Python. Missing names
+    are inserted first, then (<owner id>, <name id>) rows are added to link_table.
+    Links that already exist are left alone.
 
     Args:
         database: Database connection (must already be connected)
-        artist_id: Artist ID in database
-        artist_name: Artist name for logging
-        artist_info: Last.fm API response for artist
+        pairs: (owner id, name) tuples; empty names are ignored
+        name_table: Table holding the names, e.g. 'genres'
+        name_column: Name column in name_table, e.g. 'genre'
+        link_table: Table joining owners to name_table, e.g. 'artist_genres'
+        link_column: Column in link_table referencing name_table, e.g. 'genre_id'
+        owner_column: Column in link_table holding the owner id, e.g. 'track_id'
 
     Returns:
-        dict with 'mbid_updated' (bool) and 'genres_added' (int)
+        Number of pairs linked or already linked
     """
-    result = {"mbid_updated": False, "genres_added": 0}
+    pairs = [(owner_id, name) for owner_id, name in pairs if name]
+    if not pairs:
+        return 0
 
-    # Update MusicBrainz ID if available
-    mbid = lastfm.get_artist_mbid(artist_info)
-    if mbid:
-        logger.debug(f"MBID for {artist_name}: {mbid}")
+    stage = f"{link_table}_stage"
+    database.execute_query(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
+    if (
         database.execute_query(
-            "UPDATE artists SET musicbrainz_id = %s WHERE id = %s", (mbid, artist_id)
+            f"CREATE TEMPORARY TABLE {stage} (owner_id INTEGER NOT NULL) "
+            f"SELECT {name_column} AS name FROM {name_table} LIMIT 0"
+        )
+        is None
+    ):
+        return 0
+    try:
+        if not database.execute_many(
+            f"INSERT INTO {stage} (owner_id, name) VALUES (%s, %s)", pairs
+        ):
+            logger.error(f"Failed to stage {len(pairs)} {link_table} links")
+            return 0
+
+        # One new row per collation-equivalent name
+        new_names = database.execute_query(
+            f"INSERT INTO {name_table} ({name_column}) "
+            f"SELECT MIN(s.name) FROM {stage} s "
+            f"WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {name_table} n WHERE n.{name_column} = s.name) "
+            f"GROUP BY s.name"
+        )
+        links = database.execute_query(
+            f"INSERT INTO {link_table} ({owner_column}, {link_column}) "
+            f"SELECT DISTINCT r.owner_id, r.name_id FROM ("
+            f"SELECT s.owner_id, "
+            f"(SELECT MIN(n.id) FROM {name_table} n WHERE n.{name_column} = s.name) AS name_id "
+            f"FROM {stage} s) r "
+            f"WHERE r.name_id IS NOT NULL AND NOT EXISTS "
+            f"(SELECT 1 FROM {link_table} l "
+            f"WHERE l.{owner_column} = r.owner_id AND l.{link_column} = r.name_id)"
         )
-        result["mbid_updated"] = True
+        if new_names is None or links is None:
+            logger.error(f"Failed to write {len(pairs)} {link_table} links")
+            return 0
+    finally:
+        database.execute_query(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
 
-    # Process genres
-    genres = lastfm.get_artist_tags(artist_info)
-    for genre in genres:
-        genre = genre.lower()
-        try:
-            # Insert genre if not exists using WHERE NOT EXISTS
-            database.execute_query(
-                """
-                INSERT INTO genres (genre)
-                SELECT %s
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM genres
-                    WHERE LOWER(genre) = LOWER(%s)
-                )
-            """,
-                (genre, genre),
-            )
+    logger.debug(f"Linked {len(pairs)} {link_table} ({links} new, {new_names} new {name_table})")
+    return len(pairs)
 
-            # Get genre ID
-            genre_id = database.execute_select_query(
-                "SELECT id FROM genres WHERE LOWER(genre) = LOWER(%s)", (genre,)
-            )[0][0]
-
-            # Insert genre relationship if not exists
-            database.execute_query(
-                """
-                INSERT INTO artist_genres (artist_id, genre_id)
-                SELECT %s, %s
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM artist_genres
-                    WHERE artist_id = %s AND genre_id = %s
-                )
-            """,
-                (artist_id, genre_id, artist_id, genre_id),
-            )
 
-            result["genres_added"] += 1
-            logger.debug(f"Processed genre for {artist_name}: {genre}")
-        except Exception as e:
-            logger.error(f"Error processing genre {genre} for {artist_name}: {e}")
+def _write_artist_genres(database: Database, pairs: list[tuple[int, str]]) -> int:
+    """Link artists to their Last.fm tags, adding new genres (internal helper).
 
-    return result
+    Args:
+        database: Database connection (must already be connected)
+        pairs: (artist_id, tag) tuples
 
+    Returns:
+        Number of genres processed
+    """
+    pairs = [(artist_id, tag.lower()) for artist_id, tag in pairs if tag]
+    return _link_by_name(database, pairs, "genres", "genre", "artist_genres", "genre_id")
 
-def _process_similar_artists(
-    database: Database,
-    artist_id: int,
-    artist_name: str,
-    artist_info: dict,
-) -> int:
-    """Process similar artists for a single artist (internal helper).
+
+def _write_similar_artists(database: Database, pairs: list[tuple[int, str]]) -> int:
+    """Link artists to their similar artists, adding new ones as stubs (internal helper).
 
     Args:
         database: Database connection (must already be connected)
-        artist_id: Artist ID in database
-        artist_name: Artist name for logging
-        artist_info: Last.fm API response for artist
+        pairs: (artist_id, similar artist name) tuples
 
     Returns:
-        Number of similar artists added
+        Number of similar artists processed
     """
-    similar_artists = lastfm.get_similar_artists(artist_info)
-    logger.debug(f"Similar artists for {artist_name}: {similar_artists}")
+    return _link_by_name(
+        database, pairs, "artists", "artist", "similar_artists", "similar_artist_id"
+    )
 
-    added = 0
-    for similar_artist in similar_artists:
-        if not similar_artist:
-            continue
 
-        try:
-            # Insert similar artist if not exists
-            database.execute_query(
-                """
-                INSERT INTO artists (artist)
-                SELECT %s
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM artists
-                    WHERE LOWER(artist) = LOWER(%s)
-                )
-            """,
-                (similar_artist, similar_artist),
-            )
+def _flush_artist_batch(database: Database, pending: dict, stats: dict) -> None:
+    """Write buffered artist enrichment results and empty the buffers (internal helper).
 
-            # Get similar artist ID
-            similar_artist_id = database.execute_select_query(
-                "SELECT id FROM artists WHERE LOWER(artist) = LOWER(%s)",
-                (similar_artist,),
-            )[0][0]
-
-            # Insert similar artist relationship if not exists
-            database.execute_query(
-                """
-                INSERT INTO similar_artists (artist_id, similar_artist_id)
-                SELECT %s, %s
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM similar_artists
-                    WHERE artist_id = %s AND similar_artist_id = %s
-                )
-            """,
-                (artist_id, similar_artist_id, artist_id, similar_artist_id),
-            )
+    Args:
+        database: Database connection (must already be connected)
+        pending: 'attempted' artist ids, 'mbids' {artist_id: mbid}, 'genres' and
+            optionally 'similar' lists of (artist_id, name) pairs
+        stats: Enrichment stats; 'genres_added' and 'similar_added' are incremented
+    """
+    database.ensure_connection()
+
+    if pending["attempted"]:
+        placeholders = ", ".join(["%s"] * len(pending["attempted"]))
+        database.execute_query(
+            f"UPDATE artists SET enrichment_attempted_at = NOW() WHERE id IN ({placeholders})",
+            tuple(pending["attempted"]),
+        )
+
+    if pending["mbids"]:
+        cases = " ".join(["WHEN %s THEN %s"] * len(pending["mbids"]))
+        placeholders = ", ".join(["%s"] * len(pending["mbids"]))
+        params = [value for pair in pending["mbids"].items() for value in pair]
+        database.execute_query(
+            f"UPDATE artists SET musicbrainz_id = CASE id {cases} END "
+            f"WHERE id IN ({placeholders})",
+            (*params, *pending["mbids"]),
+        )
+
+    stats["genres_added"] += _write_artist_genres(database, pending["genres"])
+    if "similar" in pending:
+        stats["similar_added"] += _write_similar_artists(database, pending["similar"])
+
+    for buffer in pending.values():
+        buffer.clear()
+
+
+def _queue_artist_info(pending: dict, artist_id: int, artist_name: str, artist_info: dict) -> bool:
+    """Buffer one artist's MBID, tags and (if tracked) similar artists (internal helper).
+
+    Returns:
+        True if an MBID was found
+    """
+    mbid = lastfm.get_artist_mbid(artist_info)
+    if mbid:
+        logger.debug(f"MBID for {artist_name}: {mbid}")
+        pending["mbids"][artist_id] = mbid
+    pending["genres"].extend((artist_id, tag) for tag in lastfm.get_artist_tags(artist_info))
+    if "similar" in pending:
+        similar_artists = lastfm.get_similar_artists(artist_info)
+        logger.debug(f"Similar artists for {artist_name}: {similar_artists}")
+        pending["similar"].extend((artist_id, name) for name in similar_artists)
+    return bool(mbid)
 
-            added += 1
-            logger.debug(f"Processed similar artist: {artist_name} -> {similar_artist}")
+
+def _request_rate(rate_limit_delay: float) -> str:
+    """Describe a request pacing delay as a rate for logging (internal helper)."""
+    return f"{1 / rate_limit_delay:.1f} req/s" if rate_limit_delay > 0 else "unpaced"
+
+
+def fetch_lastfm_artist_info(
+    artists: list[tuple[int, str]],
+    rate_limit_delay: float = 0.25,
+    max_workers: int = LASTFM_ARTIST_WORKERS,
+) -> Iterator[tuple[tuple[int, str], dict | None]]:
+    """
+    Fetch Last.fm artist info for many artists concurrently, in input order.
+
+    Request starts are paced one per rate_limit_delay on average (bursts of up to
+    LASTFM_RATE_BURST), with up to max_workers in flight so HTTP latency overlaps
+    the pacing instead of adding to it. At most LASTFM_FETCH_WINDOW artists per
+    worker are submitted ahead of the consumer.
+
+    Args:
+        artists: List of (artist_id, artist_name) tuples
+        rate_limit_delay: Minimum seconds between request starts
+        max_workers: Number of concurrent requests
+
+    Yields:
+        (artist tuple, Last.fm response or None) pairs
+    """
+    limiter = ratelimit.RateLimiter(rate_limit_delay, burst=LASTFM_RATE_BURST)
+
+    def fetch(artist):
+        limiter.wait()
+        try:
+            return artist, lastfm.get_artist_info(artist[1])
         except Exception as e:
-            logger.error(f"Error processing similar artist {similar_artist} for {artist_name}: {e}")
+            logger.error(f"Error fetching Last.fm data for artist {artist[1]}: {e}")
+            return artist, None
 
-    return added
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from bounded_map(executor, fetch, artists, LASTFM_FETCH_WINDOW * max_workers)
 
 
 def enrich_artists_core(
@@ -350,17 +507,18 @@ def enrich_artists_core(
         "failed": 0,
     }
 
+    if artist_ids is not None and not artist_ids:
+        # Empty list = nothing to process, so don't take a connection at all
+        logger.debug("No artists to enrich (empty list)")
+        return stats
+
     logger.info("Starting core artist enrichment (MBID + genres only)")
-    logger.info(f"Rate limit delay: {rate_limit_delay}s ({1 / rate_limit_delay:.1f} req/s)")
+    logger.info(f"Rate limit delay: {rate_limit_delay}s ({_request_rate(rate_limit_delay)})")
     database.connect()
 
     try:
         # Build query based on whether artist_ids is provided
         if artist_ids is not None:
-            if not artist_ids:  # Empty list = nothing to process
-                logger.info("No artists to enrich (empty list)")
-                database.close()
-                return stats
             placeholders = ",".join(["%s"] * len(artist_ids))
             query = f"SELECT id, artist FROM artists WHERE id IN ({placeholders})"
             artists = database.execute_select_query(query, tuple(artist_ids))
@@ -370,35 +528,26 @@ def enrich_artists_core(
         stats["total"] = len(artists)
         logger.info(f"Found {stats['total']} artists to enrich (core)")
 
-        for i, (artist_id, artist_name) in enumerate(artists):
-            try:
-                if i > 0:
-                    sleep(rate_limit_delay)
-
-                # Keep connection alive during long-running loops
-                database.ensure_connection()
-
-                artist_info = lastfm.get_artist_info(artist_name)
+        # Requests run ahead on worker threads; results are written in batches of
+        # ARTIST_WRITE_BATCH artists on this one
+        fetched = fetch_lastfm_artist_info(artists, rate_limit_delay)
+        pending = {"attempted": [], "mbids": {}, "genres": []}
+        for i, ((artist_id, artist_name), artist_info) in enumerate(fetched):
+            if len(pending["attempted"]) >= ARTIST_WRITE_BATCH:
+                _flush_artist_batch(database, pending, stats)
 
+            try:
                 # Mark enrichment attempted regardless of success
-                database.execute_query(
-                    "UPDATE artists SET enrichment_attempted_at = NOW() WHERE id = %s",
-                    (artist_id,),
-                )
+                pending["attempted"].append(artist_id)
 
                 if not artist_info:
                     logger.warning(f"Failed to retrieve artist info for {artist_name}")
                     stats["failed"] += 1
                     continue
 
-                result = _process_artist_mbid_and_genres(
-                    database, artist_id, artist_name, artist_info
-                )
-
-                stats["processed"] += 1
-                if result["mbid_updated"]:
+                if _queue_artist_info(pending, artist_id, artist_name, artist_info):
                     stats["mbid_updated"] += 1
-                stats["genres_added"] += result["genres_added"]
+                stats["processed"] += 1
 
                 if (i + 1) % 50 == 0:
                     logger.info(
@@ -410,6 +559,8 @@ def enrich_artists_core(
                 logger.error(f"Error processing artist {artist_name}: {e}")
                 stats["failed"] += 1
 
+        _flush_artist_batch(database, pending, stats)
+
     except Exception as e:
         logger.error(f"Error in core artist enrichment: {e}")
         raise
@@ -450,17 +601,18 @@ def enrich_artists_full(
         "failed": 0,
     }
 
+    if artist_ids is not None and not artist_ids:
+        # Empty list = nothing to process, so don't take a connection at all
+        logger.debug("No artists to enrich (empty list)")
+        return stats
+
     logger.info("Starting full artist enrichment (MBID + genres + similar artists)")
-    logger.info(f"Rate limit delay: {rate_limit_delay}s ({1 / rate_limit_delay:.1f} req/s)")
+    logger.info(f"Rate limit delay: {rate_limit_delay}s ({_request_rate(rate_limit_delay)})")
     database.connect()
 
     try:
         # Build query based on whether artist_ids is provided
         if artist_ids is not None:
-            if not artist_ids:  # Empty list = nothing to process
-                logger.info("No artists to enrich (empty list)")
-                database.close()
-                return stats
             placeholders = ",".join(["%s"] * len(artist_ids))
             query = f"SELECT id, artist FROM artists WHERE id IN ({placeholders})"
             artists = database.execute_select_query(query, tuple(artist_ids))
@@ -470,41 +622,26 @@ def enrich_artists_full(
         stats["total"] = len(artists)
         logger.info(f"Found {stats['total']} artists to enrich (full)")
 
-        for i, (artist_id, artist_name) in enumerate(artists):
-            try:
-                if i > 0:
-                    sleep(rate_limit_delay)
-
-                # Keep connection alive during long-running loops
-                database.ensure_connection()
-
-                artist_info = lastfm.get_artist_info(artist_name)
+        # Requests run ahead on worker threads; results are written in batches of
+        # ARTIST_WRITE_BATCH artists on this one
+        fetched = fetch_lastfm_artist_info(artists, rate_limit_delay)
+        pending = {"attempted": [], "mbids": {}, "genres": [], "similar": []}
+        for i, ((artist_id, artist_name), artist_info) in enumerate(fetched):
+            if len(pending["attempted"]) >= ARTIST_WRITE_BATCH:
+                _flush_artist_batch(database, pending, stats)
 
+            try:
                 # Mark enrichment attempted regardless of success
-                database.execute_query(
-                    "UPDATE artists SET enrichment_attempted_at = NOW() WHERE id = %s",
-                    (artist_id,),
-                )
+                pending["attempted"].append(artist_id)
 
                 if not artist_info:
                     logger.warning(f"Failed to retrieve artist info for {artist_name}")
                     stats["failed"] += 1
                     continue
 
-                # Process MBID and genres
-                result = _process_artist_mbid_and_genres(
-                    database, artist_id, artist_name, artist_info
-                )
-                stats["processed"] += 1
-                if result["mbid_updated"]:
+                if _queue_artist_info(pending, artist_id, artist_name, artist_info):
                     stats["mbid_updated"] += 1
-                stats["genres_added"] += result["genres_added"]
-
-                # Process similar artists
-                similar_count = _process_similar_artists(
-                    database, artist_id, artist_name, artist_info
-                )
-                stats["similar_added"] += similar_count
+                stats["processed"] += 1
 
                 if (i + 1) % 50 == 0:
                     logger.info(
@@ -516,6 +653,8 @@ def enrich_artists_full(
                 logger.error(f"Error processing artist {artist_name}: {e}")
                 stats["failed"] += 1
 
+        _flush_artist_batch(database, pending, stats)
+
     except Exception as e:
         logger.error(f"Error in full artist enrichment: {e}")
         raise
@@ -577,66 +716,155 @@ def insert_lastfm_track_data(
             track=title,
             mbid=existing_mbid,
         )
-        if not lfm_track_data:
-            return False
-
-        logger.debug(f"Received Last.fm data for {title}: {lfm_track_data}")
-
-        # Update MBID if we don't have one yet
-        if not existing_mbid:
-            track_mbid = lastfm.get_track_mbid(lfm_track_data)
-            if track_mbid:
-                database.execute_query(
-                    "UPDATE track_data SET musicbrainz_id = %s WHERE id = %s",
-                    (track_mbid, track_id),
-                )
-                logger.info(f"Updated MBID for {title}: {track_mbid}")
+    except Exception as e:
+        logger.error(f"Error processing track {title}: {e}")
+        return False
 
-        # Process track genres (always, regardless of MBID status)
-        track_genres = lastfm.get_track_tags(lfm_track_data)
-        for genre in track_genres:
-            genre = genre.lower()
-            try:
-                # Insert genre if not exists using WHERE NOT EXISTS
-                database.execute_query(
-                    """
-                    INSERT INTO genres (genre)
-                    SELECT %s
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM genres
-                        WHERE LOWER(genre) = LOWER(%s)
-                    )
-                """,
-                    (genre, genre),
-                )
+    result = _parse_lastfm_track_data(db_track_data, lfm_track_data)
+    if result is None:
+        return False
 
-                # Get genre ID
-                genre_id = database.execute_select_query(
-                    "SELECT id FROM genres WHERE LOWER(genre) = LOWER(%s)", (genre,)
-                )[0][0]
-
-                # Insert genre relationship if not exists
-                database.execute_query(
-                    """
-                    INSERT INTO track_genres (track_id, genre_id)
-                    SELECT %s, %s
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM track_genres
-                        WHERE track_id = %s AND genre_id = %s
-                    )
-                """,
-                    (track_id, genre_id, track_id, genre_id),
-                )
+    try:
+        _store_lastfm_track_results(database, [result])
+    except Exception as e:
+        logger.error(f"Error processing track {title}: {e}")
+        return False
+    return True
 
-                logger.debug(f"Processed genre for {title}: {genre}")
-            except Exception as e:
-                logger.error(f"Error processing genre {genre} for {title}: {e}")
 
+def _parse_lastfm_track_data(
+    db_track_data: tuple[int, str, str, str | None],
+    lfm_track_data: dict | None,
+) -> tuple[int, str | None, list[str]] | None:
+    """Pull the fields to store out of a Last.fm track response (internal helper).
+
+    Args:
+        db_track_data: Tuple of (track_id, artist_name, track_title, existing_mbid)
+        lfm_track_data: Last.fm track.getInfo response, or None if the lookup failed
+
+    Returns:
+        (track_id, MBID to set or None, lowercased genres), or None if there was no data
+    """
+    track_id, artist, title, existing_mbid = db_track_data
+    if not lfm_track_data:
+        return None
+
+    logger.debug(f"Received Last.fm data for {title}: {lfm_track_data}")
+
+    # Update MBID if we don't have one yet
+    track_mbid = None
+    if not existing_mbid:
+        track_mbid = lastfm.get_track_mbid(lfm_track_data) or None
+
+    # Track genres are stored regardless of MBID status
+    genres = [genre.lower() for genre in lastfm.get_track_tags(lfm_track_data)]
+    return track_id, track_mbid, genres
+
+
+def _store_lastfm_track_results(
+    database: Database,
+    results: list[tuple[int, str | None, list[str]]],
+) -> bool:
+    """Write a batch of parsed Last.fm track results (internal helper).
+
+    Uses a fixed number of statements per batch rather than several per track:
+    one batched MBID update, then _link_by_name() adds missing genres and
+    track_genres pairs, matching genre names under the column's collation.
+
+    Args:
+        database: Database connection (should already be connected)
+        results: (track_id, MBID to set or None, lowercased genres) tuples
+
+    Returns:
+        True if every write succeeded
+    """
+    if not results:
         return True
 
-    except Exception as e:
-        logger.error(f"Error processing track {title}: {e}")
+    mbid_updates = [(mbid, track_id) for track_id, mbid, _ in results if mbid]
+    if not database.execute_many(
+        "UPDATE track_data SET musicbrainz_id = %s WHERE id = %s", mbid_updates
+    ):
         return False
+    if mbid_updates:
+        logger.info(f"Updated MBID for {len(mbid_updates)} tracks")
+
+    pairs = [(track_id, genre) for track_id, _, genres in results for genre in genres if genre]
+    linked = _link_by_name(
+        database, pairs, "genres", "genre", "track_genres", "genre_id", owner_column="track_id"
+    )
+    return linked == len(pairs)
+
+
+def fetch_lastfm_track_data(
+    tracks: list[tuple[int, str, str, str | None]],
+    rate_limit_delay: float = 0.25,
+    max_workers: int = LASTFM_TRACK_WORKERS,
+) -> Iterator[tuple[tuple[int, str, str, str | None], dict | None]]:
+    """
+    Fetch Last.fm track data for many tracks concurrently, in input order.
+
+    Requests are started at an average of one per rate_limit_delay (with bursts
+    of up to LASTFM_RATE_BURST), but several can be in flight at once so HTTP
+    latency no longer adds to the delay.
+    The number in flight starts at max_workers and adapts AIMD-style: it grows
+    by half a request per fast response and halves when Last.fm throttles us or
+    a response takes longer than LASTFM_TARGET_LATENCY. Throttled requests pause
+    the shared limiter for Retry-After (or an exponential backoff) and are retried,
+    and responses reporting a nearly spent quota pause it until the reset.
+    Tracks are submitted lazily, at most LASTFM_FETCH_WINDOW per pool thread ahead
+    of the consumer, so responses never pile up faster than they are written.
+
+    Args:
+        tracks: List of (track_id, artist_name, track_title, existing_mbid) tuples
+        rate_limit_delay: Minimum seconds between request starts
+        max_workers: Initial number of concurrent requests
+
+    Yields:
+        (track tuple, Last.fm response or None) pairs
+    """
+    limiter = ratelimit.RateLimiter(rate_limit_delay, burst=LASTFM_RATE_BURST)
+    concurrency = ratelimit.AdaptiveConcurrency(
+        initial=max_workers,
+        maximum=max(max_workers, LASTFM_TRACK_MAX_WORKERS),
+        target_latency=LASTFM_TARGET_LATENCY,
+    )
+
+    def fetch(track_data):
+        track_id, artist, title, existing_mbid = track_data
+        for attempt in range(LASTFM_THROTTLE_RETRIES + 1):
+            concurrency.acquire()
+            limiter.wait()
+            started = monotonic()
+            throttled = False
+            try:
+                # Prefer MBID lookup for precision, fall back to artist+track
+                return track_data, lastfm.get_last_fm_track_data(
+                    artist=artist,
+                    track=title,
+                    mbid=existing_mbid,
+                    limiter=limiter,
+                )
+            except ratelimit.RateLimited as e:
+                throttled = True
+                backoff = e.retry_after or 2**attempt
+                # Back off through the shared limiter so every worker holds, not just this one
+                limiter.pause(backoff)
+            except Exception as e:
+                logger.error(f"Error fetching Last.fm data for track {title}: {e}")
+                return track_data, None
+            finally:
+                concurrency.release(monotonic() - started, throttled)
+            logger.warning(
+                "Last.fm throttled track {} (attempt {}), backing off {}s",
+                title, attempt + 1, backoff,
+            )
+        logger.error(f"Giving up on Last.fm track {title} after repeated throttling")
+        return track_data, None
+
+    pool_size = max(max_workers, LASTFM_TRACK_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        yield from bounded_map(executor, fetch, tracks, LASTFM_FETCH_WINDOW * pool_size)
 
 
 def process_lastfm_track_data(
@@ -665,7 +893,7 @@ def process_lastfm_track_data(
         dict with stats: {'total': int, 'processed': int, 'updated': int, 'skipped': int, 'failed': int}
     """
     logger.info("Starting Last.fm track data enrichment (Phase 6)")
-    logger.info(f"Rate limit delay: {rate_limit_delay}s ({1 / rate_limit_delay:.1f} req/s)")
+    logger.info(f"Rate limit delay: {rate_limit_delay}s ({_request_rate(rate_limit_delay)})")
 
     stats = {
         "total": 0,
@@ -709,17 +937,28 @@ def process_lastfm_track_data(
     # Estimate time
     estimated_seconds = stats["total"] * rate_limit_delay
     estimated_hours = estimated_seconds / 3600
-    logger.info(f"Estimated time: {estimated_hours:.1f} hours at {1 / rate_limit_delay:.1f} req/s")
-
-    for i, track_data in enumerate(tracks):
-        track_id, artist, title, existing_mbid = track_data
+    logger.info(
+        f"Estimated time: {estimated_hours:.1f} hours at {_request_rate(rate_limit_delay)}"
+    )
 
-        # Rate limiting
-        if i > 0:  # Skip delay on first request
-            sleep(rate_limit_delay)
+    # HTTP fetches run (rate-limited) on worker threads; DB writes stay on this one
+    fetched = fetch_lastfm_track_data(tracks, rate_limit_delay)
+    pending = []
 
+    def flush() -> None:
         # Keep connection alive during long-running loops
         database.ensure_connection()
+        try:
+            stored = _store_lastfm_track_results(database, pending)
+        except Exception as e:
+            logger.error(f"Error storing Last.fm data for {len(pending)} tracks: {e}")
+            stored = False
+        # Tracks only count as updated once their batch is written
+        stats["updated" if stored else "failed"] += len(pending)
+        pending.clear()
+
+    for i, (track_data, lfm_track_data) in enumerate(fetched):
+        track_id, artist, title, existing_mbid = track_data
 
         stats["processed"] += 1
 
@@ -727,14 +966,17 @@ def process_lastfm_track_data(
         lookup_method = "MBID" if existing_mbid else "artist+track"
         logger.debug(f"[{i + 1}/{stats['total']}] {artist} - {title} (via {lookup_method})")
 
-        # Process track (pass full tuple including MBID)
-        success = insert_lastfm_track_data(database, track_data)
+        # Buffer the prefetched response; writes go out in batches
+        result = _parse_lastfm_track_data(track_data, lfm_track_data)
 
-        if success:
-            stats["updated"] += 1
+        if result is not None:
+            pending.append(result)
         else:
             stats["failed"] += 1
 
+        if len(pending) >= LASTFM_TRACK_WRITE_BATCH:
+            flush()
+
         # Progress logging every 100 tracks
         if (i + 1) % 100 == 0:
             elapsed_pct = (i + 1) / stats["total"] * 100
@@ -743,6 +985,7 @@ def process_lastfm_track_data(
                 f"{stats['updated']} updated, {stats['failed']} failed"
             )
 
+    flush()
     database.close()
 
     logger.info(
@@ -757,6 +1000,44 @@ def process_lastfm_track_data(
     return stats
 
 
+def _update_track_bpms(
+    database: Database,
+    bpms: dict[int, float],
+    mbids: dict[int, str] | None = None,
+) -> int:
+    """
+    Write BPMs (and optionally resolved MBIDs) BPM_UPDATE_BATCH tracks per statement.
+
+    Each chunk is one ``UPDATE ... SET bpm = CASE id WHEN .. THEN .. END WHERE id IN (..)``
+    and one commit, instead of an UPDATE and commit per track.
+
+    Args:
+        database: Database connection object
+        bpms: Dict mapping track_id -> BPM (rounded to int on write)
+        mbids: Optional dict mapping track_id -> MBID to store alongside
+
+    Returns:
+        Number of rows updated
+    """
+    updated = 0
+    items = list(bpms.items())
+    for i in range(0, len(items), BPM_UPDATE_BATCH):
+        chunk = items[i : i + BPM_UPDATE_BATCH]
+        ids = [track_id for track_id, _ in chunk]
+        cases = "CASE id " + "WHEN %s THEN %s " * len(chunk) + "END"
+        assignments = [f"bpm = {cases}"]
+        params = [value for track_id, bpm in chunk for value in (track_id, round(bpm))]
+        if mbids is not None:
+            assignments.append(f"musicbrainz_id = {cases}")
+            params += [value for track_id in ids for value in (track_id, mbids[track_id])]
+        query = (
+            f"UPDATE track_data SET {', '.join(assignments)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(ids))})"
+        )
+        updated += database.execute_query(query, (*params, *ids)) or 0
+    return updated
+
+
 def process_bpm_acousticbrainz(database: Database) -> dict:
     """
     Fetch BPM from AcousticBrainz for tracks that need it.
@@ -815,16 +1096,7 @@ def process_bpm_acousticbrainz(database: Database) -> dict:
         stats["mbid_lookup"]["misses"] = len(mbid_tracks) - len(bpm_results)
 
         # Update database with results
-        for track_id, bpm_value in bpm_results.items():
-            try:
-                bpm_int = round(bpm_value)
-                database.execute_query(
-                    "UPDATE track_data SET bpm = %s WHERE id = %s", (bpm_int, track_id)
-                )
-                stats["mbid_lookup"]["updated"] += 1
-                logger.debug(f"Updated track {track_id} with BPM {bpm_int}")
-            except Exception as e:
-                logger.error(f"Failed to update BPM for track {track_id}: {e}")
+        stats["mbid_lookup"]["updated"] = _update_track_bpms(database, bpm_results)
 
         logger.info(
             f"Phase 1 complete: {stats['mbid_lookup']['hits']}/{stats['mbid_lookup']['total']} hits "
@@ -865,19 +1137,9 @@ def process_bpm_acousticbrainz(database: Database) -> dict:
             stats["acoustid_lookup"]["misses"] = len(resolved_tracks) - len(bpm_results)
 
             # Update database with BPM results AND store the resolved MBID
-            for track_id, bpm_value in bpm_results.items():
-                try:
-                    bpm_int = round(bpm_value)
-                    resolved_mbid = resolved_mbids[track_id]
-                    # Update both BPM and the resolved MBID
-                    database.execute_query(
-                        "UPDATE track_data SET bpm = %s, musicbrainz_id = %s WHERE id = %s",
-                        (bpm_int, resolved_mbid, track_id)
-                    )
-                    stats["acoustid_lookup"]["updated"] += 1
-                    logger.debug(f"Updated track {track_id} with BPM {bpm_int} and MBID {resolved_mbid}")
-                except Exception as e:
-                    logger.error(f"Failed to update BPM for track {track_id}: {e}")
+            stats["acoustid_lookup"]["updated"] = _update_track_bpms(
+                database, bpm_results, resolved_mbids
+            )
 
             logger.info(
                 f"Phase 2 complete: {stats['acoustid_lookup']['resolved']} resolved, "
@@ -993,57 +1255,69 @@ def process_bpm_essentia(
         f"batch_size={batch_size}, rest={rest_between_batches}s"
     )
 
-    # Process tracks in batches
-    for i, (track_id, plex_path) in enumerate(tracks):
-        # Log before processing each track (helps identify crash point)
-        logger.debug(f"[{i + 1}/{stats['total']}] Processing track_id={track_id}")
+    # Map every path up front so upcoming files can be prefetched while the
+    # current one is analyzed
+    local_paths = [map_plex_path_to_local(path, use_test=use_test_paths) for _, path in tracks]
 
-        # Map Plex path to local path
-        local_path = map_plex_path_to_local(plex_path, use_test=use_test_paths)
+    # Process tracks in batches, ESSENTIA_PREFETCH files read ahead in the background
+    with ThreadPoolExecutor(max_workers=ESSENTIA_PREFETCH) as prefetcher:
+        for path in local_paths[:ESSENTIA_PREFETCH]:
+            if path:
+                prefetcher.submit(bpm_analysis.prefetch_file, path)
 
-        if not local_path or not verify_path_accessible(local_path):
-            logger.debug("  Skipped: file not accessible")
-            stats["inaccessible"] += 1
-            continue
+        for i, ((track_id, _), local_path) in enumerate(zip(tracks, local_paths)):
+            ahead = i + ESSENTIA_PREFETCH
+            if ahead < len(local_paths) and local_paths[ahead]:
+                prefetcher.submit(bpm_analysis.prefetch_file, local_paths[ahead])
 
-        stats["accessible"] += 1
+            # Log before processing each track (helps identify crash point)
+            logger.debug(f"[{i + 1}/{stats['total']}] Processing track_id={track_id}")
 
-        # Log the file being analyzed (this is where CPU-intensive work happens)
-        filename = os.path.basename(local_path) if local_path else "unknown"
-        logger.debug(f"  Analyzing: {filename}")
+            if not local_path or not verify_path_accessible(local_path):
+                logger.debug("  Skipped: file not accessible")
+                stats["inaccessible"] += 1
+                continue
 
-        # Analyze BPM
-        bpm_value = bpm_analysis.get_bpm_essentia(local_path)
+            stats["accessible"] += 1
 
-        if bpm_value is None:
-            logger.debug("  Failed: no BPM detected")
-            stats["failed"] += 1
-            continue
+            # Log the file being analyzed (this is where CPU-intensive work happens)
+            filename = os.path.basename(local_path) if local_path else "unknown"
+            logger.debug(f"  Analyzing: {filename}")
 
-        stats["analyzed"] += 1
-        logger.debug(f"  BPM: {bpm_value:.1f}")
+            # Analyze BPM
+            bpm_value = bpm_analysis.get_bpm_essentia(local_path)
 
-        # Update database
-        try:
-            bpm_int = round(bpm_value)
-            database.execute_query(
-                "UPDATE track_data SET bpm = %s WHERE id = %s", (bpm_int, track_id)
-            )
-            stats["updated"] += 1
-        except Exception as e:
-            logger.error(f"Error updating track {track_id} with BPM {bpm_value}: {e}")
-            stats["errors"] += 1
+            if bpm_value is None:
+                logger.debug("  Failed: no BPM detected")
+                stats["failed"] += 1
+                continue
 
-        # Progress logging and rest between batches
-        if (i + 1) % batch_size == 0:
-            logger.info(
-                f"Batch complete: {i + 1}/{stats['total']} tracks, "
-                f"{stats['analyzed']} analyzed, {stats['updated']} updated. "
-                f"Resting {rest_between_batches}s for CPU cooldown..."
-            )
-            if rest_between_batches > 0:
-                sleep(rest_between_batches)
-            logger.debug("Rest complete, resuming processing")
+            stats["analyzed"] += 1
+            logger.debug(f"  BPM: {bpm_value:.1f}")
+
+            # Update database (execute_prepared logs and returns None on failure)
+            if (
+                database.execute_prepared(
+                    "UPDATE track_data SET bpm = %s WHERE id = %s", (round(bpm_value), track_id)
+                )
+                is None
+            ):
+                logger.error(f"Error updating track {track_id} with BPM {bpm_value}")
+                stats["errors"] += 1
+            else:
+                stats["updated"] += 1
+
+            # Progress logging and rest between batches (nothing left to cool down for
+            # after the last one)
+            if (i + 1) % batch_size == 0 and i + 1 < stats["total"]:
+                logger.info(
+                    f"Batch complete: {i + 1}/{stats['total']} tracks, "
+                    f"{stats['analyzed']} analyzed, {stats['updated']} updated. "
+                    f"Resting {rest_between_batches}s for CPU cooldown..."
+                )
+                if rest_between_batches > 0:
+                    sleep(rest_between_batches)
+                logger.debug("Rest complete, resuming processing")
 
     # Final summary
     logger.info(
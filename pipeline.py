@@ -4,8 +4,8 @@ Pipeline orchestration functions for the music organizer.
 Provides high-level functions to run the full pipeline or incremental updates.
 """
 
-import os
-import tempfile
+import queue
+import threading
 
 from loguru import logger
 
@@ -20,12 +20,18 @@ from analysis.ffmpeg import (
 from db.database import Database
 from db.db_functions import add_acoustid_column
 from plex.plex_library import (
-    export_track_data,
+    build_title_lookups,
     get_all_tracks,
     get_tracks_since_date,
+    iter_track_data,
     listify_track_data,
 )
 
+# Extracted rows buffered between Plex extraction and the DB insert thread
+INSERT_QUEUE_SIZE = 1024
+# plex_ids per IN (...) lookup when checking incoming tracks against track_data
+PLEX_ID_PROBE_CHUNK = 1000
+
 
 def validate_environment(
     database: Database,
@@ -91,43 +97,32 @@ def insert_new_tracks(
     if not track_data:
         return 0
 
-    # Export to temp CSV (using existing insert_tracks function)
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        csv_path = f.name
-
-    try:
-        export_track_data(track_data, csv_path)
-
-        # Get existing plex_ids to avoid duplicates
-        database.connect()
-        existing_plex_ids = database.execute_select_query(
-            "SELECT plex_id FROM track_data WHERE plex_id IS NOT NULL"
+    # Look up only the incoming plex_ids, not every plex_id in track_data
+    incoming_ids = list({t["plex_id"] for t in track_data})
+    existing_ids = set()
+    database.connect()
+    for start in range(0, len(incoming_ids), PLEX_ID_PROBE_CHUNK):
+        chunk = incoming_ids[start : start + PLEX_ID_PROBE_CHUNK]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        rows = database.execute_select_query(
+            f"SELECT plex_id FROM track_data WHERE plex_id IN ({placeholders})", tuple(chunk)
         )
-        existing_ids = {row[0] for row in existing_plex_ids}
-        database.close()
-
-        # Filter out tracks that already exist
-        new_tracks = [t for t in track_data if t["plex_id"] not in existing_ids]
-
-        if not new_tracks:
-            logger.info("No new tracks to insert (all already exist)")
-            return 0
+        existing_ids.update(row[0] for row in rows)
+    database.close()
 
-        # Re-export only new tracks
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-            new_csv_path = f.name
-        export_track_data(new_tracks, new_csv_path)
+    # Filter out tracks that already exist
+    new_tracks = [t for t in track_data if t["plex_id"] not in existing_ids]
 
-        # Insert new tracks
-        dbf.insert_tracks(database, new_csv_path)
-        os.unlink(new_csv_path)
+    if not new_tracks:
+        logger.info("No new tracks to insert (all already exist)")
+        return 0
 
-        logger.info(f"Inserted {len(new_tracks)} new tracks")
-        return len(new_tracks)
+    # Batch-insert straight from the dicts; no temp CSV round-trip
+    dbf.add_unique_plex_id_index(database)
+    dbf.insert_track_rows(database, new_tracks)
 
-    finally:
-        if os.path.exists(csv_path):
-            os.unlink(csv_path)
+    logger.info(f"Inserted {len(new_tracks)} new tracks")
+    return len(new_tracks)
 
 
 def add_new_artists(database: Database) -> int:
@@ -235,8 +230,9 @@ def run_incremental_update(
         logger.info("No new tracks to process")
         return stats
 
-    # Extract and insert new tracks
-    track_data = listify_track_data(new_tracks, filepath_prefix)
+    # Extract and insert new tracks (bulk title lookups avoid per-track reloads)
+    artist_titles, album_titles = build_title_lookups(music_library)
+    track_data = listify_track_data(new_tracks, filepath_prefix, artist_titles, album_titles)
     stats["new_tracks"] = insert_new_tracks(database, track_data, filepath_prefix)
 
     if stats["new_tracks"] == 0:
@@ -246,14 +242,12 @@ def run_incremental_update(
     # Add new artists
     stats["new_artists"] = add_new_artists(database)
 
-    # Extract genres from new tracks
-    genre_list = dbu.populate_genres_table_from_track_data(database)
-    if genre_list:
-        dbu.insert_genres_if_not_exists(database, genre_list)
-        dbu.populate_track_genre_table(database)
+    # Extract genres from new tracks (existing track-genre pairs are skipped)
+    dbu.populate_genres_from_track_data(database)
 
-    # Ensure acoustid column exists (migration is idempotent)
+    # Ensure acoustid and artist_lc columns exist (migrations are idempotent)
     add_acoustid_column(database)
+    dbf.add_artist_lc_column(database)
 
     # MBID extraction (processes tracks without MBID)
     if not skip_ffprobe:
@@ -321,6 +315,59 @@ def run_incremental_update(
     return stats
 
 
+def stream_insert_tracks(
+    database: Database,
+    tracks,
+    filepath_prefix: str = "",
+    artist_titles=None,
+    album_titles=None,
+) -> int:
+    """
+    Extract tracks from Plex and insert them while extraction is still running.
+
+    Extracted rows go through a bounded queue to a consumer thread that upserts
+    them in multi-row batches, so DB round-trips overlap the Plex requests instead
+    of waiting for the whole library to be listed first. Only the consumer thread
+    touches the database until it has been joined.
+
+    Args:
+        database: Database connection object
+        tracks: Iterable of Plex track objects
+        filepath_prefix: Prefix to strip from Plex file paths
+        artist_titles: Optional {ratingKey: title} map from build_title_lookups()
+        album_titles: Optional {ratingKey: title} map from build_title_lookups()
+
+    Returns:
+        Number of tracks inserted
+    """
+    rows = queue.Queue(maxsize=INSERT_QUEUE_SIZE)
+    inserted = []
+    insert_errors = []
+
+    def consume():
+        try:
+            inserted.append(dbf.insert_track_rows(database, iter(rows.get, None)))
+        except Exception as e:
+            insert_errors.append(e)
+            # Keep consuming so the producer never blocks on a full queue
+            while rows.get() is not None:
+                pass
+
+    consumer = threading.Thread(target=consume, name="track-db-insert")
+    consumer.start()
+    try:
+        for track_data in iter_track_data(tracks, filepath_prefix, artist_titles, album_titles):
+            rows.put(track_data)
+    finally:
+        rows.put(None)
+        consumer.join()
+
+    if insert_errors:
+        raise insert_errors[0]
+    logger.info(f"Inserted {inserted[0]} tracks")
+    return inserted[0]
+
+
 def run_full_pipeline(
     database: Database,
     music_library,
@@ -367,26 +414,25 @@ def run_full_pipeline(
 
     stats["total_tracks"] = count
 
-    # Extract and insert tracks
-    track_data = listify_track_data(tracks, filepath_prefix)
-    insert_new_tracks(database, track_data, filepath_prefix)
+    # Extract and insert tracks (bulk title lookups avoid per-track reloads); the
+    # upsert needs a unique plex_id index, which older databases may lack
+    dbf.add_unique_plex_id_index(database)
+    artist_titles, album_titles = build_title_lookups(music_library)
+    stream_insert_tracks(database, tracks, filepath_prefix, artist_titles, album_titles)
 
-    # Populate artists table
-    dbf.populate_artists_table(database)
-    dbf.populate_artist_id_column(database)
+    # Populate artists table and link track_data.artist_id
+    dbf.populate_artists_and_link(database)
 
     database.connect()
     stats["total_artists"] = database.execute_select_query("SELECT COUNT(*) FROM artists")[0][0]
     database.close()
 
     # Extract genres from tracks
-    genre_list = dbu.populate_genres_table_from_track_data(database)
-    if genre_list:
-        dbu.insert_genres_if_not_exists(database, genre_list)
-        dbu.populate_track_genre_table(database)
+    dbu.populate_genres_from_track_data(database)
 
-    # Ensure acoustid column exists (migration is idempotent)
+    # Ensure acoustid and artist_lc columns exist (migrations are idempotent)
     add_acoustid_column(database)
+    dbf.add_artist_lc_column(database)
 
     # MBID extraction
     if not skip_ffprobe:
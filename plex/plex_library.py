@@ -1,8 +1,19 @@
 import csv
+import queue
 import sys
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import sleep
 
+import requests
 from loguru import logger
 from plexapi.myplex import MyPlexAccount
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import bounded_map
 
 from . import (
     PLEX_PASSWORD,
@@ -11,6 +22,94 @@ from . import (
     PLEX_USER,
 )
 
+# searchTracks() options: skip per-track <Guid> children (unused by extract_track_data)
+# and page through the library in fewer, larger requests.
+TRACK_SEARCH_OPTIONS = {"includeGuids": False, "container_size": 1000}
+
+# Worker threads for extract_track_data(); remaining lazy reloads are network-bound
+EXTRACT_WORKERS = 16
+# Tracks submitted ahead of the consumer, per extraction worker
+EXTRACT_WINDOW = 2
+
+TRACK_FIELDNAMES = [
+    "title",
+    "artist",
+    "album",
+    "genre",
+    "added_date",
+    "filepath",
+    "location",
+    "plex_id",
+]
+
+# Transient network failures worth retrying (with 1, 2, 4, 8s backoff) before giving up
+RETRY_ATTEMPTS = 5
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+# searchTracks() halves container_size after each failure, down to this floor
+MIN_CONTAINER_SIZE = 100
+
+# Rows buffered between the extraction workers and the CSV writer thread
+WRITE_QUEUE_SIZE = 1024
+
+# Keep-alive pool shared by every request made through a connected PlexServer
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 32
+
+
+def pooled_session() -> requests.Session:
+    """Build a requests.Session that reuses TCP/TLS connections and retries transient errors."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=Retry(total=3, backoff_factor=0.5),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _with_retries(description: str, func, *args, **kwargs):
+    """Call func, retrying RETRY_EXCEPTIONS with exponential backoff; re-raise when exhausted."""
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return func(*args, **kwargs)
+        except RETRY_EXCEPTIONS as e:
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = 2 ** (attempt - 1)
+            logger.warning(
+                f"{description} failed ({e}); retry {attempt}/{RETRY_ATTEMPTS - 1} in {delay}s"
+            )
+            sleep(delay)
+
+
+def _search_tracks(music_library, **kwargs):
+    """
+    searchTracks() with TRACK_SEARCH_OPTIONS, retried with backoff on transient errors.
+
+    Each failed attempt also halves container_size, since some Plex servers fail
+    on large page requests.
+    """
+    options = {**TRACK_SEARCH_OPTIONS, **kwargs}
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return music_library.searchTracks(**options)
+        except RETRY_EXCEPTIONS as e:
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = 2 ** (attempt - 1)
+            options["container_size"] = max(MIN_CONTAINER_SIZE, options["container_size"] // 2)
+            logger.warning(
+                f"searchTracks failed ({e}); retry {attempt}/{RETRY_ATTEMPTS - 1} in {delay}s "
+                f"with container_size={options['container_size']}"
+            )
+            sleep(delay)
+
 
 def plex_connect(test: bool = True):
     """
@@ -23,9 +122,13 @@ def plex_connect(test: bool = True):
         PlexServer: The connected Plex server object.
     """
     server_name = PLEX_TEST_SERVER_NAME if test else PLEX_SERVER_NAME
-    account = MyPlexAccount(PLEX_USER, PLEX_PASSWORD)
     try:
-        server = account.resource(server_name).connect()
+        account = _with_retries("Plex sign-in", MyPlexAccount, PLEX_USER, PLEX_PASSWORD)
+        server = _with_retries(
+            f"Connecting to {server_name}", lambda: account.resource(server_name).connect()
+        )
+        # Reuse pooled keep-alive connections for all later library/track calls
+        server._session = pooled_session()
         logger.info(f"Connected to Plex Server: {server_name}")
         return server
     except Exception as e:
@@ -41,7 +144,9 @@ def get_music_library(server, library):
     :return: Music library object
     """
     try:
-        music_library = server.library.section(library)
+        music_library = _with_retries(
+            f"Retrieving library {library}", server.library.section, library
+        )
         logger.debug("Retrieved Plex server music library")
         return music_library
     except Exception as e:
@@ -56,7 +161,7 @@ def get_all_tracks(music_library):
     :return: list of track objects
     """
     try:
-        tracks = music_library.searchTracks()
+        tracks = _search_tracks(music_library)
         library_size = len(tracks)
         logger.debug(f"Retrieved {library_size} tracks from Plex library")
         return tracks, library_size
@@ -72,7 +177,7 @@ def get_all_tracks_limit(music_library, limit=50):
     :return: list of track objects
     """
     try:
-        tracks = music_library.searchTracks(limit=limit)
+        tracks = _search_tracks(music_library, limit=limit)
         library_size = len(tracks)
         logger.debug(f"Retrieved {library_size} tracks from Plex library")
         return tracks, library_size
@@ -94,7 +199,7 @@ def get_tracks_since_date(music_library, since_date: str):
     """
     try:
         # Plex uses addedAt filter with format 'YYYY-MM-DD'
-        tracks = music_library.searchTracks(filters={"addedAt>>": since_date})
+        tracks = _search_tracks(music_library, filters={"addedAt>>": since_date})
         library_size = len(tracks)
         logger.info(f"Retrieved {library_size} tracks added since {since_date}")
         return tracks, library_size
@@ -103,7 +208,46 @@ def get_tracks_since_date(music_library, since_date: str):
         return [], 0
 
 
-def extract_track_data(track, filepath_prefix: str):
+def build_title_lookups(music_library) -> tuple[dict[int, str], dict[int, str]]:
+    """
+    Fetch every artist and album title in the library with one request each.
+
+    extract_track_data() would otherwise call track.artist() and track.album(),
+    each of which is a lazy PlexAPI reload (one HTTP round-trip per track).
+
+    Args:
+        music_library: Plex library object
+
+    Returns:
+        tuple: ({artist ratingKey: title}, {album ratingKey: title})
+    """
+    try:
+        artist_titles = {int(a.ratingKey): a.title for a in music_library.searchArtists()}
+        album_titles = {int(a.ratingKey): a.title for a in music_library.searchAlbums()}
+        logger.debug(
+            f"Built title lookups: {len(artist_titles)} artists, {len(album_titles)} albums"
+        )
+        return artist_titles, album_titles
+    except Exception as e:
+        logger.error(f"Error building artist/album title lookups: {e}")
+        return {}, {}
+
+
+def _lookup_title(titles: dict[int, str] | None, rating_key, fallback) -> str:
+    """Resolve a parent title from a lookup dict, reloading via fallback() on a miss."""
+    if titles and rating_key is not None:
+        title = titles.get(int(rating_key))
+        if title is not None:
+            return title
+    return fallback().title
+
+
+def extract_track_data(
+    track,
+    filepath_prefix: str,
+    artist_titles: dict[int, str] | None = None,
+    album_titles: dict[int, str] | None = None,
+):
     """
     Extract Plex track data from a track object. Return a dict with selected data
     along with a server_id for ratingKey and a stripped filepath.
@@ -111,6 +255,8 @@ def extract_track_data(track, filepath_prefix: str):
     Args:
         track: Plex track object
         filepath_prefix: string to be stripped from the location[0] field
+        artist_titles: Optional {ratingKey: title} map from build_title_lookups()
+        album_titles: Optional {ratingKey: title} map from build_title_lookups()
 
     Returns:
         dict with track metadata
@@ -118,24 +264,31 @@ def extract_track_data(track, filepath_prefix: str):
     genre_list = []
     for genre in track.genres:
         genre_list.append(genre.tag)
-    added_date = track.addedAt.strftime("%Y-%m-%d")
+    added = track.addedAt
+    added_date = f"{added.year:04d}-{added.month:02d}-{added.day:02d}"
     filepath = None
     for media in track.media:
         for part in media.parts:
             filepath = part.file
-    logger.debug(f"Original location: {track.locations[0]}")
-    logger.debug(f"Filepath prefix: {filepath_prefix}")
-    stripped_location = track.locations[0].replace(filepath_prefix, "")
-    logger.debug(f"Stripped location: {stripped_location}")
+    location = track.locations[0]
+    if location.startswith(filepath_prefix):
+        stripped_location = location[len(filepath_prefix) :]
+    else:
+        stripped_location = location.replace(filepath_prefix, "")
+    # Brace-style args are only formatted if DEBUG is actually enabled
+    logger.debug("Location {} -> {} (prefix {!r})", location, stripped_location, filepath_prefix)
 
     # Use originalTitle for compilation tracks (contains actual track artist),
     # fall back to album artist for regular albums
-    artist = track.originalTitle if track.originalTitle else track.artist().title
+    artist = track.originalTitle or _lookup_title(
+        artist_titles, track.grandparentRatingKey, track.artist
+    )
+    album = _lookup_title(album_titles, track.parentRatingKey, track.album)
 
     track_data = {
         "title": track.title,
         "artist": artist,
-        "album": track.album().title,
+        "album": album,
         "genre": genre_list,
         "added_date": added_date,
         "filepath": filepath,
@@ -145,28 +298,167 @@ def extract_track_data(track, filepath_prefix: str):
     return track_data
 
 
-def listify_track_data(tracks, filepath_prefix: str):
+def iter_track_data(
+    tracks,
+    filepath_prefix: str,
+    artist_titles: dict[int, str] | None = None,
+    album_titles: dict[int, str] | None = None,
+    max_workers: int = EXTRACT_WORKERS,
+) -> Iterator[dict]:
+    """
+    Yield extract_track_data() results in track order, overlapping Plex round-trips
+    across a thread pool. At most EXTRACT_WINDOW * max_workers tracks are in flight.
+
+    Args:
+        tracks: Iterable of Plex track objects
+        filepath_prefix: string to be stripped from the location[0] field
+        artist_titles: Optional {ratingKey: title} map from build_title_lookups()
+        album_titles: Optional {ratingKey: title} map from build_title_lookups()
+        max_workers: Extraction threads. 1 extracts serially on the calling thread.
+
+    Yields:
+        dict with track metadata, one per track
+    """
+    extract = partial(
+        extract_track_data,
+        filepath_prefix=filepath_prefix,
+        artist_titles=artist_titles,
+        album_titles=album_titles,
+    )
+    if max_workers <= 1:
+        yield from map(extract, tracks)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # A bounded window keeps extraction from running ahead of a slow consumer
+        yield from bounded_map(executor, extract, tracks, EXTRACT_WINDOW * max_workers)
+
+
+def listify_track_data(
+    tracks,
+    filepath_prefix: str,
+    artist_titles: dict[int, str] | None = None,
+    album_titles: dict[int, str] | None = None,
+    max_workers: int = EXTRACT_WORKERS,
+):
     """
     Lists the track data from the provided list of tracks.
 
     Parameters:
     tracks (list): A list of track objects to extract data from.
+    artist_titles (dict): Optional {ratingKey: title} map from build_title_lookups().
+    album_titles (dict): Optional {ratingKey: title} map from build_title_lookups().
+    max_workers (int): Extraction threads passed to iter_track_data().
 
     Returns:
     list: A list of dictionaries containing the track data.
     """
     track_list = []
     lib_size = len(tracks)
-    i = 1
-    for track in tracks:
-        track_data = extract_track_data(track, filepath_prefix)
+    for i, track_data in enumerate(
+        iter_track_data(tracks, filepath_prefix, artist_titles, album_titles, max_workers),
+        start=1,
+    ):
         track_list.append(track_data)
-        logger.debug(f"Added {track.title} - {track.ratingKey}. {i} of {lib_size}")
-        i += 1
+        logger.debug(
+            "Added {} - {}. {} of {}", track_data["title"], track_data["plex_id"], i, lib_size
+        )
     logger.info(f"Made a list of all track data: {lib_size} in all")
     return track_list
 
 
+class IncrementalCsvWriter:
+    """
+    Append-mode csv.DictWriter that writes the header only once per file.
+
+    The header is written when the file is new or empty, so repeated exports to
+    the same file don't leave header rows in the middle of the data. The file is
+    opened once and rows stream in until close(); usable as a context manager.
+    """
+
+    def __init__(self, filename: str, fieldnames: list[str] = TRACK_FIELDNAMES):
+        self.filename = filename
+        self._file = open(filename, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        # Append mode opens positioned at end-of-file, so 0 means a new/empty file
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def writerow(self, row: dict) -> None:
+        self._writer.writerow(row)
+
+    def writerows(self, rows) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def stream_export_tracks(
+    tracks,
+    filepath_prefix: str,
+    filename: str,
+    artist_titles: dict[int, str] | None = None,
+    album_titles: dict[int, str] | None = None,
+    max_workers: int = EXTRACT_WORKERS,
+) -> int:
+    """
+    Extract track data and write it to CSV as each row is ready, without building
+    the full list in memory.
+
+    Rows pass through a bounded queue to a dedicated writer thread, so file writes
+    overlap with the Plex round-trips still in flight on the extraction workers.
+
+    Args:
+        tracks: Iterable of Plex track objects
+        filepath_prefix: string to be stripped from the location[0] field
+        filename: CSV file to write
+        artist_titles: Optional {ratingKey: title} map from build_title_lookups()
+        album_titles: Optional {ratingKey: title} map from build_title_lookups()
+        max_workers: Extraction threads passed to iter_track_data()
+
+    Returns:
+        Number of rows written
+    """
+    rows = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    write_errors = []
+
+    with IncrementalCsvWriter(filename) as writer:
+
+        def drain():
+            # Keep consuming after a failure so the producer never blocks on a full queue
+            while (row := rows.get()) is not None:
+                if write_errors:
+                    continue
+                try:
+                    writer.writerow(row)
+                except Exception as e:
+                    write_errors.append(e)
+
+        writer_thread = threading.Thread(target=drain, name="track-csv-writer")
+        writer_thread.start()
+        count = 0
+        try:
+            for track_data in iter_track_data(
+                tracks, filepath_prefix, artist_titles, album_titles, max_workers
+            ):
+                rows.put(track_data)
+                count += 1
+        finally:
+            rows.put(None)
+            writer_thread.join()
+
+    if write_errors:
+        raise write_errors[0]
+    logger.info(f"Streamed {count} tracks to {filename}")
+    return count
+
+
 def export_track_data(track_data, filename):
     """
     Exports the track data to a CSV file.
@@ -177,19 +469,6 @@ def export_track_data(track_data, filename):
     Returns:
     None
     """
-    with open(filename, "a") as csvfile:
-        fieldnames = [
-            "title",
-            "artist",
-            "album",
-            "genre",
-            "added_date",
-            "filepath",
-            "location",
-            "plex_id",
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for element in track_data:
-            writer.writerow(element)
+    with IncrementalCsvWriter(filename) as writer:
+        writer.writerows(track_data)
     logger.info("Exported all track data to csv!")
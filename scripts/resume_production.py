@@ -8,6 +8,7 @@ to find incomplete records and resumes from where it left off.
 
 import sys
 from datetime import datetime
+from typing import NamedTuple
 
 sys.path.insert(0, "/mnt/hdd/PycharmProjects/music_organizer_clean")
 
@@ -23,37 +24,54 @@ import db.db_functions as dbf
 import db.db_update as dbu
 
 
-def check_status(db: Database) -> dict:
+class Status(NamedTuple):
+    """Enrichment status counts returned by check_status()."""
+
+    total_tracks: int
+    tracks_with_mbid: int
+    tracks_with_acoustid: int
+    tracks_with_bpm: int
+    total_artists: int
+    primary_artists: int
+    primary_unenriched: int
+    stubs_unenriched: int
+
+
+def check_status(db: Database) -> Status:
     """Check current enrichment status."""
     db.connect()
 
-    status = {}
-
-    # Track counts
-    status["total_tracks"] = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-    status["tracks_with_mbid"] = db.execute_select_query(
-        "SELECT COUNT(*) FROM track_data WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''"
-    )[0][0]
-    status["tracks_with_acoustid"] = db.execute_select_query(
-        "SELECT COUNT(*) FROM track_data WHERE acoustid IS NOT NULL AND acoustid != ''"
-    )[0][0]
-    status["tracks_with_bpm"] = db.execute_select_query(
-        "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
-    )[0][0]
+    # Track counts (one scan of track_data; SUM() is NULL on an empty table)
+    total, with_mbid, with_acoustid, with_bpm = db.execute_select_query("""
+        SELECT
+            COUNT(*),
+            SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != ''),
+            SUM(acoustid IS NOT NULL AND acoustid != ''),
+            SUM(bpm IS NOT NULL AND bpm > 0)
+        FROM track_data
+    """)[0]
 
     # Artist counts
-    status["total_artists"] = db.execute_select_query("SELECT COUNT(*) FROM artists")[0][0]
-    status["primary_artists"] = db.execute_select_query(
-        "SELECT COUNT(DISTINCT a.id) FROM artists a INNER JOIN track_data td ON a.id = td.artist_id"
-    )[0][0]
+    total_artists, primary_artists = db.execute_select_query("""
+        SELECT
+            (SELECT COUNT(*) FROM artists),
+            (SELECT COUNT(DISTINCT artist_id) FROM track_data WHERE artist_id IS NOT NULL)
+    """)[0]
 
     db.close()
 
-    # These use their own connections
-    status["primary_unenriched"] = len(dbf.get_primary_artists_without_similar(db))
-    status["stubs_unenriched"] = len(dbf.get_stub_artists_without_mbid(db))
-
-    return status
+    primary_unenriched, stubs_unenriched = dbf.count_artists_needing_enrichment(db)
+
+    return Status(
+        total_tracks=total,
+        tracks_with_mbid=int(with_mbid or 0),
+        tracks_with_acoustid=int(with_acoustid or 0),
+        tracks_with_bpm=int(with_bpm or 0),
+        total_artists=total_artists,
+        primary_artists=primary_artists,
+        primary_unenriched=primary_unenriched,
+        stubs_unenriched=stubs_unenriched,
+    )
 
 
 def main():
@@ -66,97 +84,102 @@ def main():
     logger.info(f"Connecting to production database: {DB_DATABASE}")
     db = Database(DB_PATH, DB_USER, DB_PASSWORD, DB_DATABASE)
 
-    # Run migrations (idempotent)
-    logger.info("Running migrations...")
-    dbf.add_acoustid_column(db)
-    dbf.add_enrichment_attempted_column(db)
-
-    # Check current status
-    logger.info("Checking current database status...")
-    status = check_status(db)
-
-    logger.info(f"Tracks: {status['total_tracks']} total, {status['tracks_with_mbid']} with MBID, "
-                f"{status['tracks_with_acoustid']} with AcousticID, {status['tracks_with_bpm']} with BPM")
-    logger.info(f"Artists: {status['total_artists']} total, {status['primary_artists']} primary")
-    logger.info(f"Incomplete: {status['primary_unenriched']} primary artists need enrichment, "
-                f"{status['stubs_unenriched']} stubs need enrichment")
-
-    # Phase 1: Complete primary artist enrichment
-    if status["primary_unenriched"] > 0:
+    # One connection for the whole run; helpers' own connect()/close() calls reuse it
+    with db.session():
+        # Run migrations (idempotent)
+        logger.info("Running migrations...")
+        dbf.add_acoustid_column(db)
+        dbf.add_artist_lc_column(db)
+        dbf.add_enrichment_attempted_column(db)
+        dbf.add_enrichment_indexes(db)
+        dbf.add_unique_plex_id_index(db)
+
+        # Check current status
+        logger.info("Checking current database status...")
+        status = check_status(db)
+
+        logger.info(f"Tracks: {status.total_tracks} total, {status.tracks_with_mbid} with MBID, "
+                    f"{status.tracks_with_acoustid} with AcousticID, {status.tracks_with_bpm} with BPM")
+        logger.info(f"Artists: {status.total_artists} total, {status.primary_artists} primary")
+        logger.info(f"Incomplete: {status.primary_unenriched} primary artists need enrichment, "
+                    f"{status.stubs_unenriched} stubs need enrichment")
+
+        # Phase 1: Complete primary artist enrichment
+        if status.primary_unenriched > 0:
+            logger.info("=" * 60)
+            logger.info(f"PHASE 1: Artist enrichment ({status.primary_unenriched} remaining)")
+            logger.info("=" * 60)
+
+            incomplete = dbf.get_primary_artists_without_similar(db)
+            artist_ids = [a[0] for a in incomplete]
+
+            dbu.enrich_artists_full(db, artist_ids=artist_ids, rate_limit_delay=0.25)
+        else:
+            logger.info("PHASE 1: Artist enrichment already complete")
+
+        # Phase 2: Stub artist enrichment
+        stubs_unenriched = dbf.count_stub_artists_without_mbid(db)
+        if stubs_unenriched > 0:
+            logger.info("=" * 60)
+            logger.info(f"PHASE 2: Stub artist enrichment ({stubs_unenriched} remaining)")
+            logger.info("=" * 60)
+
+            incomplete_stubs = dbf.get_stub_artists_without_mbid(db)
+            stub_ids = [a[0] for a in incomplete_stubs]
+
+            dbu.enrich_artists_core(db, artist_ids=stub_ids, rate_limit_delay=0.25)
+        else:
+            logger.info("PHASE 2: Stub artist enrichment already complete")
+
+        # Phase 3: Track enrichment
         logger.info("=" * 60)
-        logger.info(f"PHASE 1: Artist enrichment ({status['primary_unenriched']} remaining)")
+        logger.info("PHASE 3: Last.fm track enrichment")
         logger.info("=" * 60)
 
-        incomplete = dbf.get_primary_artists_without_similar(db)
-        artist_ids = [a[0] for a in incomplete]
+        track_stats = dbu.process_lastfm_track_data(db, rate_limit_delay=0.25, skip_with_genres=True)
+        logger.info(f"Track enrichment: {track_stats}")
 
-        dbu.enrich_artists_full(db, artist_ids=artist_ids, rate_limit_delay=0.25)
-    else:
-        logger.info("PHASE 1: Artist enrichment already complete")
-
-    # Phase 2: Stub artist enrichment
-    status["stubs_unenriched"] = len(dbf.get_stub_artists_without_mbid(db))
-    if status["stubs_unenriched"] > 0:
+        # Phase 4: BPM enrichment (AcousticBrainz)
         logger.info("=" * 60)
-        logger.info(f"PHASE 2: Stub artist enrichment ({status['stubs_unenriched']} remaining)")
+        logger.info("PHASE 4: AcousticBrainz BPM lookup")
         logger.info("=" * 60)
 
-        incomplete_stubs = dbf.get_stub_artists_without_mbid(db)
-        stub_ids = [a[0] for a in incomplete_stubs]
-
-        dbu.enrich_artists_core(db, artist_ids=stub_ids, rate_limit_delay=0.25)
-    else:
-        logger.info("PHASE 2: Stub artist enrichment already complete")
-
-    # Phase 3: Track enrichment
-    logger.info("=" * 60)
-    logger.info("PHASE 3: Last.fm track enrichment")
-    logger.info("=" * 60)
-
-    track_stats = dbu.process_lastfm_track_data(db, rate_limit_delay=0.25, skip_with_genres=True)
-    logger.info(f"Track enrichment: {track_stats}")
-
-    # Phase 4: BPM enrichment (AcousticBrainz)
-    logger.info("=" * 60)
-    logger.info("PHASE 4: AcousticBrainz BPM lookup")
-    logger.info("=" * 60)
+        bpm_ab_stats = dbu.process_bpm_acousticbrainz(db)
+        logger.info(f"AcousticBrainz BPM: {bpm_ab_stats}")
 
-    bpm_ab_stats = dbu.process_bpm_acousticbrainz(db)
-    logger.info(f"AcousticBrainz BPM: {bpm_ab_stats}")
-
-    # Phase 5: BPM enrichment (Essentia local analysis)
-    logger.info("=" * 60)
-    logger.info("PHASE 5: Essentia BPM analysis")
-    logger.info("=" * 60)
+        # Phase 5: BPM enrichment (Essentia local analysis)
+        logger.info("=" * 60)
+        logger.info("PHASE 5: Essentia BPM analysis")
+        logger.info("=" * 60)
 
-    bpm_essentia_stats = dbu.process_bpm_essentia(
-        db,
-        use_test_paths=False,
-        batch_size=25,
-        rest_between_batches=10.0,
-    )
-    logger.info(f"Essentia BPM: {bpm_essentia_stats}")
+        bpm_essentia_stats = dbu.process_bpm_essentia(
+            db,
+            use_test_paths=False,
+            batch_size=25,
+            rest_between_batches=10.0,
+        )
+        logger.info(f"Essentia BPM: {bpm_essentia_stats}")
 
-    # Final status
-    end_time = datetime.now()
-    duration = end_time - start_time
+        # Final status
+        end_time = datetime.now()
+        duration = end_time - start_time
 
-    final_status = check_status(db)
+        final_status = check_status(db)
 
     logger.info("=" * 60)
     logger.info("RESUME COMPLETE")
     logger.info("=" * 60)
     logger.info(f"Duration: {duration}")
-    logger.info(f"Final tracks with BPM: {final_status['tracks_with_bpm']}/{final_status['total_tracks']}")
+    logger.info(f"Final tracks with BPM: {final_status.tracks_with_bpm}/{final_status.total_tracks}")
 
     print("\n" + "=" * 60)
     print("RESUME COMPLETE")
     print("=" * 60)
     print(f"Duration: {duration}")
-    print(f"Tracks: {final_status['total_tracks']}")
-    print(f"  - With MBID: {final_status['tracks_with_mbid']}")
-    print(f"  - With AcousticID: {final_status['tracks_with_acoustid']}")
-    print(f"  - With BPM: {final_status['tracks_with_bpm']}")
+    print(f"Tracks: {final_status.total_tracks}")
+    print(f"  - With MBID: {final_status.tracks_with_mbid}")
+    print(f"  - With AcousticID: {final_status.tracks_with_acoustid}")
+    print(f"  - With BPM: {final_status.tracks_with_bpm}")
 
 
 if __name__ == "__main__":
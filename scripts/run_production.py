@@ -19,6 +19,7 @@ setup_logging("logs/production_run.log")
 
 from db import DB_PATH, DB_USER, DB_PASSWORD, DB_DATABASE
 from db.database import Database
+import db.db_functions as dbf
 from plex import PLEX_MUSIC_LIBRARY
 from plex.plex_library import plex_connect, get_music_library, get_all_tracks, listify_track_data
 from pipeline import run_full_pipeline, validate_environment
@@ -42,11 +43,25 @@ def main():
         logger.error(f"Environment validation failed: {validation['errors']}")
         return
 
-    # Initialize database (drop and recreate all tables)
-    logger.info("Initializing database - dropping and recreating all tables...")
-    db.connect()
-    db.create_all_tables()
-    db.close()
+    # Initialize database: empty existing tables, or create them on a first run.
+    # One connection for the whole setup; the migrations' connect()/close() reuse it
+    with db.session():
+        if db.has_all_tables():
+            # TRUNCATE keeps the old table definitions, so rebuild any that predate the
+            # current indexes/columns first; the rest are just emptied
+            db.recreate_outdated_tables()
+            logger.info("Initializing database - truncating all tables...")
+            db.truncate_all_tables()
+        else:
+            logger.info("Initializing database - creating all tables (first run)...")
+            db.create_all_tables()
+        # Same migrations as resume_production (idempotent), for columns outside _DDL
+        logger.info("Running migrations...")
+        dbf.add_acoustid_column(db)
+        dbf.add_artist_lc_column(db)
+        dbf.add_enrichment_attempted_column(db)
+        dbf.add_enrichment_indexes(db)
+        dbf.add_unique_plex_id_index(db)
     logger.info("Database initialized successfully")
 
     # Connect to production Plex server
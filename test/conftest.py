@@ -8,17 +8,34 @@ Test Strategy:
 Supported File Types:
     Music: flac, mp3, m4a
 
+Recorded HTTP:
+    The recorded_http fixture replays Last.fm, AcousticBrainz and AcoustID responses
+    from test/fixtures/http/, recording any it hasn't seen yet on the first live run.
+    The recordings are a local cache, not committed (the directory is gitignored), so
+    the first run on a fresh checkout needs network access and API keys. Delete the
+    directory to re-record, or pass --live to skip the recordings entirely.
+
+Integration Tests:
+    Tests marked @pytest.mark.integration hit real APIs and services, so they are
+    deselected by default. Pass --integration (or -m integration) to run them.
+
 Logging:
     Uses crash-resilient logging (fsync after every write) to ensure logs
     survive system crashes during CPU-intensive operations like BPM analysis.
 """
 
+import hashlib
+import json
 import os
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import pytest
+import requests
 from plexapi.myplex import MyPlexAccount
+from plexapi.server import PlexServer
 
+from analysis import acousticbrainz, lastfm
 from config.logging import setup_logging
 from db import DB_DATABASE, DB_PASSWORD, DB_PATH, DB_USER, TEST_DB
 from db.database import Database
@@ -30,6 +47,7 @@ from plex import (
     PLEX_TEST_SERVER_NAME,
     PLEX_USER,
 )
+from plex.plex_library import pooled_session
 
 # File type constants for test assertions
 SUPPORTED_AUDIO_EXTENSIONS = {".flac", ".mp3", ".m4a"}
@@ -38,6 +56,123 @@ SUPPORTED_AUDIO_EXTENSIONS = {".flac", ".mp3", ".m4a"}
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "http")
+
+# Credentials dropped from recorded URLs (and from the replay key)
+SECRET_PARAMS = {"api_key", "client", "token"}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--live",
+        action="store_true",
+        help="call Last.fm/AcousticBrainz/AcoustID live instead of replaying test/fixtures/http",
+    )
+    parser.addoption(
+        "--no-plex-cache",
+        action="store_true",
+        help="re-extract the Plex test library instead of reusing the CSV cached in test/.cache",
+    )
+    parser.addoption(
+        "--integration",
+        action="store_true",
+        help="run @pytest.mark.integration tests (deselected unless -m mentions integration)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect integration tests unless --integration or a -m naming them asks for them.
+
+    A mark expression that doesn't mention integration (e.g. -m "not slow") keeps
+    them deselected; one that does (-m integration, -m "not integration") decides.
+    """
+    if config.getoption("--integration") or "integration" in config.getoption("markexpr"):
+        return
+    selected, deselected = [], []
+    for item in items:
+        (deselected if "integration" in item.keywords else selected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+class HttpRecorder:
+    """
+    Wraps a requests-style get() to replay recorded responses, recording misses.
+
+    Each response is stored as JSON named by a hash of the request URL (query
+    parameters included, credentials excluded), so a rerun never leaves the machine.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def _public_url(url: str, params=None) -> str:
+        prepared = requests.Request("GET", url, params=params).prepare().url
+        parts = urlsplit(prepared)
+        query = [(k, v) for k, v in parse_qsl(parts.query) if k not in SECRET_PARAMS]
+        return urlunsplit(parts._replace(query=urlencode(sorted(query))))
+
+    def _path(self, public_url: str) -> str:
+        digest = hashlib.sha1(public_url.encode()).hexdigest()
+        return os.path.join(self.directory, urlsplit(public_url).hostname, f"{digest}.json")
+
+    def wrap(self, get):
+        def recorded_get(url, params=None, **kwargs):
+            public_url = self._public_url(url, params)
+            path = self._path(public_url)
+            if os.path.exists(path):
+                with open(path) as f:
+                    recording = json.load(f)
+                response = requests.Response()
+                response.url = recording["url"]
+                response.status_code = recording["status_code"]
+                response.headers.update(recording["headers"])
+                response._content = recording["body"].encode()
+                return response
+
+            response = get(url, params=params, **kwargs)
+            # Throttled/failed responses are not worth replaying
+            if response.status_code in (200, 404):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    json.dump(
+                        {
+                            "url": public_url,
+                            "status_code": response.status_code,
+                            "headers": {
+                                k: v for k, v in response.headers.items()
+                                if k.lower() != "set-cookie"
+                            },
+                            "body": response.text,
+                        },
+                        f,
+                    )
+            return response
+
+        return recorded_get
+
+
+@pytest.fixture(scope="module")
+def recorded_http(request):
+    """
+    Replay recorded Last.fm/AcousticBrainz/AcoustID responses for the requesting module.
+
+    Patches requests.get (AcoustID) and the pooled Last.fm and AcousticBrainz sessions.
+    Unrecorded requests go out live and are saved (locally, gitignored) for next
+    time; --live disables this.
+    """
+    if request.config.getoption("--live"):
+        yield
+        return
+    recorder = HttpRecorder(RECORDINGS_DIR)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(requests, "get", recorder.wrap(requests.get))
+        mp.setattr(acousticbrainz.session, "get", recorder.wrap(acousticbrainz.session.get))
+        mp.setattr(lastfm.session, "get", recorder.wrap(lastfm.session.get))
+        yield
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_logging():
@@ -63,22 +198,46 @@ def setup_test_logging():
 
 @pytest.fixture(scope="function")
 def db_test():
-    """Database connection to sandbox (test database). Fresh connection per test."""
-    database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)
-    database.connect()
-    yield database
-    if database.connection:
-        database.close()
+    """
+    Database connection to sandbox (test database), held open for the whole test.
+
+    The connection comes from the pool and is held in a session(), so connect()/close()
+    calls in tests and in the code under test reuse it instead of reconnecting.
+    """
+    database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB, pooled=True)
+    with database.session():
+        yield database
 
 
 @pytest.fixture(scope="function")
 def db_prod():
-    """Database connection to production database. Use with caution."""
-    database = Database(DB_PATH, DB_USER, DB_PASSWORD, DB_DATABASE)
-    database.connect()
-    yield database
-    if database.connection:
-        database.close()
+    """Database connection to production database, held open for the test. Use with caution."""
+    database = Database(DB_PATH, DB_USER, DB_PASSWORD, DB_DATABASE, pooled=True)
+    with database.session():
+        yield database
+
+
+def connect_plex_server(request, server_name: str) -> PlexServer:
+    """
+    Connect to a Plex server, reusing the URI resolved by a previous session.
+
+    Only the server URI is kept in pytest's cache (.pytest_cache), never the
+    token: later sessions still sign in to plex.tv, but skip resource discovery
+    and connect with the account token. A stale URI is dropped and the server is
+    discovered again.
+    """
+    cache_key = f"music_organizer/plex_server/{server_name}"
+    account = request.getfixturevalue("plex_account")
+    uri = request.config.cache.get(cache_key, None)
+    if uri:
+        try:
+            return PlexServer(uri, account.authenticationToken, session=pooled_session())
+        except Exception:
+            request.config.cache.set(cache_key, None)
+
+    uri = account.resource(server_name).connect().url("", includeToken=False)
+    request.config.cache.set(cache_key, uri)
+    return PlexServer(uri, account.authenticationToken, session=pooled_session())
 
 
 @pytest.fixture(scope="session")
@@ -88,16 +247,16 @@ def plex_account():
 
 
 @pytest.fixture(scope="session")
-def plex_test_server(plex_account):
+def plex_test_server(request):
     """Connection to test Plex server (Schroeder)."""
-    return plex_account.resource(PLEX_TEST_SERVER_NAME).connect()
+    return connect_plex_server(request, PLEX_TEST_SERVER_NAME)
 
 
 @pytest.fixture(scope="session")
-def plex_prod_server(plex_account):
+def plex_prod_server(request):
     """Connection to production Plex server (UNRAID). Use with caution."""
     try:
-        return plex_account.resource(PLEX_SERVER_NAME).connect()
+        return connect_plex_server(request, PLEX_SERVER_NAME)
     except Exception as e:
         pytest.skip(f"Production server unavailable: {e}")
 
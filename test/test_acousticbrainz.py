@@ -4,6 +4,12 @@ Integration tests for AcousticBrainz BPM lookup.
 These tests hit the real AcousticBrainz API using MBIDs from the sandbox database.
 """
 
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from analysis import acousticbrainz
 from analysis.acousticbrainz import bulk_get_bpm, fetch_bpm_for_tracks, get_bpm_by_mbid
 
 # Known MBIDs from sandbox (The Smiths, Rush, XTC)
@@ -14,6 +20,7 @@ KNOWN_MBIDS = {
 }
 
 
+@pytest.mark.usefixtures("recorded_http")
 class TestGetBpmByMbid:
     """Tests for single MBID lookup."""
 
@@ -42,6 +49,7 @@ class TestGetBpmByMbid:
         assert bpm is None
 
 
+@pytest.mark.usefixtures("recorded_http")
 class TestBulkGetBpm:
     """Tests for bulk MBID lookup."""
 
@@ -77,6 +85,158 @@ class TestBulkGetBpm:
         assert results == {}
 
 
+def bulk_response(mbids, status_code=200, headers=None):
+    """Fake bulk-endpoint response giving every MBID a BPM of 120."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = {mbid: {"0": {"rhythm": {"bpm": 120.0}}} for mbid in mbids}
+    return response
+
+
+@pytest.fixture
+def no_cache():
+    """Run without the on-disk cache so mocked responses are always requested."""
+    with patch("analysis.acousticbrainz.cache", None):
+        yield
+
+
+@pytest.mark.usefixtures("no_cache")
+class TestBulkGetBpmBatching:
+    """Offline tests for batching and throttling in bulk_get_bpm()."""
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_splits_into_batches_of_25(self, mock_get):
+        """60 MBIDs should become 25 + 25 + 10 bulk requests, merged."""
+        mbids = [f"mbid-{i}" for i in range(60)]
+        mock_get.side_effect = lambda url, params, timeout: bulk_response(
+            params["recording_ids"].split(";")
+        )
+
+        results = bulk_get_bpm(mbids)
+
+        sizes = sorted(
+            len(c.kwargs["params"]["recording_ids"].split(";")) for c in mock_get.call_args_list
+        )
+        assert sizes == [10, 25, 25]
+        assert results == dict.fromkeys(mbids, 120.0)
+
+    @patch("analysis.acousticbrainz.sleep")
+    @patch("analysis.acousticbrainz.session.get")
+    def test_retries_after_429(self, mock_get, mock_sleep):
+        """A throttled batch should wait out X-RateLimit-Reset-In and retry."""
+        mbids = ["mbid-a", "mbid-b"]
+        mock_get.side_effect = [
+            bulk_response([], status_code=429, headers={"X-RateLimit-Reset-In": "2"}),
+            bulk_response(mbids),
+        ]
+
+        results = bulk_get_bpm(mbids)
+
+        assert results == {"mbid-a": 120.0, "mbid-b": 120.0}
+        mock_sleep.assert_any_call(2.0)
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_single_mode_keeps_track_order(self, mock_get):
+        """Concurrent single lookups should map each result back to its track."""
+        def single_response(url, timeout):
+            response = MagicMock(status_code=200)
+            bpm = 100.0 if "mbid-a" in url else 0
+            response.json.return_value = {"rhythm": {"bpm": bpm}}
+            return response
+
+        mock_get.side_effect = single_response
+
+        tracks = [(1, "mbid-a"), (2, "mbid-b"), (3, "mbid-a")]
+        results = fetch_bpm_for_tracks(tracks, use_bulk=False)
+
+        assert results == {1: 100.0, 3: 100.0}
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_shared_mbid_fills_every_track(self, mock_get):
+        """Tracks sharing a recording MBID should all get its BPM from one lookup."""
+        mock_get.side_effect = lambda url, params, timeout: bulk_response(
+            params["recording_ids"].split(";")
+        )
+
+        results = fetch_bpm_for_tracks([(1, "mbid-a"), (2, "mbid-a"), (3, "mbid-b")])
+
+        assert results == {1: 120.0, 2: 120.0, 3: 120.0}
+        assert mock_get.call_args.kwargs["params"]["recording_ids"] == "mbid-a;mbid-b"
+
+
+class TestBpmCache:
+    """Offline tests for the on-disk AcousticBrainz cache."""
+
+    @pytest.fixture
+    def bpm_cache(self, tmp_path):
+        bpm_cache = acousticbrainz.BpmCache(str(tmp_path / "ab" / "cache.sqlite"))
+        with patch("analysis.acousticbrainz.cache", bpm_cache):
+            yield bpm_cache
+
+    def test_relative_path_anchored_to_repo(self):
+        """A relative cache path should not depend on the working directory."""
+        bpm_cache = acousticbrainz.BpmCache(".cache/ab.sqlite")
+
+        assert bpm_cache.path == os.path.join(acousticbrainz.REPO_ROOT, ".cache/ab.sqlite")
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_single_lookup_caches_hits_only(self, mock_get, bpm_cache):
+        """Hits should be requested once; misses should be asked again next time."""
+        hit = MagicMock(status_code=200)
+        hit.json.return_value = {"rhythm": {"bpm": 98.5}}
+        miss = MagicMock(status_code=404)
+        mock_get.side_effect = [hit, miss, miss]
+
+        for _ in range(2):
+            assert get_bpm_by_mbid("mbid-hit") == 98.5
+            assert get_bpm_by_mbid("mbid-miss") is None
+
+        assert mock_get.call_count == 3
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_misses_cached_when_enabled(self, mock_get, bpm_cache):
+        """With cache_misses, a 404 should be requested only once."""
+        bpm_cache.cache_misses = True
+        mock_get.return_value = MagicMock(status_code=404)
+
+        get_bpm_by_mbid("mbid-miss")
+        get_bpm_by_mbid("mbid-miss")
+
+        assert mock_get.call_count == 1
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_server_errors_not_cached(self, mock_get, bpm_cache):
+        """A 5xx should be retried on the next lookup."""
+        mock_get.return_value = MagicMock(status_code=503)
+
+        get_bpm_by_mbid("mbid-a")
+        get_bpm_by_mbid("mbid-a")
+
+        assert mock_get.call_count == 2
+
+    @patch("analysis.acousticbrainz.session.get")
+    def test_bulk_only_requests_uncached(self, mock_get, bpm_cache):
+        """Bulk lookups should skip MBIDs (hits or misses) already cached."""
+        bpm_cache.cache_misses = True
+        bpm_cache.set_many({"mbid-a": 110.0, "mbid-b": None})
+        mock_get.return_value = bulk_response(["mbid-c"])
+
+        results = bulk_get_bpm(["mbid-a", "mbid-b", "mbid-c", "mbid-d"])
+
+        assert results == {"mbid-a": 110.0, "mbid-c": 120.0}
+        assert mock_get.call_args.kwargs["params"]["recording_ids"] == "mbid-c;mbid-d"
+        assert bpm_cache.get_many(["mbid-d"]) == {"mbid-d": None}
+
+    def test_expired_entries_ignored(self, bpm_cache):
+        """Entries older than expire_after should read as uncached."""
+        bpm_cache.set_many({"mbid-a": 110.0})
+        bpm_cache.expire_after = -1
+
+        assert bpm_cache.get_many(["mbid-a"]) == {}
+
+
+@pytest.mark.usefixtures("recorded_http")
 class TestFetchBpmForTracks:
     """Tests for the track-based lookup wrapper."""
 
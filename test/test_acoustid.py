@@ -0,0 +1,32 @@
+"""Unit tests for AcousticID resolution in analysis/acoustid.py.
+
+lookup_mbid_by_acoustid is patched, so no API key or network is needed.
+"""
+
+from unittest.mock import patch
+
+from analysis import acoustid
+
+
+class TestResolveAcoustidsToMbids:
+    """Tests for concurrent, de-duplicated resolve_acoustids_to_mbids()."""
+
+    @patch.object(acoustid, "REQUEST_DELAY", 0)
+    @patch.object(acoustid, "lookup_mbid_by_acoustid")
+    def test_shared_acoustid_looked_up_once(self, mock_lookup):
+        """Tracks sharing an AcousticID should reuse a single lookup."""
+        mock_lookup.side_effect = lambda aid, key: None if aid == "miss" else f"mbid-{aid}"
+        tracks = [(1, "a"), (2, "b"), (3, "a"), (4, "miss")]
+
+        results = acoustid.resolve_acoustids_to_mbids(tracks, api_key="key")
+
+        assert results == {1: "mbid-a", 2: "mbid-b", 3: "mbid-a"}
+        assert sorted(c.args[0] for c in mock_lookup.call_args_list) == ["a", "b", "miss"]
+
+    @patch.object(acoustid, "lookup_mbid_by_acoustid")
+    def test_no_api_key_skips_lookups(self, mock_lookup, monkeypatch):
+        """Without a key, nothing should be requested."""
+        monkeypatch.delenv("ACOUSTID_API_KEY", raising=False)
+
+        assert acoustid.resolve_acoustids_to_mbids([(1, "a")]) == {}
+        mock_lookup.assert_not_called()
@@ -8,6 +8,15 @@ import pytest
 
 import db.db_update as dbu
 
+pytestmark = [pytest.mark.xdist_group("sandbox"), pytest.mark.usefixtures("recorded_http")]
+
+
+def count_bpm(db):
+    """Number of tracks with a usable BPM, on the already-open connection."""
+    return db.execute_select_query(
+        "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
+    )[0][0]
+
 
 class TestProcessBpmAcousticbrainz:
     """Tests for the full BPM pipeline."""
@@ -49,15 +58,12 @@ class TestBpmPipelineWithFreshData:
     @pytest.fixture
     def clear_bpm(self, db_test):
         """Clear all BPM values before test, restore after."""
-        db_test.connect()
-
         # Check if there are tracks with MBIDs
         tracks_with_mbid = db_test.execute_select_query(
             "SELECT COUNT(*) FROM track_data WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''"
         )[0][0]
 
         if tracks_with_mbid == 0:
-            db_test.close()
             pytest.skip("No tracks with MBIDs in sandbox - run e2e pipeline first")
 
         # Get current state
@@ -67,38 +73,25 @@ class TestBpmPipelineWithFreshData:
 
         # Clear BPM
         db_test.execute_query("UPDATE track_data SET bpm = NULL")
-        db_test.close()
 
         yield tracks_with_mbid
 
-        # Restore original values
-        db_test.connect()
-        for track_id, bpm in original:
-            if bpm:
-                db_test.execute_query(
-                    "UPDATE track_data SET bpm = %s WHERE id = %s", (bpm, track_id)
-                )
-        db_test.close()
+        # Restore original values in one batch
+        db_test.execute_many(
+            "UPDATE track_data SET bpm = %s WHERE id = %s",
+            [(bpm, track_id) for track_id, bpm in original if bpm],
+        )
 
     def test_populates_bpm_from_empty(self, db_test, clear_bpm):
         """Should populate BPM values when starting from empty."""
         # Verify BPM is cleared
-        db_test.connect()
-        before = db_test.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
-        )[0][0]
-        db_test.close()
-        assert before == 0
+        assert count_bpm(db_test) == 0
 
         # Run the pipeline
         stats = dbu.process_bpm_acousticbrainz(db_test)
 
         # Verify BPM was populated
-        db_test.connect()
-        after = db_test.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
-        )[0][0]
-        db_test.close()
+        after = count_bpm(db_test)
 
         assert after > 0
         assert after == stats["updated"]
@@ -116,11 +109,10 @@ class TestBpmPipelineWithFreshData:
         """All BPM values should be in reasonable range."""
         dbu.process_bpm_acousticbrainz(db_test)
 
-        db_test.connect()
-        bpm_values = db_test.execute_select_query(
-            "SELECT bpm FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
+        out_of_range, lowest, highest = db_test.execute_select_query("""
+            SELECT COUNT(*), MIN(bpm), MAX(bpm) FROM track_data
+            WHERE bpm > 0 AND (bpm < 40 OR bpm > 220)
+        """)[0]
+        assert out_of_range == 0, (
+            f"{out_of_range} BPM values outside 40..220 (lowest {lowest}, highest {highest})"
         )
-        db_test.close()
-
-        for (bpm,) in bpm_values:
-            assert 40 <= bpm <= 220, f"BPM {bpm} outside valid range"
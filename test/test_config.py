@@ -48,7 +48,8 @@ class TestPlexConfig:
 
     def test_test_library_has_tracks(self, test_library):
         """Verify test library has some tracks to work with."""
-        tracks = test_library.searchTracks()
+        # One result is enough to prove it's non-empty; don't list the whole library
+        tracks = test_library.searchTracks(maxresults=1)
         assert len(tracks) > 0, "Test library is empty"
 
     def test_prod_server_connection(self, plex_prod_server):
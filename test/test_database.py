@@ -0,0 +1,583 @@
+"""Unit tests for db/database.py connection handling.
+
+mysql.connector.connect is patched so no MySQL server is needed.
+"""
+
+from decimal import Decimal
+from unittest.mock import MagicMock, call, patch
+
+import mysql.connector
+import pytest
+
+import db.db_functions as dbf
+import pipeline
+from db.database import _DDL, _INDEX_DDL, Database
+
+
+def make_database():
+    return Database("localhost", "user", "password", "sandbox")
+
+
+@pytest.fixture
+def mock_db():
+    """A Database on a patched connector, with its connection and one shared cursor."""
+    mock_cursor = MagicMock()
+    with patch("db.database.mysql.connector.connect") as mock_connect:
+        mock_connection = mock_connect.return_value
+        mock_connection.cursor.return_value = mock_cursor
+        yield make_database(), mock_connection, mock_cursor
+
+
+class TestSession:
+    """Tests for Database.session() connection holding."""
+
+    @patch("db.database.mysql.connector.connect")
+    def test_helpers_share_one_connection(self, mock_connect):
+        """connect()/close() pairs inside a session should not reconnect."""
+        db = make_database()
+
+        with db.session():
+            for _ in range(3):
+                db.connect()
+                db.close()
+            assert db.connection is not None
+
+        assert mock_connect.call_count == 1
+        mock_connect.return_value.close.assert_called_once()
+        assert db.connection is None
+
+    @patch("db.database.mysql.connector.connect")
+    def test_nested_sessions_close_once(self, mock_connect):
+        """Only the outermost session should close the connection."""
+        db = make_database()
+
+        with db.session():
+            with db.session():
+                pass
+            assert db.connection is not None
+
+        assert db.connection is None
+
+    @patch("db.database.mysql.connector.connect")
+    def test_held_connection_is_pinged_on_connect(self, mock_connect):
+        """Reusing a held connection should ping it in case it idled out."""
+        db = make_database()
+
+        with db.session():
+            db.connect()
+
+        mock_connect.return_value.ping.assert_called_once()
+
+    @patch("db.database.mysql.connector.connect")
+    def test_close_outside_session(self, mock_connect):
+        """Without a session, close() should still drop the connection."""
+        db = make_database()
+
+        db.connect()
+        db.close()
+
+        assert db.connection is None
+
+
+class TestTruncateAllTables:
+    """Tests for schema-preserving resets."""
+
+    def test_table_names_match_create_methods(self):
+        """Registered create_*_table methods should map to table names."""
+        names = Database.table_names()
+
+        assert "artists" in names
+        assert "track_data" in names
+        assert "track_genres" in names
+
+    def test_truncates_every_table_with_fk_checks_off(self, mock_db):
+        """Each table should be truncated between FOREIGN_KEY_CHECKS toggles."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [tuple(1 for _ in Database.table_names())]
+
+        count = db.truncate_all_tables()
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list][1:]
+        assert count == len(Database.table_names())
+        assert statements[0] == "SET FOREIGN_KEY_CHECKS = 0"
+        assert statements[-1] == "SET FOREIGN_KEY_CHECKS = 1"
+        assert statements[1:-1] == [f"TRUNCATE TABLE {t}" for t in Database.table_names()]
+
+    def test_empty_tables_skipped(self, mock_db):
+        """Only tables that have rows should be truncated, found in one query."""
+        db, _, cursor = mock_db
+        names = Database.table_names()
+        cursor.fetchall.return_value = [tuple(int(t == "track_data") for t in names)]
+
+        count = db.truncate_all_tables()
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert statements[0].count("EXISTS(SELECT 1 FROM") == len(names)
+        assert count == 1
+        assert "TRUNCATE TABLE track_data" in statements
+        assert sum(stmt.startswith("TRUNCATE") for stmt in statements) == 1
+
+    def test_outdated_tables_recreated(self, mock_db):
+        """Tables missing an index, or with it non-unique, should be rebuilt from _DDL."""
+        db, _, cursor = mock_db
+        current = [
+            (table, ddl.split(" ON ")[0].split()[-1], int(not ddl.startswith("CREATE UNIQUE")))
+            for table, ddls in _INDEX_DDL.items()
+            for ddl in ddls
+        ]
+        stale = [
+            row if row[1] != "ix_plex_id" else ("track_data", "ix_plex_id", 1)
+            for row in current
+            if row[1] != "ux_artist_genres"
+        ]
+        cursor.fetchall.side_effect = [current, stale]
+
+        assert db.recreate_outdated_tables() == []
+        assert db.recreate_outdated_tables() == ["track_data", "artist_genres"]
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert "DROP TABLE IF EXISTS track_data" in statements
+        assert "DROP TABLE IF EXISTS artists" not in statements
+
+    def test_has_all_tables(self, mock_db):
+        """A missing table should report a first run."""
+        db, _, cursor = mock_db
+
+        cursor.fetchall.return_value = [(t,) for t in Database.table_names()]
+        assert db.has_all_tables() is True
+
+        cursor.fetchall.return_value = [("artists",)]
+        assert db.has_all_tables() is False
+
+
+class TestCreateTables:
+    """Tests for the registered create_*_table methods."""
+
+    def test_create_artists_table(self, mock_db):
+        """The table should be dropped and recreated with FK checks off."""
+        db, _, cursor = mock_db
+        db.connect()
+
+        db.create_artists_table()
+
+        cursor.execute.assert_has_calls(
+            [call("SET FOREIGN_KEY_CHECKS = 0"), call("DROP TABLE IF EXISTS artists")]
+        )
+        cursor.execute.assert_has_calls(
+            [
+                call(_DDL["artists"]),
+                *(call(ix) for ix in _INDEX_DDL["artists"]),
+                call("SET FOREIGN_KEY_CHECKS = 1"),
+            ]
+        )
+
+    def test_create_track_data_table_adds_indexes(self, mock_db):
+        """track_data should get its secondary indexes right after the table."""
+        db, _, cursor = mock_db
+        db.connect()
+
+        db.create_track_data_table()
+
+        cursor.execute.assert_has_calls(
+            [call(_DDL["track_data"]), *(call(ix) for ix in _INDEX_DDL["track_data"])]
+        )
+
+    def test_every_registered_table_has_ddl(self):
+        """Each create_*_table method should have a matching _DDL entry."""
+        assert set(Database.table_names()) <= set(_DDL)
+
+    def test_create_all_tables_in_registration_order(self, mock_db):
+        """Every registered table should be dropped, in registration order."""
+        db, _, cursor = mock_db
+        db.connect()
+
+        db.create_all_tables()
+
+        drops = [c for c in cursor.execute.call_args_list if c.args[0].startswith("DROP")]
+        assert drops == [call(f"DROP TABLE IF EXISTS {t}") for t in Database.table_names()]
+
+
+class TestConnectRetries:
+    """Tests for connect() backoff on transient errors."""
+
+    @patch("db.database.sleep")
+    @patch("db.database.mysql.connector.connect")
+    def test_retries_transient_errors(self, mock_connect, mock_sleep):
+        """An unreachable server should be retried with backoff."""
+        connection = object()
+        mock_connect.side_effect = [
+            mysql.connector.InterfaceError("2003: Can't connect"),
+            mysql.connector.OperationalError("2013: Lost connection"),
+            connection,
+        ]
+        db = make_database()
+
+        db.connect()
+
+        assert db.connection is connection
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2]
+
+    @patch("db.database.sleep")
+    @patch("db.database.mysql.connector.connect")
+    def test_auth_error_exits_immediately(self, mock_connect, mock_sleep):
+        """Non-transient errors should not be retried."""
+        mock_connect.side_effect = mysql.connector.ProgrammingError("1045: Access denied")
+        db = make_database()
+
+        with pytest.raises(SystemExit):
+            db.connect()
+
+        assert mock_connect.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+class TestExecuteMany:
+    """Tests for batched execution."""
+
+    def test_single_executemany_and_commit(self, mock_db):
+        """A batch should be one executemany() call and one commit."""
+        db, connection, cursor = mock_db
+        rows = [(1, 10), (2, 20), (3, 30)]
+
+        db.execute_many("INSERT INTO track_genres (track_id, genre_id) VALUES (%s, %s)", rows)
+
+        cursor.executemany.assert_called_once()
+        assert cursor.executemany.call_args.args[1] == rows
+        connection.commit.assert_called_once()
+
+    @patch("db.database.mysql.connector.connect")
+    def test_empty_batch_is_noop(self, mock_connect):
+        """An empty batch should not connect or execute anything."""
+        db = make_database()
+
+        db.execute_many("INSERT INTO genres (genre) VALUES (%s)", [])
+
+        mock_connect.assert_not_called()
+
+    def test_failed_batch_rolls_back(self, mock_db):
+        """A driver error should roll the batch back and report failure."""
+        db, connection, cursor = mock_db
+        cursor.executemany.side_effect = mysql.connector.IntegrityError("1062: Duplicate entry")
+
+        assert db.execute_many("INSERT INTO genres (genre) VALUES (%s)", [("rock",)]) is False
+        connection.rollback.assert_called_once()
+
+
+class TestExecutePrepared:
+    """Tests for prepared-statement reuse."""
+
+    def test_statement_prepared_once_per_sql(self, mock_db):
+        """Repeated calls with the same SQL should reuse one prepared cursor."""
+        db, connection, cursor = mock_db
+        query = "UPDATE track_data SET bpm = %s WHERE id = %s"
+
+        for track_id in range(3):
+            db.execute_prepared(query, (120, track_id))
+
+        connection.cursor.assert_called_once_with(prepared=True)
+        assert cursor.execute.call_count == 3
+
+    def test_reconnect_prepares_again(self, mock_db):
+        """A new connection should not reuse cursors prepared on the old one."""
+        db, connection, _ = mock_db
+        query = "UPDATE track_data SET bpm = %s WHERE id = %s"
+
+        db.execute_prepared(query, (120, 1))
+        db.close()
+        db.execute_prepared(query, (120, 2))
+
+        assert connection.cursor.call_count == 2
+
+
+class TestInsertTracks:
+    """Tests for chunked CSV ingestion in db_functions.insert_tracks()."""
+
+    @pytest.fixture(autouse=True)
+    def unique_index(self):
+        """Skip the ix_plex_id migration query; TestUniquePlexIdMigration covers it."""
+        with patch.object(dbf, "add_unique_plex_id_index") as mock_migration:
+            yield mock_migration
+
+    @staticmethod
+    def write_csv(path, count):
+        header = ",".join(dbf.TRACK_CSV_COLUMNS)
+        rows = [
+            f"Title {i},Artist,Album,[],2024-01-01,/f/{i}.flac,/l/{i}.flac,{i}"
+            for i in range(count)
+        ]
+        path.write_text("\n".join([header, *rows]) + "\n")
+
+    def test_bulk_loads_with_load_data(self, mock_db, tmp_path):
+        """The whole file should go up in one LOAD DATA, staged and then upserted."""
+        db, _, cursor = mock_db
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 5)
+
+        dbf.insert_tracks(db, csv_file)
+
+        loads = [c for c in cursor.execute.call_args_list if "LOAD DATA" in c.args[0]]
+        assert len(loads) == 1
+        query, params = loads[0].args
+        assert "INTO TABLE track_data_load" in query
+        assert "(title, artist, album, genre, added_date, filepath, location, plex_id)" in query
+        assert params == (str(csv_file),)
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        upsert = next(q for q in statements if q.startswith("INSERT INTO track_data "))
+        assert "SELECT" in upsert and "ON DUPLICATE KEY UPDATE" in upsert
+        assert statements[-1] == "DROP TEMPORARY TABLE IF EXISTS track_data_load"
+        cursor.executemany.assert_not_called()
+
+    def test_local_infile_limited_to_load_connection(self, mock_db, tmp_path):
+        """Only the bulk-load connection may read local files, and only from the CSV's dir."""
+        db, connection, cursor = mock_db
+        load_connection = MagicMock()
+        load_connection.cursor.return_value = cursor
+        mysql.connector.connect.side_effect = [connection, load_connection]
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 1)
+        db.connect()
+
+        dbf.insert_tracks(db, csv_file)
+
+        plain, load = mysql.connector.connect.call_args_list
+        assert "allow_local_infile" not in plain.kwargs
+        assert "allow_local_infile" not in load.kwargs
+        assert load.kwargs["allow_local_infile_in_path"] == str(tmp_path)
+        load_connection.close.assert_called_once()
+        assert db.connection is connection
+
+    def test_inserts_in_chunks(self, mock_db, tmp_path):
+        """Without local_infile, rows should go one executemany per chunk, remainder last."""
+        db, _, cursor = mock_db
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 5)
+        cursor.execute.side_effect = mysql.connector.ProgrammingError(
+            "3948: Loading local data is disabled"
+        )
+
+        dbf.insert_tracks(db, csv_file, chunk_size=2)
+
+        assert [len(c.args[1]) for c in cursor.executemany.call_args_list] == [2, 2, 1]
+        assert cursor.executemany.call_args_list[0].args[1][0][-1] == "0"
+
+    def test_batched_inserts_upsert_on_plex_id(self, mock_db, tmp_path):
+        """Re-inserting a known plex_id should update the row, not duplicate it."""
+        db, _, cursor = mock_db
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 2)
+        cursor.execute.side_effect = mysql.connector.ProgrammingError(
+            "3948: Loading local data is disabled"
+        )
+
+        dbf.insert_tracks(db, csv_file)
+
+        query = cursor.executemany.call_args.args[0]
+        assert ") AS new" in query
+        assert "ON DUPLICATE KEY UPDATE" in query
+        assert "title = new.title" in query
+        assert "plex_id = new.plex_id" not in query
+        assert "VALUES(" not in query
+
+    def test_migration_runs_before_insert(self, mock_db, tmp_path, unique_index):
+        """Every insert path should make ix_plex_id unique before upserting on it."""
+        db, _, _ = mock_db
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 1)
+
+        dbf.insert_tracks(db, csv_file)
+
+        unique_index.assert_called_once_with(db)
+
+    def test_insert_track_rows_from_dicts(self, mock_db):
+        """Extracted track dicts should batch directly, with genre lists stringified."""
+        db, _, cursor = mock_db
+        rows = (
+            {
+                "title": f"Title {i}", "artist": "Artist", "album": "Album",
+                "genre": ["Rock"], "added_date": "2024-01-01",
+                "filepath": f"/f/{i}.flac", "location": f"/l/{i}.flac", "plex_id": i,
+            }
+            for i in range(3)
+        )
+
+        assert dbf.insert_track_rows(db, rows, chunk_size=2) == 3
+
+        assert [len(c.args[1]) for c in cursor.executemany.call_args_list] == [2, 1]
+        first = cursor.executemany.call_args_list[0].args[1][0]
+        assert first[3] == "['Rock']"
+        assert first[-1] == 0
+
+    @patch("pipeline.iter_track_data")
+    def test_stream_insert_tracks(self, mock_iter, mock_db):
+        """Rows extracted from Plex should be inserted by the consumer thread."""
+        db, _, cursor = mock_db
+        mock_iter.return_value = (
+            dict.fromkeys(dbf.TRACK_CSV_COLUMNS, "x") | {"plex_id": i} for i in range(5)
+        )
+
+        assert pipeline.stream_insert_tracks(db, tracks=[]) == 5
+        assert sum(len(c.args[1]) for c in cursor.executemany.call_args_list) == 5
+
+    def test_insert_new_tracks_probes_only_incoming_ids(self, mock_db):
+        """Duplicates should be found with chunked IN lookups of the incoming plex_ids."""
+        db, _, cursor = mock_db
+        cursor.fetchall.side_effect = [[(1,)], [(3,)]]
+        tracks = [dict.fromkeys(dbf.TRACK_CSV_COLUMNS, "x") | {"plex_id": i} for i in range(4)]
+
+        with patch.object(pipeline, "PLEX_ID_PROBE_CHUNK", 2):
+            assert pipeline.insert_new_tracks(db, tracks) == 2
+
+        probes = [c.args for c in cursor.execute.call_args_list]
+        assert all("WHERE plex_id IN (%s, %s)" in query for query, _ in probes)
+        assert sorted(id_ for _, params in probes for id_ in params) == [0, 1, 2, 3]
+        inserted = cursor.executemany.call_args.args[1]
+        assert [row[-1] for row in inserted] == [0, 2]
+
+    def test_failed_chunk_falls_back_to_single_rows(self, mock_db, tmp_path):
+        """A chunk rejected as a batch should be retried row by row."""
+        db, _, cursor = mock_db
+        csv_file = tmp_path / "tracks.csv"
+        self.write_csv(csv_file, 3)
+        load_disabled = mysql.connector.ProgrammingError("3948: Loading local data is disabled")
+        # Staging table dropped and created, LOAD DATA fails, staging table dropped
+        cursor.execute.side_effect = [None, None, load_disabled, None, None, None, None]
+        cursor.executemany.side_effect = mysql.connector.DataError("1406: Data too long")
+
+        dbf.insert_tracks(db, csv_file)
+
+        # Four staging statements, then the three rows individually
+        assert cursor.execute.call_count == 7
+
+
+class TestPopulateArtistsAndLink:
+    """Tests for set-based artist population."""
+
+    def test_two_statements_regardless_of_artist_count(self, mock_db):
+        """Artists should be added and linked with one INSERT and one UPDATE."""
+        db, _, cursor = mock_db
+        cursor.rowcount = 3
+
+        added = dbf.populate_artists_and_link(db)
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert len(statements) == 2
+        assert "INSERT INTO artists (artist)" in statements[0]
+        assert "WHERE a.id IS NULL" in statements[0]
+        assert "SET td.artist_id = a.id" in statements[1]
+        assert added == 3
+
+
+class TestArtistsNeedingEnrichment:
+    """Tests for the merged primary/stub enrichment count."""
+
+    def test_counts_from_one_query(self, mock_db):
+        """Both counts should come back from a single statement as ints."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [(Decimal(4), Decimal(7))]
+
+        assert dbf.count_artists_needing_enrichment(db) == (4, 7)
+        assert cursor.execute.call_count == 1
+
+
+class TestArtistHasSimilar:
+    """Tests for the EXISTS-based similar-artist check."""
+
+    def test_uses_exists(self, mock_db):
+        """The check should be an EXISTS probe, returned as a bool."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [(1,)]
+
+        assert dbf.artist_has_similar(db, 42) is True
+        query, params = cursor.execute.call_args.args
+        assert query.startswith("SELECT EXISTS(")
+        assert params == (42,)
+
+
+class TestUniquePlexIdMigration:
+    """Tests for db_functions.add_unique_plex_id_index()."""
+
+    def test_rebuilds_non_unique_index(self, mock_db):
+        """An existing non-unique ix_plex_id should be swapped for a unique one."""
+        db, _, cursor = mock_db
+        cursor.fetchall.side_effect = [[(1,)], [(0,)]]
+
+        assert dbf.add_unique_plex_id_index(db) is True
+
+        alter = cursor.execute.call_args_list[-1].args[0]
+        assert alter == (
+            "ALTER TABLE track_data DROP INDEX ix_plex_id, ADD UNIQUE INDEX ix_plex_id (plex_id)"
+        )
+
+    def test_already_unique_is_noop(self, mock_db):
+        """Running the migration twice should not touch the index again."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [(0,)]
+
+        assert dbf.add_unique_plex_id_index(db) is False
+        assert cursor.execute.call_count == 1
+
+    def test_raises_when_duplicates_exist(self, mock_db):
+        """Existing duplicate plex_ids should stop the run instead of leaving upserts broken."""
+        db, _, cursor = mock_db
+        cursor.fetchall.side_effect = [[(1,)], [(3,)]]
+
+        with pytest.raises(RuntimeError, match="3 plex_ids are duplicated"):
+            dbf.add_unique_plex_id_index(db)
+        assert not any("ALTER" in c.args[0] for c in cursor.execute.call_args_list)
+
+
+class TestAddEnrichmentIndexes:
+    """Tests for the enrichment index migration."""
+
+    def test_failed_create_not_counted(self, mock_db):
+        """A CREATE INDEX that fails should not be reported as created."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [(0,)]
+        # check + CREATE per index; the first CREATE fails
+        cursor.execute.side_effect = [None, mysql.connector.Error("create failed")] + [None] * 4
+
+        assert dbf.add_enrichment_indexes(db) == 2
+
+
+class TestAddArtistLcColumn:
+    """Tests for the artist_lc migration."""
+
+    def test_raises_when_alter_fails(self, mock_db):
+        """A failed ALTER should stop the run rather than report the column as added."""
+        db, _, cursor = mock_db
+        cursor.fetchall.return_value = [(0,)]
+        cursor.execute.side_effect = [None, mysql.connector.Error("alter failed")]
+
+        with pytest.raises(RuntimeError, match="artist_lc"):
+            dbf.add_artist_lc_column(db)
+
+
+class TestPooledConnections:
+    """Tests for connect() checking connections out of a shared pool."""
+
+    @patch.dict("db.database._pools", clear=True)
+    @patch("db.database.pooling.MySQLConnectionPool")
+    @patch("db.database.mysql.connector.connect")
+    def test_instances_share_one_pool(self, mock_connect, mock_pool):
+        """Pooled instances on the same schema should reuse a single pool."""
+        first = Database("localhost", "user", "password", "sandbox", pooled=True)
+        second = Database("localhost", "user", "password", "sandbox", pooled=True)
+
+        first.connect()
+        first.close()
+        second.connect()
+        second.close()
+
+        mock_connect.assert_not_called()
+        mock_pool.assert_called_once()
+        assert mock_pool.return_value.get_connection.call_count == 2
+        # close() hands the connection back to the pool
+        assert mock_pool.return_value.get_connection.return_value.close.call_count == 2
+
+    @patch.dict("db.database._pools", clear=True)
+    @patch("db.database.pooling.MySQLConnectionPool")
+    def test_separate_pool_per_schema(self, mock_pool):
+        """Different databases should not share a pool."""
+        Database("localhost", "user", "password", "sandbox", pooled=True).connect()
+        Database("localhost", "user", "password", "production", pooled=True).connect()
+
+        assert mock_pool.call_count == 2
@@ -0,0 +1,271 @@
+"""Unit tests for batched writes in db/db_update.py.
+
+mysql.connector.connect is patched so no MySQL server is needed.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import db.db_update as dbu
+from db.database import Database
+
+
+@pytest.fixture
+def cursor():
+    """Shared mock cursor behind a patched connector."""
+    mock_cursor = MagicMock()
+    mock_cursor.rowcount = 0
+    with patch("db.database.mysql.connector.connect") as mock_connect:
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        yield mock_cursor
+
+
+def make_database():
+    return Database("localhost", "user", "password", "sandbox")
+
+
+class TestUpdateTrackBpms:
+    """Tests for _update_track_bpms() CASE-WHEN batching."""
+
+    def test_one_statement_per_chunk(self, cursor):
+        """Each BPM_UPDATE_BATCH tracks should be a single UPDATE."""
+        cursor.rowcount = 2
+        bpms = {1: 120.4, 2: 97.6, 3: 140.0}
+
+        with patch.object(dbu, "BPM_UPDATE_BATCH", 2):
+            updated = dbu._update_track_bpms(make_database(), bpms)
+
+        assert cursor.execute.call_count == 2
+        query, params = cursor.execute.call_args_list[0].args
+        assert query.count("WHEN %s THEN %s") == 2
+        assert query.endswith("WHERE id IN (%s, %s)")
+        # CASE pairs first (BPM rounded), then the IN list
+        assert params == (1, 120, 2, 98, 1, 2)
+        assert updated == 4
+
+    def test_resolved_mbids_written_alongside(self, cursor):
+        """With mbids, the same statement should also set musicbrainz_id."""
+        dbu._update_track_bpms(make_database(), {7: 88.0}, {7: "mbid-7"})
+
+        query, params = cursor.execute.call_args.args
+        assert "bpm = CASE id" in query
+        assert "musicbrainz_id = CASE id" in query
+        assert params == (7, 88, 7, "mbid-7", 7)
+
+    def test_no_results_no_statement(self, cursor):
+        """Nothing to write should issue nothing."""
+        assert dbu._update_track_bpms(make_database(), {}) == 0
+        cursor.execute.assert_not_called()
+
+
+class TestProcessBpmEssentia:
+    """Tests for process_bpm_essentia() batch rests."""
+
+    @pytest.fixture
+    def essentia_env(self):
+        with (
+            patch.object(dbu.bpm_analysis, "check_essentia_available", return_value=True),
+            patch.object(
+                dbu, "validate_path_mapping", return_value={"configured": True, "accessible": True}
+            ),
+            patch.object(dbu, "map_plex_path_to_local", side_effect=lambda path, use_test: path),
+            patch.object(dbu, "verify_path_accessible", return_value=True),
+            patch.object(dbu.bpm_analysis, "get_bpm_essentia", return_value=120.0),
+            patch.object(dbu, "sleep") as mock_sleep,
+        ):
+            yield mock_sleep
+
+    def test_no_rest_after_final_batch(self, cursor, essentia_env):
+        """Only the gaps between batches should sleep, not the end of the run."""
+        cursor.fetchall.return_value = [(i, f"/music/{i}.flac") for i in range(4)]
+
+        stats = dbu.process_bpm_essentia(make_database(), batch_size=2, rest_between_batches=5)
+
+        assert stats["updated"] == 4
+        assert [c.args[0] for c in essentia_env.call_args_list] == [5]
+
+    def test_failed_update_counted_as_error(self, cursor, essentia_env):
+        """An UPDATE that fails (None from execute_prepared) should not count as updated."""
+        cursor.fetchall.return_value = [(1, "/music/1.flac"), (2, "/music/2.flac")]
+
+        with patch.object(Database, "execute_prepared", side_effect=[1, None]):
+            stats = dbu.process_bpm_essentia(make_database(), rest_between_batches=0)
+
+        assert (stats["updated"], stats["errors"]) == (1, 1)
+
+    def test_upcoming_files_prefetched(self, cursor, essentia_env):
+        """Every mapped file should be handed to the prefetcher."""
+        cursor.fetchall.return_value = [(i, f"/music/{i}.flac") for i in range(6)]
+
+        with patch.object(dbu.bpm_analysis, "prefetch_file") as mock_prefetch:
+            dbu.process_bpm_essentia(make_database(), batch_size=10, rest_between_batches=0)
+
+        prefetched = sorted(c.args[0] for c in mock_prefetch.call_args_list)
+        assert prefetched == sorted(f"/music/{i}.flac" for i in range(6))
+
+
+class TestFetchLastfmArtistInfo:
+    """Tests for concurrent artist.getInfo fetching."""
+
+    def test_results_in_input_order(self):
+        """Responses should line up with their artists; failures yield None."""
+
+        def fake_info(name):
+            if name == "Broken":
+                raise ValueError("bad response")
+            return {"artist": {"name": name}}
+
+        artists = [(1, "Rush"), (2, "Broken"), (3, "Yes")]
+        with patch.object(dbu.lastfm, "get_artist_info", side_effect=fake_info):
+            fetched = list(dbu.fetch_lastfm_artist_info(artists, rate_limit_delay=0.001))
+
+        assert [artist for artist, _ in fetched] == artists
+        assert [info and info["artist"]["name"] for _, info in fetched] == ["Rush", None, "Yes"]
+
+    def test_submissions_bounded_by_window(self):
+        """Only a window of artists should be taken ahead of the consumer."""
+        pulled = []
+
+        def artists():
+            for i in range(200):
+                pulled.append(i)
+                yield (i, f"Artist {i}")
+
+        with (
+            patch.object(dbu.lastfm, "get_artist_info", return_value={"artist": {}}),
+            patch.object(dbu, "LASTFM_FETCH_WINDOW", 2),
+        ):
+            fetched = dbu.fetch_lastfm_artist_info(artists(), rate_limit_delay=0.001, max_workers=2)
+            first = next(fetched)
+            fetched.close()
+
+        assert first[0] == (0, "Artist 0")
+        assert len(pulled) <= 5
+
+
+class TestFetchLastfmTrackData:
+    """Tests for concurrent track.getInfo fetching."""
+
+    def test_submissions_bounded_by_window(self):
+        """Only a window of tracks should be taken ahead of the consumer."""
+        pulled = []
+
+        def tracks():
+            for i in range(200):
+                pulled.append(i)
+                yield (i, "Rush", f"Track {i}", None)
+
+        with (
+            patch.object(dbu.lastfm, "get_last_fm_track_data", return_value={"track": {}}),
+            patch.object(dbu, "LASTFM_TRACK_MAX_WORKERS", 2),
+            patch.object(dbu, "LASTFM_FETCH_WINDOW", 2),
+        ):
+            fetched = dbu.fetch_lastfm_track_data(tracks(), rate_limit_delay=0.001, max_workers=2)
+            first = next(fetched)
+            fetched.close()
+
+        assert first[0][0] == 0
+        assert len(pulled) <= 5
+
+
+class TestProcessLastfmTrackData:
+    """Tests for process_lastfm_track_data() stats."""
+
+    @pytest.mark.parametrize("stored, expected", [(True, (2, 1)), (False, (0, 3))])
+    def test_updated_counted_when_batch_written(self, stored, expected):
+        """Buffered tracks should only count as updated once their flush succeeds."""
+        database = MagicMock()
+        tracks = [(1, "Rush", "Tom Sawyer", None), (2, "Yes", "Yours", None), (3, "Can", "", None)]
+        database.execute_select_query.return_value = tracks
+        fetched = [(tracks[0], {"track": {}}), (tracks[1], {"track": {}}), (tracks[2], None)]
+
+        def parse(track, data):
+            return None if data is None else (track[0], None, ["rock"])
+
+        with (
+            patch.object(dbu, "fetch_lastfm_track_data", return_value=iter(fetched)),
+            patch.object(dbu, "_parse_lastfm_track_data", side_effect=parse),
+            patch.object(dbu, "_store_lastfm_track_results", return_value=stored) as store,
+        ):
+            stats = dbu.process_lastfm_track_data(database)
+
+        assert store.call_count == 1
+        assert (stats["updated"], stats["failed"]) == expected
+
+
+class TestWriteSimilarArtists:
+    """Tests for batched similar-artist linking."""
+
+    def test_names_resolved_in_sql(self):
+        """Pairs are staged once and matched under MySQL's collation, not Python's."""
+        database = MagicMock()
+        database.execute_query.return_value = 1
+        database.execute_many.return_value = True
+
+        added = dbu._write_similar_artists(
+            database, [(1, "yes"), (1, "Beyoncé"), (2, "YES"), (2, "beyonce "), (2, "")]
+        )
+
+        assert added == 4
+        staged = database.execute_many.call_args
+        assert "similar_artists_stage" in staged.args[0]
+        assert staged.args[1] == [(1, "yes"), (1, "Beyoncé"), (2, "YES"), (2, "beyonce ")]
+        statements = [c.args[0] for c in database.execute_query.call_args_list]
+        assert "SELECT artist AS name FROM artists LIMIT 0" in statements[1]
+        stubs, links = statements[2:4]
+        assert "INSERT INTO artists (artist)" in stubs and "n.artist = s.name" in stubs
+        assert "GROUP BY s.name" in stubs
+        assert "INSERT INTO similar_artists" in links and "LOWER" not in links
+        assert statements[-1] == "DROP TEMPORARY TABLE IF EXISTS similar_artists_stage"
+
+    def test_failed_write_reports_nothing_linked(self):
+        """A failed stub or link INSERT should return 0 and still drop the stage."""
+        database = MagicMock()
+        database.execute_query.side_effect = [0, 0, 1, None, 0]
+        database.execute_many.return_value = True
+
+        assert dbu._write_similar_artists(database, [(1, "Yes")]) == 0
+        assert database.execute_query.call_count == 5
+
+    def test_nothing_to_write(self):
+        """No pairs should touch the database at all."""
+        database = MagicMock()
+        assert dbu._write_similar_artists(database, [(1, "")]) == 0
+        database.execute_select_query.assert_not_called()
+
+
+class TestEnrichArtistsEmptyList:
+    """An empty artist_ids list should return before touching the database."""
+
+    @pytest.mark.parametrize("enrich", [dbu.enrich_artists_core, dbu.enrich_artists_full])
+    def test_no_connection_taken(self, enrich):
+        database = MagicMock()
+
+        stats = enrich(database, artist_ids=[])
+
+        assert stats["total"] == 0
+        database.connect.assert_not_called()
+
+
+class TestFlushArtistBatch:
+    """Tests for writing buffered artist enrichment results."""
+
+    def test_one_statement_per_kind(self):
+        """Attempt marks and MBIDs should each be a single UPDATE; tags are lower-cased."""
+        database = MagicMock()
+        database.execute_query.return_value = 1
+        database.execute_many.return_value = True
+        pending = {"attempted": [1, 2], "mbids": {1: "mbid-1"}, "genres": [(1, "Rock")]}
+        stats = {"genres_added": 0}
+
+        dbu._flush_artist_batch(database, pending, stats)
+
+        attempted, mbids = [c.args for c in database.execute_query.call_args_list[:2]]
+        assert attempted[0].endswith("WHERE id IN (%s, %s)")
+        assert attempted[1] == (1, 2)
+        assert "CASE id WHEN %s THEN %s END" in mbids[0]
+        assert mbids[1] == (1, "mbid-1", 1)
+        assert database.execute_many.call_args.args[1] == [(1, "rock")]
+        assert stats["genres_added"] == 1
+        assert pending == {"attempted": [], "mbids": {}, "genres": []}
@@ -5,16 +5,22 @@ Tests the full flow from Plex extraction through database population and enrichm
 Uses the test Plex library and sandbox database.
 
 Run with: pytest test/test_e2e_pipeline.py -v -s
+
+The module is in the "sandbox" xdist group, so the whole suite can run in parallel
+with pytest-xdist while every sandbox-database test stays on one worker, in order:
+
+    pytest -n auto --dist=loadgroup
 """
 
 import os
-import tempfile
+import re
 
 import pytest
 
 import db.db_functions as dbf
 import db.db_update as dbu
 from analysis.ffmpeg import (
+    ProbeCache,
     check_ffprobe_available,
     map_plex_path_to_local,
     process_artist_mbid_from_files,
@@ -27,9 +33,20 @@ from db.database import Database
 from db.setup_test_env import truncate_all_tables
 from plex import PLEX_TEST_LIBRARY
 from plex.plex_library import (
+    build_title_lookups,
     export_track_data,
     get_all_tracks,
     listify_track_data,
+    stream_export_tracks,
+)
+
+pytestmark = pytest.mark.xdist_group("sandbox")
+
+# Extracted test-library CSVs reused by populated_sandbox across runs
+PLEX_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
+
+MBID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
 )
 
 
@@ -52,6 +69,18 @@ class TestPipelinePrerequisites:
         assert test_library.title == PLEX_TEST_LIBRARY
 
 
+@pytest.fixture(scope="module")
+def path_mapping_test():
+    """validate_path_mapping(use_test=True), walked once for the module."""
+    return validate_path_mapping(use_test=True)
+
+
+@pytest.fixture(scope="module")
+def path_mapping_prod():
+    """validate_path_mapping(use_test=False), walked once for the module."""
+    return validate_path_mapping(use_test=False)
+
+
 class TestEnvironmentValidation:
     """Tests for Phase 2: Environment validation before ffprobe extraction."""
 
@@ -60,17 +89,17 @@ class TestEnvironmentValidation:
         result = check_ffprobe_available()
         assert result is True, "ffprobe not available - install ffmpeg"
 
-    def test_path_mapping_configured_test(self):
+    def test_path_mapping_configured_test(self, path_mapping_test):
         """Test path mapping should be configured in .env."""
-        result = validate_path_mapping(use_test=True)
+        result = path_mapping_test
 
         assert result["configured"] is True, f"Test path mapping not configured: {result['errors']}"
         assert result["plex_prefix"] != "", "MUSIC_PATH_PREFIX_PLEX_TEST not set"
         assert result["local_prefix"] != "", "MUSIC_PATH_PREFIX_LOCAL_TEST not set"
 
-    def test_path_mapping_accessible_test(self):
+    def test_path_mapping_accessible_test(self, path_mapping_test):
         """Test music path should be accessible (CIFS mount)."""
-        result = validate_path_mapping(use_test=True)
+        result = path_mapping_test
 
         if not result["configured"]:
             pytest.skip("Test path mapping not configured")
@@ -80,9 +109,9 @@ class TestEnvironmentValidation:
             f"is the CIFS mount available? Errors: {result['errors']}"
         )
 
-    def test_sample_file_readable_test(self):
+    def test_sample_file_readable_test(self, path_mapping_test):
         """Should find and read at least one audio file in test path."""
-        result = validate_path_mapping(use_test=True)
+        result = path_mapping_test
 
         if not result["accessible"]:
             pytest.skip("Test path not accessible")
@@ -125,9 +154,9 @@ class TestEnvironmentValidation:
 
         assert verify_path_accessible(local_path), f"Mapped file not accessible: {local_path}"
 
-    def test_path_mapping_configured_prod(self):
+    def test_path_mapping_configured_prod(self, path_mapping_prod):
         """Production path mapping should be configured in .env."""
-        result = validate_path_mapping(use_test=False)
+        result = path_mapping_prod
 
         assert result["configured"] is True, f"Prod path mapping not configured: {result['errors']}"
         assert result["plex_prefix"] != "", "MUSIC_PATH_PREFIX_PLEX not set"
@@ -136,9 +165,9 @@ class TestEnvironmentValidation:
     @pytest.mark.skipif(
         not os.path.isdir("/mnt/unraid/slsk/music"), reason="Production NFS mount not available"
     )
-    def test_path_mapping_accessible_prod(self):
+    def test_path_mapping_accessible_prod(self, path_mapping_prod):
         """Production music path should be accessible (NFS mount)."""
-        result = validate_path_mapping(use_test=False)
+        result = path_mapping_prod
 
         if not result["configured"]:
             pytest.skip("Production path mapping not configured")
@@ -150,19 +179,25 @@ class TestEnvironmentValidation:
         assert result["accessible"] is True
 
 
+@pytest.fixture(scope="module")
+def all_tracks(test_library):
+    """(tracks, count) from one get_all_tracks() call, shared by the extraction tests."""
+    return get_all_tracks(test_library)
+
+
 class TestPlexExtraction:
     """Tests for extracting track data from Plex."""
 
-    def test_get_all_tracks_returns_tracks(self, test_library):
+    def test_get_all_tracks_returns_tracks(self, all_tracks):
         """Should retrieve tracks from test library."""
-        tracks, count = get_all_tracks(test_library)
+        tracks, count = all_tracks
 
         assert count > 0
         assert len(tracks) == count
 
-    def test_extract_track_data_structure(self, test_library):
+    def test_extract_track_data_structure(self, all_tracks):
         """Extracted track data should have required fields."""
-        tracks, _ = get_all_tracks(test_library)
+        tracks, _ = all_tracks
         # Use empty prefix for test - locations are relative
         track_data = listify_track_data(tracks[:1], filepath_prefix="")
 
@@ -180,114 +215,130 @@ class TestPlexExtraction:
         for field in required_fields:
             assert field in track_data[0], f"Missing field: {field}"
 
-    def test_export_to_csv(self, test_library):
+    def test_export_to_csv(self, all_tracks, tmp_path):
         """Should export track data to CSV file."""
-        tracks, _ = get_all_tracks(test_library)
+        tracks, _ = all_tracks
         track_data = listify_track_data(tracks[:5], filepath_prefix="")
+        csv_path = tmp_path / "tracks.csv"
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-            csv_path = f.name
+        export_track_data(track_data, str(csv_path))
 
-        try:
-            export_track_data(track_data, csv_path)
-            assert os.path.exists(csv_path)
-            assert os.path.getsize(csv_path) > 0
-        finally:
-            if os.path.exists(csv_path):
-                os.unlink(csv_path)
+        assert csv_path.exists()
+        assert csv_path.stat().st_size > 0
 
 
 @pytest.fixture(scope="module")
 def fresh_sandbox():
     """
     Reset sandbox database before tests in this module.
-    Returns the Database object for further use.
+    Yields the Database object for further use.
+
+    One connection is held for the whole module, so the pipeline phases and the
+    assertions below run their queries without reconnecting.
+
+    The sandbox fixtures are module-scoped on purpose: other modules write to the
+    same sandbox (test_lastfm_db_integration deletes every artist, which cascades
+    to track_data), so the pipeline state built here can't be shared past this module.
     """
     db = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)
-    truncate_all_tables(db)
-    return db
+    with db.session():
+        truncate_all_tables(db)
+        yield db
 
 
 @pytest.fixture(scope="module")
-def populated_sandbox(fresh_sandbox, plex_test_server, test_library):
+def populated_sandbox(request, fresh_sandbox, plex_test_server, test_library):
     """
     Populate sandbox with track data from Plex test library.
     This fixture depends on fresh_sandbox to ensure we start clean.
+
+    The extracted CSV is cached under test/.cache/, keyed by the library's
+    updatedAt and track count, so reruns against an unchanged library skip the
+    Plex walk. Pass --no-plex-cache to force a fresh extraction.
     """
     db = fresh_sandbox
 
-    # Extract tracks from Plex
-    tracks, count = get_all_tracks(test_library)
+    count = test_library.totalViewSize(libtype="track")
     if count == 0:
         pytest.skip("No tracks in test library")
 
-    # Export to temp CSV
-    track_data = listify_track_data(tracks, filepath_prefix="")
+    cache_key = f"{test_library.key}-{int(test_library.updatedAt.timestamp())}-{count}"
+    csv_path = os.path.join(PLEX_CACHE_DIR, f"plex_tracks-{cache_key}.csv")
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        csv_path = f.name
+    if request.config.getoption("--no-plex-cache") or not os.path.exists(csv_path):
+        # Extract tracks from Plex
+        tracks, _ = get_all_tracks(test_library)
+        artist_titles, album_titles = build_title_lookups(test_library)
+
+        # Export in one streaming pass; the CSV writer appends, so start from an
+        # empty file and only publish it to the cache once it is complete
+        os.makedirs(PLEX_CACHE_DIR, exist_ok=True)
+        partial_path = f"{csv_path}.partial"
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        try:
+            stream_export_tracks(
+                tracks,
+                filepath_prefix="",
+                filename=partial_path,
+                artist_titles=artist_titles,
+                album_titles=album_titles,
+            )
+        except Exception:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+            raise
+        os.replace(partial_path, csv_path)
 
-    try:
-        export_track_data(track_data, csv_path)
+    # Insert tracks into database
+    dbf.insert_tracks(db, csv_path)
 
-        # Insert tracks into database
-        dbf.insert_tracks(db, csv_path)
+    # Populate artists table and link track_data.artist_id
+    dbf.populate_artists_and_link(db)
 
-        # Populate artists table
-        dbf.populate_artists_table(db)
+    return db
 
-        # Link artist_id in track_data
-        dbf.populate_artist_id_column(db)
 
-    finally:
-        if os.path.exists(csv_path):
-            os.unlink(csv_path)
+@pytest.fixture(scope="module")
+def populated_counts(populated_sandbox):
+    """
+    Row counts right after the initial load, fetched in one query.
 
-    return db
+    Only valid for assertions about the load itself: later phases add genres,
+    MBIDs and stub artists, so each phase's own tests query what they need.
+    """
+    tracks, tracks_with_artist, artists = populated_sandbox.execute_select_query("""
+        SELECT t.total, t.with_artist, (SELECT COUNT(*) FROM artists)
+        FROM (
+            SELECT COUNT(*) AS total, COUNT(artist_id) AS with_artist FROM track_data
+        ) t
+    """)[0]
+    return {"tracks": tracks, "tracks_with_artist": tracks_with_artist, "artists": artists}
 
 
 class TestDatabaseLoad:
     """Tests for initial database population."""
 
-    def test_tracks_inserted(self, populated_sandbox):
+    def test_tracks_inserted(self, populated_counts):
         """Tracks should be inserted into track_data table."""
-        db = populated_sandbox
-        db.connect()
-        result = db.execute_select_query("SELECT COUNT(*) FROM track_data")
-        db.close()
-
-        assert result[0][0] > 0
+        assert populated_counts["tracks"] > 0
 
-    def test_artists_populated(self, populated_sandbox):
+    def test_artists_populated(self, populated_counts):
         """Artists should be extracted and populated."""
-        db = populated_sandbox
-        db.connect()
-        result = db.execute_select_query("SELECT COUNT(*) FROM artists")
-        db.close()
-
-        assert result[0][0] > 0
+        assert populated_counts["artists"] > 0
 
-    def test_artist_id_linked(self, populated_sandbox):
+    def test_artist_id_linked(self, populated_counts):
         """track_data.artist_id should be populated."""
-        db = populated_sandbox
-        db.connect()
-        result = db.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE artist_id IS NOT NULL"
-        )
-        db.close()
-
-        assert result[0][0] > 0
+        assert populated_counts["tracks_with_artist"] > 0
 
     def test_track_fields_populated(self, populated_sandbox):
         """Core track fields should have values."""
         db = populated_sandbox
-        db.connect()
         result = db.execute_select_query("""
             SELECT title, artist, album, plex_id
             FROM track_data
             LIMIT 1
         """)
-        db.close()
 
         assert len(result) == 1
         title, artist, album, plex_id = result[0]
@@ -299,13 +350,11 @@ class TestDatabaseLoad:
     def test_compilation_tracks_have_correct_artist(self, populated_sandbox):
         """Compilation album tracks should have track artist, not 'Various Artists'."""
         db = populated_sandbox
-        db.connect()
         result = db.execute_select_query("""
             SELECT title, artist, album
             FROM track_data
-            WHERE album LIKE '%No Thanks%Punk Rebellion%'
+            WHERE album LIKE 'No Thanks%Punk Rebellion%'
         """)
-        db.close()
 
         if len(result) == 0:
             pytest.skip(
@@ -339,10 +388,7 @@ def enriched_sandbox(populated_sandbox):
     db = populated_sandbox
 
     # Populate genres from track_data (from Plex genres)
-    genre_list = dbu.populate_genres_table_from_track_data(db)
-    if genre_list:
-        dbu.insert_genres_if_not_exists(db, genre_list)
-        dbu.populate_track_genre_table(db)
+    dbu.populate_genres_from_track_data(db)
 
     return db
 
@@ -353,9 +399,7 @@ class TestGenreEnrichment:
     def test_genres_populated(self, enriched_sandbox):
         """Genres should be extracted from track data."""
         db = enriched_sandbox
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM genres")
-        db.close()
 
         # May be 0 if tracks have no genre tags - that's OK
         assert result[0][0] >= 0
@@ -363,14 +407,10 @@ class TestGenreEnrichment:
     def test_track_genre_relationships(self, enriched_sandbox):
         """Track-genre relationships should be created."""
         db = enriched_sandbox
-        db.connect()
         genre_count = db.execute_select_query("SELECT COUNT(*) FROM genres")[0][0]
-        db.close()
 
         if genre_count > 0:
-            db.connect()
             result = db.execute_select_query("SELECT COUNT(*) FROM track_genres")
-            db.close()
             assert result[0][0] > 0
 
 
@@ -379,14 +419,20 @@ def mbid_enriched_sandbox(enriched_sandbox):
     """
     Extract MBIDs from audio files using ffprobe.
     This runs BEFORE Last.fm enrichment to maximize MBID coverage.
+
+    ffprobe results are cached in test/.cache/mbids.json, so later runs only
+    re-probe files whose mtime changed.
     """
     db = enriched_sandbox
+    probe_cache = ProbeCache(os.path.join(PLEX_CACHE_DIR, "mbids.json"))
 
     # Extract track MBIDs from files
-    track_stats = process_mbid_from_files(db, use_test_paths=True)
+    track_stats = process_mbid_from_files(db, use_test_paths=True, probe_cache=probe_cache)
 
     # Extract artist MBIDs from files
-    artist_stats = process_artist_mbid_from_files(db, use_test_paths=True)
+    artist_stats = process_artist_mbid_from_files(
+        db, use_test_paths=True, probe_cache=probe_cache
+    )
 
     return db, track_stats, artist_stats
 
@@ -438,24 +484,16 @@ class TestFFprobeMBIDExtraction:
 
     def test_mbid_values_are_valid_uuids(self, mbid_enriched_sandbox):
         """Extracted MBIDs should be valid UUID format."""
-        import re
-
         db, track_stats, artist_stats = mbid_enriched_sandbox
 
-        db.connect()
         result = db.execute_select_query("""
             SELECT musicbrainz_id FROM track_data
             WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''
             LIMIT 10
         """)
-        db.close()
-
-        uuid_pattern = re.compile(
-            r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
-        )
 
         for (mbid,) in result:
-            assert uuid_pattern.match(mbid), f"Invalid MBID format: {mbid}"
+            assert MBID_PATTERN.fullmatch(mbid), f"Invalid MBID format: {mbid}"
 
     def test_mbid_coverage_improved(self, mbid_enriched_sandbox):
         """MBID coverage should be tracked in stats."""
@@ -465,12 +503,11 @@ class TestFFprobeMBIDExtraction:
             pytest.skip("MBID extraction was skipped")
 
         # Log the coverage for visibility
-        db.connect()
-        total = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-        with_mbid = db.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''"
-        )[0][0]
-        db.close()
+        total, with_mbid = db.execute_select_query("""
+            SELECT COUNT(*), SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != '')
+            FROM track_data
+        """)[0]
+        with_mbid = int(with_mbid or 0)
 
         coverage_pct = (with_mbid / total * 100) if total > 0 else 0
         print(
@@ -484,7 +521,7 @@ class TestFFprobeMBIDExtraction:
 
 
 @pytest.fixture(scope="module")
-def lastfm_enriched_sandbox(mbid_enriched_sandbox):
+def lastfm_enriched_sandbox(mbid_enriched_sandbox, recorded_http):
     """
     Phase 5: Enrich sandbox with Last.fm artist data.
 
@@ -493,9 +530,7 @@ def lastfm_enriched_sandbox(mbid_enriched_sandbox):
     """
     db, _, _ = mbid_enriched_sandbox  # Unpack tuple from mbid_enriched_sandbox
 
-    db.connect()
     artist_count = db.execute_select_query("SELECT COUNT(*) FROM artists")[0][0]
-    db.close()
 
     print(f"\nPhase 5: Last.fm artist enrichment for {artist_count} artists...")
 
@@ -508,7 +543,7 @@ def lastfm_enriched_sandbox(mbid_enriched_sandbox):
 
 
 @pytest.fixture(scope="module")
-def lastfm_track_enriched_sandbox(lastfm_enriched_sandbox):
+def lastfm_track_enriched_sandbox(lastfm_enriched_sandbox, recorded_http):
     """
     Phase 6: Enrich sandbox with Last.fm track data.
 
@@ -518,9 +553,7 @@ def lastfm_track_enriched_sandbox(lastfm_enriched_sandbox):
     """
     db = lastfm_enriched_sandbox
 
-    db.connect()
     track_count = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-    db.close()
 
     print(f"\nPhase 6: Last.fm track enrichment for {track_count} tracks...")
 
@@ -542,13 +575,11 @@ class TestLastFmArtistEnrichment:
     def test_artist_mbids_populated(self, lastfm_enriched_sandbox):
         """Artists should have MusicBrainz IDs from Last.fm."""
         db = lastfm_enriched_sandbox
-        db.connect()
-        total_artists = db.execute_select_query("SELECT COUNT(*) FROM artists")[0][0]
-        artists_with_mbid = db.execute_select_query("""
-            SELECT COUNT(*) FROM artists
-            WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''
-        """)[0][0]
-        db.close()
+        total_artists, artists_with_mbid = db.execute_select_query("""
+            SELECT COUNT(*), SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != '')
+            FROM artists
+        """)[0]
+        artists_with_mbid = int(artists_with_mbid or 0)
 
         coverage_pct = (artists_with_mbid / total_artists * 100) if total_artists > 0 else 0
         print(f"\nArtist MBID coverage: {artists_with_mbid}/{total_artists} ({coverage_pct:.1f}%)")
@@ -559,9 +590,7 @@ class TestLastFmArtistEnrichment:
     def test_genres_table_populated(self, lastfm_enriched_sandbox):
         """Genres table should be populated from Last.fm tags."""
         db = lastfm_enriched_sandbox
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM genres")
-        db.close()
 
         print(f"\nGenres in database: {result[0][0]}")
         assert result[0][0] > 0, "No genres were populated from Last.fm"
@@ -569,9 +598,7 @@ class TestLastFmArtistEnrichment:
     def test_artist_genres_populated(self, lastfm_enriched_sandbox):
         """Artist-genre relationships should be created."""
         db = lastfm_enriched_sandbox
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM artist_genres")
-        db.close()
 
         print(f"\nArtist-genre relationships: {result[0][0]}")
         assert result[0][0] > 0, "No artist-genre relationships created"
@@ -579,9 +606,7 @@ class TestLastFmArtistEnrichment:
     def test_similar_artists_populated(self, lastfm_enriched_sandbox):
         """Similar artist relationships should be created."""
         db = lastfm_enriched_sandbox
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM similar_artists")
-        db.close()
 
         print(f"\nSimilar artist relationships: {result[0][0]}")
         # Similar artists may or may not be returned by Last.fm
@@ -590,7 +615,6 @@ class TestLastFmArtistEnrichment:
     def test_sample_artist_genres(self, lastfm_enriched_sandbox):
         """Display sample artist genres for verification."""
         db = lastfm_enriched_sandbox
-        db.connect()
         result = db.execute_select_query("""
             SELECT a.artist, GROUP_CONCAT(g.genre SEPARATOR ', ') as genres
             FROM artists a
@@ -599,7 +623,6 @@ class TestLastFmArtistEnrichment:
             GROUP BY a.id
             LIMIT 5
         """)
-        db.close()
 
         print("\nSample artist genres:")
         for artist, genres in result:
@@ -626,9 +649,7 @@ class TestLastFmTrackEnrichment:
         """Track-genre relationships should be created."""
         db, stats = lastfm_track_enriched_sandbox
 
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM track_genres")
-        db.close()
 
         print(f"\nTrack-genre relationships: {result[0][0]}")
         assert result[0][0] > 0, "No track-genre relationships created"
@@ -637,13 +658,11 @@ class TestLastFmTrackEnrichment:
         """Track MBID coverage should improve after Last.fm enrichment."""
         db, stats = lastfm_track_enriched_sandbox
 
-        db.connect()
-        total_tracks = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-        tracks_with_mbid = db.execute_select_query("""
-            SELECT COUNT(*) FROM track_data
-            WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''
-        """)[0][0]
-        db.close()
+        total_tracks, tracks_with_mbid = db.execute_select_query("""
+            SELECT COUNT(*), SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != '')
+            FROM track_data
+        """)[0]
+        tracks_with_mbid = int(tracks_with_mbid or 0)
 
         coverage_pct = (tracks_with_mbid / total_tracks * 100) if total_tracks > 0 else 0
         print(
@@ -657,7 +676,6 @@ class TestLastFmTrackEnrichment:
         """Display sample track genres for verification."""
         db, _ = lastfm_track_enriched_sandbox
 
-        db.connect()
         result = db.execute_select_query("""
             SELECT td.title, a.artist, GROUP_CONCAT(g.genre SEPARATOR ', ') as genres
             FROM track_data td
@@ -667,7 +685,6 @@ class TestLastFmTrackEnrichment:
             GROUP BY td.id
             LIMIT 5
         """)
-        db.close()
 
         print("\nSample track genres:")
         for title, artist, genres in result:
@@ -677,7 +694,7 @@ class TestLastFmTrackEnrichment:
 
 
 @pytest.fixture(scope="module")
-def bpm_enriched_sandbox(lastfm_track_enriched_sandbox):
+def bpm_enriched_sandbox(lastfm_track_enriched_sandbox, recorded_http):
     """
     Phase 7.1: Enrich sandbox with BPM data from AcousticBrainz.
 
@@ -712,12 +729,10 @@ class TestBpmEnrichment:
         db, stats = bpm_enriched_sandbox
 
         if stats["hits"] > 0:
-            db.connect()
             result = db.execute_select_query("""
                 SELECT COUNT(*) FROM track_data
                 WHERE bpm IS NOT NULL AND bpm > 0
             """)
-            db.close()
 
             assert result[0][0] > 0
             assert result[0][0] == stats["updated"]
@@ -726,15 +741,13 @@ class TestBpmEnrichment:
         """All BPM values should be reasonable."""
         db, stats = bpm_enriched_sandbox
 
-        db.connect()
-        result = db.execute_select_query("""
-            SELECT bpm FROM track_data
-            WHERE bpm IS NOT NULL AND bpm > 0
-        """)
-        db.close()
-
-        for (bpm,) in result:
-            assert 40 <= bpm <= 220, f"BPM {bpm} outside valid range"
+        out_of_range, lowest, highest = db.execute_select_query("""
+            SELECT COUNT(*), MIN(bpm), MAX(bpm) FROM track_data
+            WHERE bpm > 0 AND (bpm < 40 OR bpm > 220)
+        """)[0]
+        assert out_of_range == 0, (
+            f"{out_of_range} BPM values outside 40..220 (lowest {lowest}, highest {highest})"
+        )
 
 
 @pytest.fixture(scope="module")
@@ -795,26 +808,22 @@ class TestEssentiaBpmEnrichment:
         if essentia_stats.get("skipped") or essentia_stats.get("analyzed", 0) == 0:
             pytest.skip("No tracks were analyzed by Essentia")
 
-        db.connect()
-        result = db.execute_select_query("""
-            SELECT bpm FROM track_data
-            WHERE bpm IS NOT NULL AND bpm > 0
-        """)
-        db.close()
-
-        for (bpm,) in result:
-            assert 40 <= bpm <= 220, f"BPM {bpm} outside valid range"
+        out_of_range, lowest, highest = db.execute_select_query("""
+            SELECT COUNT(*), MIN(bpm), MAX(bpm) FROM track_data
+            WHERE bpm > 0 AND (bpm < 40 OR bpm > 220)
+        """)[0]
+        assert out_of_range == 0, (
+            f"{out_of_range} BPM values outside 40..220 (lowest {lowest}, highest {highest})"
+        )
 
     def test_combined_bpm_coverage(self, essentia_bpm_sandbox):
         """Combined AcousticBrainz + Essentia should maximize BPM coverage."""
         db, acousticbrainz_stats, essentia_stats = essentia_bpm_sandbox
 
-        db.connect()
-        total_tracks = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-        tracks_with_bpm = db.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
-        )[0][0]
-        db.close()
+        total_tracks, tracks_with_bpm = db.execute_select_query(
+            "SELECT COUNT(*), SUM(bpm IS NOT NULL AND bpm > 0) FROM track_data"
+        )[0]
+        tracks_with_bpm = int(tracks_with_bpm or 0)
 
         coverage_pct = (tracks_with_bpm / total_tracks * 100) if total_tracks > 0 else 0
 
@@ -842,9 +851,7 @@ def finalized_sandbox(essentia_bpm_sandbox):
     db, acousticbrainz_stats, essentia_stats = essentia_bpm_sandbox
 
     # Get the track count for history
-    db.connect()
     track_count = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-    db.close()
 
     # Record import in history table
     dbf.update_history(db, track_count)
@@ -859,9 +866,7 @@ class TestHistoryIntegration:
         """Should create a history record after pipeline completion."""
         db, track_count = finalized_sandbox
 
-        db.connect()
         result = db.execute_select_query("SELECT COUNT(*) FROM history")
-        db.close()
 
         assert result[0][0] > 0, "No history record was created"
 
@@ -869,11 +874,9 @@ class TestHistoryIntegration:
         """History record should have correct track count."""
         db, track_count = finalized_sandbox
 
-        db.connect()
         result = db.execute_select_query(
             "SELECT records FROM history ORDER BY id DESC LIMIT 1"
         )
-        db.close()
 
         assert result[0][0] == track_count, (
             f"History records ({result[0][0]}) doesn't match track count ({track_count})"
@@ -883,14 +886,12 @@ class TestHistoryIntegration:
         """History should record the latest track added_date."""
         db, _ = finalized_sandbox
 
-        db.connect()
         history_latest = db.execute_select_query(
             "SELECT latest_entry FROM history ORDER BY id DESC LIMIT 1"
         )[0][0]
         track_latest = db.execute_select_query(
             "SELECT MAX(added_date) FROM track_data"
         )[0][0]
-        db.close()
 
         # Convert to comparable format if needed
         assert history_latest is not None, "History latest_entry is NULL"
@@ -913,31 +914,26 @@ class TestFullPipelineIntegrity:
     def test_foreign_key_integrity(self, bpm_enriched_sandbox):
         """All foreign key relationships should be valid."""
         db, _ = bpm_enriched_sandbox
-        db.connect()
 
-        # Check track_data.artist_id references valid artists
-        orphan_tracks = db.execute_select_query("""
-            SELECT COUNT(*) FROM track_data td
-            LEFT JOIN artists a ON td.artist_id = a.id
-            WHERE td.artist_id IS NOT NULL AND a.id IS NULL
-        """)
-        assert orphan_tracks[0][0] == 0, "Found tracks with invalid artist_id"
-
-        # Check track_genres references valid tracks and genres
-        invalid_track_genres = db.execute_select_query("""
-            SELECT COUNT(*) FROM track_genres tg
-            LEFT JOIN track_data td ON tg.track_id = td.id
-            LEFT JOIN genres g ON tg.genre_id = g.id
-            WHERE td.id IS NULL OR g.id IS NULL
-        """)
-        assert invalid_track_genres[0][0] == 0, "Found invalid track_genres relationships"
-
-        db.close()
+        # track_data.artist_id -> artists, and track_genres -> track_data/genres
+        orphan_tracks, invalid_track_genres = db.execute_select_query("""
+            SELECT
+                (SELECT COUNT(*) FROM track_data td
+                 LEFT JOIN artists a ON td.artist_id = a.id
+                 WHERE td.artist_id IS NOT NULL AND a.id IS NULL),
+                (SELECT COUNT(*) FROM track_genres tg
+                 LEFT JOIN track_data td ON tg.track_id = td.id
+                 LEFT JOIN genres g ON tg.genre_id = g.id
+                 WHERE td.id IS NULL OR g.id IS NULL)
+        """)[0]
+        assert (orphan_tracks, invalid_track_genres) == (0, 0), (
+            f"Found {orphan_tracks} tracks with invalid artist_id and "
+            f"{invalid_track_genres} invalid track_genres relationships"
+        )
 
     def test_no_duplicate_plex_ids(self, bpm_enriched_sandbox):
         """Each Plex track should only appear once."""
         db, _ = bpm_enriched_sandbox
-        db.connect()
 
         duplicates = db.execute_select_query("""
             SELECT plex_id, COUNT(*) as cnt
@@ -946,39 +942,46 @@ class TestFullPipelineIntegrity:
             GROUP BY plex_id
             HAVING COUNT(*) > 1
         """)
-        db.close()
 
         assert len(duplicates) == 0, f"Found duplicate plex_ids: {duplicates}"
 
     def test_data_summary(self, finalized_sandbox, capsys):
         """Print comprehensive summary of pipeline results for review."""
         db, _ = finalized_sandbox
-        db.connect()
-
-        # Core counts
-        track_count = db.execute_select_query("SELECT COUNT(*) FROM track_data")[0][0]
-        artist_count = db.execute_select_query("SELECT COUNT(*) FROM artists")[0][0]
-        genre_count = db.execute_select_query("SELECT COUNT(*) FROM genres")[0][0]
-
-        # MBID coverage
-        tracks_with_mbid = db.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''"
-        )[0][0]
-        artists_with_mbid = db.execute_select_query(
-            "SELECT COUNT(*) FROM artists WHERE musicbrainz_id IS NOT NULL AND musicbrainz_id != ''"
-        )[0][0]
-
-        # BPM coverage
-        tracks_with_bpm = db.execute_select_query(
-            "SELECT COUNT(*) FROM track_data WHERE bpm IS NOT NULL AND bpm > 0"
-        )[0][0]
-
-        # Genre relationships
-        artist_genre_count = db.execute_select_query("SELECT COUNT(*) FROM artist_genres")[0][0]
-        track_genre_count = db.execute_select_query("SELECT COUNT(*) FROM track_genres")[0][0]
-        similar_artist_count = db.execute_select_query("SELECT COUNT(*) FROM similar_artists")[0][0]
 
-        db.close()
+        # Every count in one round trip; SUM() is NULL on an empty table
+        row = db.execute_select_query("""
+            SELECT
+                t.total, a.total, (SELECT COUNT(*) FROM genres),
+                t.with_mbid, a.with_mbid, t.with_bpm,
+                (SELECT COUNT(*) FROM artist_genres),
+                (SELECT COUNT(*) FROM track_genres),
+                (SELECT COUNT(*) FROM similar_artists)
+            FROM (
+                SELECT
+                    COUNT(*) AS total,
+                    SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != '') AS with_mbid,
+                    SUM(bpm IS NOT NULL AND bpm > 0) AS with_bpm
+                FROM track_data
+            ) t
+            CROSS JOIN (
+                SELECT
+                    COUNT(*) AS total,
+                    SUM(musicbrainz_id IS NOT NULL AND musicbrainz_id != '') AS with_mbid
+                FROM artists
+            ) a
+        """)[0]
+        (
+            track_count,
+            artist_count,
+            genre_count,
+            tracks_with_mbid,
+            artists_with_mbid,
+            tracks_with_bpm,
+            artist_genre_count,
+            track_genre_count,
+            similar_artist_count,
+        ) = (int(value or 0) for value in row)
 
         print("\n" + "=" * 60)
         print("FULL PIPELINE SUMMARY")
@@ -1011,11 +1014,9 @@ class TestFullPipelineIntegrity:
         print(f"  Similar artists:     {similar_artist_count}")
 
         # History info
-        db.connect()
         history = db.execute_select_query(
             "SELECT tx_date, records, latest_entry FROM history ORDER BY id DESC LIMIT 1"
         )
-        db.close()
 
         if history:
             tx_date, records, latest_entry = history[0]
@@ -0,0 +1,135 @@
+"""Unit tests for file-based MBID extraction in analysis/ffmpeg.py.
+
+ffprobe, the path mapping and the database are all patched, so neither ffprobe,
+a music mount nor a MySQL server is needed.
+"""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from analysis import ffmpeg
+
+
+@pytest.fixture
+def probe_env():
+    """Patch the environment checks and map every Plex path to itself."""
+    with (
+        patch.object(ffmpeg, "check_ffprobe_available", return_value=True),
+        patch.object(
+            ffmpeg,
+            "validate_path_mapping",
+            return_value={"configured": True, "accessible": True, "local_prefix": "/music"},
+        ),
+        patch.object(ffmpeg, "map_plex_path_to_local", side_effect=lambda path, use_test: path),
+        patch.object(
+            ffmpeg, "verify_path_accessible", side_effect=lambda path: "missing" not in path
+        ),
+        patch.object(ffmpeg, "ffmpeg_get_info", side_effect=lambda path: {"path": path}),
+    ):
+        yield
+
+
+class TestProcessMbidFromFiles:
+    """Tests for concurrent probing in process_mbid_from_files()."""
+
+    @patch.object(ffmpeg, "ffmpeg_get_acoustid", return_value=None)
+    @patch.object(ffmpeg, "ffmpeg_get_mbtid", side_effect=lambda info: f"mbid:{info['path']}")
+    def test_updates_match_their_tracks(self, _mbid, _acoustid, probe_env):
+        """Each probed MBID should be written to the track it came from."""
+        database = MagicMock()
+        database.execute_select_query.return_value = [
+            (1, "/music/a.flac", None, None),
+            (2, "/music/missing.flac", None, None),
+            (3, "/music/c.flac", "", None),
+        ]
+
+        stats = ffmpeg.process_mbid_from_files(database, max_workers=4)
+
+        assert stats["accessible"] == 2
+        assert stats["inaccessible"] == 1
+        updates = [c.args[1] for c in database.execute_query.call_args_list]
+        assert updates == [("mbid:/music/a.flac", 1), ("mbid:/music/c.flac", 3)]
+
+
+class TestProcessArtistMbidFromFiles:
+    """Tests for concurrent probing in process_artist_mbid_from_files()."""
+
+    @patch.object(
+        ffmpeg, "ffmpeg_get_artist_mbid", side_effect=lambda info: f"artist:{info['path']}"
+    )
+    def test_skips_inaccessible_samples(self, _artist_mbid, probe_env):
+        """Artists whose sample file can't be read should be left alone."""
+        database = MagicMock()
+        database.execute_select_query.return_value = [
+            (10, "Rush", "/music/rush.flac"),
+            (11, "Yes", "/music/missing.flac"),
+        ]
+
+        stats = ffmpeg.process_artist_mbid_from_files(database, max_workers=2)
+
+        assert stats["updated"] == 1
+        database.execute_query.assert_called_once_with(
+            "UPDATE artists SET musicbrainz_id = %s WHERE id = %s", ("artist:/music/rush.flac", 10)
+        )
+
+
+class TestProbeCache:
+    """Tests for mtime-keyed ffprobe caching."""
+
+    def test_unchanged_file_not_reprobed(self, tmp_path):
+        """A second run with the same mtime should reuse the saved result."""
+        audio = tmp_path / "a.flac"
+        audio.write_bytes(b"")
+        cache_path = str(tmp_path / "cache" / "mbids.json")
+
+        with patch.object(ffmpeg, "ffmpeg_get_info", return_value={"format": {}}) as mock_info:
+            cache = ffmpeg.ProbeCache(cache_path)
+            cache.probe(str(audio))
+            cache.save()
+
+            assert ffmpeg.ProbeCache(cache_path).probe(str(audio)) == {"format": {}}
+            assert mock_info.call_count == 1
+
+    def test_modified_file_reprobed(self, tmp_path):
+        """A changed mtime should invalidate the cached entry."""
+        audio = tmp_path / "a.flac"
+        audio.write_bytes(b"")
+        cache = ffmpeg.ProbeCache(str(tmp_path / "mbids.json"))
+
+        with patch.object(ffmpeg, "ffmpeg_get_info", return_value=None) as mock_info:
+            cache.probe(str(audio))
+            os.utime(audio, (0, 0))
+            cache.probe(str(audio))
+
+        assert mock_info.call_count == 2
+
+
+class TestRefreshMbidForArtists:
+    """Tests for the artist lookup in refresh_mbid_for_artists()."""
+
+    @patch.object(ffmpeg, "check_ffprobe_available")
+    def test_unknown_artists_skip_environment_checks(self, mock_ffprobe):
+        """No matching artists should return before probing the environment."""
+        database = MagicMock()
+        database.execute_select_query.return_value = []
+
+        stats = ffmpeg.refresh_mbid_for_artists(database, ["Nobody"], dry_run=True)
+
+        assert stats["artists_found"] == 0
+        assert stats["artists_not_found"] == ["Nobody"]
+        assert stats["skipped"] is False
+        mock_ffprobe.assert_not_called()
+
+    def test_artist_lc_migration_runs_first(self):
+        """The artist_lc column should be ensured before any lookup uses it."""
+        database = MagicMock()
+        database.execute_select_query.return_value = []
+
+        with patch("db.db_functions.add_artist_lc_column") as mock_migrate:
+            mock_migrate.side_effect = RuntimeError("Could not add artist_lc")
+            with pytest.raises(RuntimeError):
+                ffmpeg.refresh_mbid_for_artists(database, ["Nobody"], dry_run=True)
+
+        database.execute_select_query.assert_not_called()
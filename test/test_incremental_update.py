@@ -15,6 +15,8 @@ from pipeline import (
 )
 from plex.plex_library import get_tracks_since_date
 
+pytestmark = pytest.mark.xdist_group("sandbox")
+
 
 class TestValidateEnvironment:
     """Tests for environment validation."""
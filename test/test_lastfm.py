@@ -4,14 +4,15 @@ Tests the Last.fm API integration functions using mocked responses
 to avoid actual API calls during testing.
 """
 
+from types import MappingProxyType
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from analysis import lastfm
 
-# Sample API responses for mocking
-SAMPLE_ARTIST_RESPONSE = {
+# Sample API responses for mocking; read-only at the top level so tests can't swap sections
+SAMPLE_ARTIST_RESPONSE = MappingProxyType({
     "artist": {
         "name": "Black Sabbath",
         "mbid": "5182c1d9-c7d2-4dad-afa0-ccfeada921a8",
@@ -33,24 +34,24 @@ SAMPLE_ARTIST_RESPONSE = {
         },
         "bio": {"summary": "Black Sabbath were an English heavy metal band..."},
     }
-}
+})
 
-SAMPLE_ARTIST_NO_MBID = {
+SAMPLE_ARTIST_NO_MBID = MappingProxyType({
     "artist": {
         "name": "Unknown Artist",
         "mbid": "",
         "tags": {"tag": []},
         "similar": {"artist": []},
     }
-}
+})
 
-SAMPLE_ARTIST_MISSING_FIELDS = {
+SAMPLE_ARTIST_MISSING_FIELDS = MappingProxyType({
     "artist": {
         "name": "Minimal Artist",
     }
-}
+})
 
-SAMPLE_TRACK_RESPONSE = {
+SAMPLE_TRACK_RESPONSE = MappingProxyType({
     "track": {
         "name": "War Pigs",
         "mbid": "a1b2c3d4-e5f6-7890-abcd-ef1234567890",
@@ -62,27 +63,38 @@ SAMPLE_TRACK_RESPONSE = {
             ]
         },
     }
-}
+})
 
-SAMPLE_TRACK_NO_MBID = {
+SAMPLE_TRACK_NO_MBID = MappingProxyType({
     "track": {
         "name": "Some Track",
         "artist": {"name": "Some Artist"},
         "toptags": {"tag": []},
     }
-}
+})
+
+
+@pytest.fixture(scope="module")
+def make_response():
+    """Factory for mocked requests responses: make_response(payload, status=200, headers=None)."""
+
+    def _make(payload=None, status=200, headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.headers = headers if headers is not None else {}
+        response.json.return_value = payload
+        return response
+
+    return _make
 
 
 class TestGetArtistInfo:
     """Tests for get_artist_info() function."""
 
-    @patch("analysis.lastfm.requests.get")
-    def test_successful_request(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_successful_request(self, mock_get, make_response):
         """Should return JSON response on successful API call."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = SAMPLE_ARTIST_RESPONSE
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(SAMPLE_ARTIST_RESPONSE)
 
         result = lastfm.get_artist_info("Black Sabbath")
 
@@ -90,24 +102,19 @@ class TestGetArtistInfo:
         assert result["artist"]["name"] == "Black Sabbath"
         mock_get.assert_called_once()
 
-    @patch("analysis.lastfm.requests.get")
-    def test_failed_request(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_failed_request(self, mock_get, make_response):
         """Should return None on failed API call."""
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(status=404)
 
         result = lastfm.get_artist_info("Nonexistent Artist")
 
         assert result is None
 
-    @patch("analysis.lastfm.requests.get")
-    def test_api_url_construction(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_api_url_construction(self, mock_get, make_response):
         """Should construct correct API URL with artist name."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = SAMPLE_ARTIST_RESPONSE
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(SAMPLE_ARTIST_RESPONSE)
 
         lastfm.get_artist_info("The Clash")
 
@@ -116,14 +123,34 @@ class TestGetArtistInfo:
         assert "The Clash" in call_url or "The%20Clash" in call_url
         assert "autocorrect=1" in call_url
 
+    @patch("analysis.lastfm.session.get")
+    def test_artist_name_is_url_encoded(self, mock_get, make_response):
+        """Reserved characters in the name shouldn't split the query string."""
+        mock_get.return_value = make_response(SAMPLE_ARTIST_RESPONSE)
+
+        lastfm.get_artist_info("Simon & Garfunkel")
+
+        call_url = mock_get.call_args[0][0]
+        assert "artist=Simon%20%26%20Garfunkel" in call_url
+
 
 class TestGetArtistMbid:
     """Tests for get_artist_mbid() function."""
 
-    def test_extracts_mbid(self):
-        """Should extract MBID from valid response."""
-        mbid = lastfm.get_artist_mbid(SAMPLE_ARTIST_RESPONSE)
-        assert mbid == "5182c1d9-c7d2-4dad-afa0-ccfeada921a8"
+    @pytest.mark.parametrize(
+        "response, expected",
+        [
+            pytest.param(
+                SAMPLE_ARTIST_RESPONSE, "5182c1d9-c7d2-4dad-afa0-ccfeada921a8", id="valid"
+            ),
+            pytest.param(SAMPLE_ARTIST_MISSING_FIELDS, None, id="missing-field"),
+            pytest.param(None, None, id="none-input"),
+            pytest.param({"invalid": "structure"}, None, id="invalid-structure"),
+        ],
+    )
+    def test_extracts_mbid(self, response, expected):
+        """Should extract the MBID, or return None when it can't be found."""
+        assert lastfm.get_artist_mbid(response) == expected
 
     def test_empty_mbid_returns_none(self):
         """Should return None when MBID is empty string."""
@@ -132,75 +159,51 @@ class TestGetArtistMbid:
         # Empty string is falsy, so depending on implementation this might be ""
         assert mbid == "" or mbid is None
 
-    def test_missing_mbid_field_returns_none(self):
-        """Should return None when mbid field is missing."""
-        mbid = lastfm.get_artist_mbid(SAMPLE_ARTIST_MISSING_FIELDS)
-        assert mbid is None
-
-    def test_none_input_returns_none(self):
-        """Should handle None input gracefully."""
-        mbid = lastfm.get_artist_mbid(None)
-        assert mbid is None
-
-    def test_invalid_structure_returns_none(self):
-        """Should handle invalid response structure."""
-        mbid = lastfm.get_artist_mbid({"invalid": "structure"})
-        assert mbid is None
-
 
 class TestGetArtistTags:
     """Tests for get_artist_tags() function."""
 
-    def test_extracts_tags(self):
-        """Should extract tag names from valid response."""
-        tags = lastfm.get_artist_tags(SAMPLE_ARTIST_RESPONSE)
-        assert tags == ["heavy metal", "hard rock", "classic rock"]
-
-    def test_empty_tags_returns_empty_list(self):
-        """Should return empty list when no tags."""
-        tags = lastfm.get_artist_tags(SAMPLE_ARTIST_NO_MBID)
-        assert tags == []
-
-    def test_missing_tags_field_returns_empty_list(self):
-        """Should return empty list when tags field missing."""
-        tags = lastfm.get_artist_tags(SAMPLE_ARTIST_MISSING_FIELDS)
-        assert tags == []
-
-    def test_none_input_returns_empty_list(self):
-        """Should handle None input gracefully."""
-        tags = lastfm.get_artist_tags(None)
-        assert tags == []
+    @pytest.mark.parametrize(
+        "response, expected",
+        [
+            pytest.param(
+                SAMPLE_ARTIST_RESPONSE, ["heavy metal", "hard rock", "classic rock"], id="valid"
+            ),
+            pytest.param(SAMPLE_ARTIST_NO_MBID, [], id="empty-tags"),
+            pytest.param(SAMPLE_ARTIST_MISSING_FIELDS, [], id="missing-field"),
+            pytest.param(None, [], id="none-input"),
+        ],
+    )
+    def test_extracts_tags(self, response, expected):
+        """Should extract tag names, or return an empty list when there are none."""
+        assert lastfm.get_artist_tags(response) == expected
 
 
 class TestGetSimilarArtists:
     """Tests for get_similar_artists() function."""
 
-    def test_extracts_similar_artists(self):
-        """Should extract similar artist names from valid response."""
-        similar = lastfm.get_similar_artists(SAMPLE_ARTIST_RESPONSE)
-        assert similar == ["Ozzy Osbourne", "Dio", "Judas Priest"]
-
-    def test_empty_similar_returns_empty_list(self):
-        """Should return empty list when no similar artists."""
-        similar = lastfm.get_similar_artists(SAMPLE_ARTIST_NO_MBID)
-        assert similar == []
-
-    def test_missing_similar_field_returns_empty_list(self):
-        """Should return empty list when similar field missing."""
-        similar = lastfm.get_similar_artists(SAMPLE_ARTIST_MISSING_FIELDS)
-        assert similar == []
+    @pytest.mark.parametrize(
+        "response, expected",
+        [
+            pytest.param(
+                SAMPLE_ARTIST_RESPONSE, ["Ozzy Osbourne", "Dio", "Judas Priest"], id="valid"
+            ),
+            pytest.param(SAMPLE_ARTIST_NO_MBID, [], id="empty-similar"),
+            pytest.param(SAMPLE_ARTIST_MISSING_FIELDS, [], id="missing-field"),
+        ],
+    )
+    def test_extracts_similar_artists(self, response, expected):
+        """Should extract similar artist names, or return an empty list when there are none."""
+        assert lastfm.get_similar_artists(response) == expected
 
 
 class TestGetLastFmTrackData:
     """Tests for get_last_fm_track_data() function."""
 
-    @patch("analysis.lastfm.requests.get")
-    def test_successful_request_by_artist_track(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_successful_request_by_artist_track(self, mock_get, make_response):
         """Should return JSON response when looking up by artist+track."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = SAMPLE_TRACK_RESPONSE
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(SAMPLE_TRACK_RESPONSE)
 
         result = lastfm.get_last_fm_track_data(artist="Black Sabbath", track="War Pigs")
 
@@ -212,13 +215,10 @@ class TestGetLastFmTrackData:
         assert "track=War" in call_url
         assert "autocorrect=1" in call_url
 
-    @patch("analysis.lastfm.requests.get")
-    def test_successful_request_by_mbid(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_successful_request_by_mbid(self, mock_get, make_response):
         """Should return JSON response when looking up by MBID."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = SAMPLE_TRACK_RESPONSE
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(SAMPLE_TRACK_RESPONSE)
 
         result = lastfm.get_last_fm_track_data(mbid="a1b2c3d4-e5f6-7890-abcd-ef1234567890")
 
@@ -228,13 +228,10 @@ class TestGetLastFmTrackData:
         assert "mbid=a1b2c3d4" in call_url
         assert "artist=" not in call_url
 
-    @patch("analysis.lastfm.requests.get")
-    def test_mbid_preferred_over_artist_track(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_mbid_preferred_over_artist_track(self, mock_get, make_response):
         """Should use MBID when both MBID and artist+track are provided."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = SAMPLE_TRACK_RESPONSE
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(SAMPLE_TRACK_RESPONSE)
 
         result = lastfm.get_last_fm_track_data(
             artist="Black Sabbath", track="War Pigs", mbid="a1b2c3d4-e5f6-7890-abcd-ef1234567890"
@@ -246,12 +243,10 @@ class TestGetLastFmTrackData:
         assert "mbid=a1b2c3d4" in call_url
         assert "artist=" not in call_url
 
-    @patch("analysis.lastfm.requests.get")
-    def test_failed_request(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_failed_request(self, mock_get, make_response):
         """Should return None on failed API call."""
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response(status=404)
 
         result = lastfm.get_last_fm_track_data(artist="Unknown", track="Unknown")
 
@@ -268,19 +263,37 @@ class TestGetLastFmTrackData:
         result = lastfm.get_last_fm_track_data(track="War Pigs")
         assert result is None
 
-    @patch("analysis.lastfm.requests.get")
-    def test_api_error_response_returns_none(self, mock_get):
+    @patch("analysis.lastfm.session.get")
+    def test_api_error_response_returns_none(self, mock_get, make_response):
         """Should return None when API returns error in JSON response."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"error": 6, "message": "Track not found"}
-        mock_get.return_value = mock_response
+        mock_get.return_value = make_response({"error": 6, "message": "Track not found"})
 
         result = lastfm.get_last_fm_track_data(artist="Unknown", track="Unknown")
 
         assert result is None
 
 
+    @patch("analysis.lastfm.session.get")
+    def test_http_429_raises_rate_limited(self, mock_get, make_response):
+        """Should raise RateLimited carrying Retry-After on HTTP 429."""
+        mock_get.return_value = make_response(status=429, headers={"Retry-After": "3"})
+
+        with pytest.raises(lastfm.RateLimited) as exc_info:
+            lastfm.get_last_fm_track_data(artist="Black Sabbath", track="War Pigs")
+
+        assert exc_info.value.retry_after == 3.0
+
+    @patch("analysis.lastfm.session.get")
+    def test_error_29_raises_rate_limited(self, mock_get, make_response):
+        """Should treat Last.fm's in-band error 29 as throttling."""
+        mock_get.return_value = make_response({"error": 29, "message": "Rate limit exceeded"})
+
+        with pytest.raises(lastfm.RateLimited) as exc_info:
+            lastfm.get_last_fm_track_data(artist="Black Sabbath", track="War Pigs")
+
+        assert exc_info.value.retry_after is None
+
+
 class TestGetTrackMbid:
     """Tests for get_track_mbid() function."""
 
@@ -309,14 +322,30 @@ class TestGetTrackTags:
         assert tags == []
 
 
+class TestRateLimitHeaders:
+    """Tests for passing Last.fm rate-limit headers to a RateLimiter."""
+
+    @patch("analysis.lastfm.session.get")
+    def test_track_lookup_feeds_limiter(self, mock_get, make_response):
+        """get_last_fm_track_data should pass response headers to the limiter."""
+        headers = {"X-RateLimit-Remaining": "0"}
+        mock_get.return_value = make_response(SAMPLE_TRACK_RESPONSE, headers=headers)
+        limiter = MagicMock()
+
+        lastfm.get_last_fm_track_data(artist="Black Sabbath", track="War Pigs", limiter=limiter)
+
+        limiter.observe.assert_called_once_with(headers)
+
+
 class TestIntegration:
     """Integration tests that make real API calls.
 
-    These tests are marked with @pytest.mark.integration and should
-    only be run when explicitly testing API connectivity.
+    The whole class is marked integration and should only be run when
+    explicitly testing API connectivity (pytest --integration).
     """
 
-    @pytest.mark.integration
+    pytestmark = pytest.mark.integration
+
     def test_real_artist_lookup(self):
         """Test real API call for a well-known artist."""
         result = lastfm.get_artist_info("The Beatles")
@@ -334,7 +363,6 @@ class TestIntegration:
         similar = lastfm.get_similar_artists(result)
         assert len(similar) > 0
 
-    @pytest.mark.integration
     def test_real_track_lookup_by_artist_track(self):
         """Test real API call for a well-known track by artist+track."""
         result = lastfm.get_last_fm_track_data(artist="The Beatles", track="Yesterday")
@@ -343,7 +371,6 @@ class TestIntegration:
         assert "track" in result
         # Note: Tags may be empty for some tracks in Last.fm's database
 
-    @pytest.mark.integration
     def test_real_track_lookup_by_mbid(self):
         """Test real API call for a track by MBID.
 
@@ -9,6 +9,7 @@ Tests the functions that populate:
 Uses mocked Last.fm API responses and the sandbox database.
 """
 
+from types import MappingProxyType
 from unittest.mock import patch
 
 import pytest
@@ -18,8 +19,11 @@ from db import DB_PASSWORD, DB_PATH, DB_USER, TEST_DB
 from db import db_update as dbu
 from db.database import Database
 
-# Sample API responses for mocking
-SAMPLE_RESPONSES = {
+pytestmark = pytest.mark.xdist_group("sandbox")
+
+# Sample API responses for mocking, keyed by artist name; SAMPLE_RESPONSES.get stands in
+# for lastfm.get_artist_info(). Read-only, since populated_db shares one run across tests.
+SAMPLE_RESPONSES = MappingProxyType({
     "Black Sabbath": {
         "artist": {
             "name": "Black Sabbath",
@@ -66,161 +70,121 @@ SAMPLE_RESPONSES = {
             "similar": {"artist": []},
         }
     },
-}
+})
 
 
-def mock_get_artist_info(artist_name):
-    """Mock function for lastfm.get_artist_info()."""
-    return SAMPLE_RESPONSES.get(artist_name)
+def seed_test_artists(database):
+    """Clear the Last.fm tables and insert the three artists in SAMPLE_RESPONSES.
 
+    artist_genres and similar_artists rows go with their artists and genres via
+    ON DELETE CASCADE.
+    """
+    database.execute_query("DELETE FROM genres WHERE id > 0")
+    database.execute_query("DELETE FROM artists WHERE id > 0")
+    database.execute_query(
+        "INSERT INTO artists (id, artist) VALUES "
+        "(9001, 'Black Sabbath'), (9002, 'The Clash'), (9003, 'Unknown Artist')"
+    )
 
-@pytest.fixture
-def test_db():
-    """Provide a test database connection."""
-    db = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB)
-    return db
 
+def remove_test_artists(database):
+    """Delete the test artists, cascading to their links (genres might be shared)."""
+    database.execute_query("DELETE FROM artists WHERE id >= 9001")
 
-@pytest.fixture
-def clean_test_tables(test_db):
-    """Clean and set up test tables with minimal test data."""
-    test_db.connect()
 
-    # Clear existing data
-    test_db.execute_query("DELETE FROM artist_genres")
-    test_db.execute_query("DELETE FROM similar_artists")
-    test_db.execute_query("DELETE FROM genres WHERE id > 0")
-    test_db.execute_query("DELETE FROM artists WHERE id > 0")
+@pytest.fixture
+def clean_test_tables(db_test):
+    """Clean and set up test tables with minimal test data.
 
-    # Insert test artists
-    test_db.execute_query("INSERT INTO artists (id, artist) VALUES (9001, 'Black Sabbath')")
-    test_db.execute_query("INSERT INTO artists (id, artist) VALUES (9002, 'The Clash')")
-    test_db.execute_query("INSERT INTO artists (id, artist) VALUES (9003, 'Unknown Artist')")
+    db_test holds one pooled connection for the whole test, so the connect()/close()
+    calls made by the code under test don't reconnect.
+    """
+    seed_test_artists(db_test)
+    yield db_test
+    remove_test_artists(db_test)
 
-    test_db.close()
 
-    yield test_db
+@pytest.fixture(scope="class")
+def populated_db():
+    """Seed the test artists and run insert_last_fm_artist_data() once for the class.
 
-    # Cleanup after test
-    test_db.connect()
-    test_db.execute_query("DELETE FROM artist_genres WHERE artist_id >= 9001")
-    test_db.execute_query("DELETE FROM similar_artists WHERE artist_id >= 9001")
-    test_db.execute_query("DELETE FROM artists WHERE id >= 9001")
-    # Don't delete genres as they might be shared
-    test_db.close()
+    Tests using this only read the result, so they share one mocked enrichment run.
+    Class-scoped so the cleanup runs before the next class reseeds the tables.
+    """
+    database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB, pooled=True)
+    with database.session():
+        seed_test_artists(database)
+        with patch("db.db_update.lastfm.get_artist_info", side_effect=SAMPLE_RESPONSES.get):
+            dbu.insert_last_fm_artist_data(database, rate_limit_delay=0)
+        yield database
+        remove_test_artists(database)
+
+
+class TestInsertLastFmArtistDataResults:
+    """Checks on the state left by one mocked insert_last_fm_artist_data() run."""
+
+    @pytest.mark.parametrize(
+        "query, expected",
+        [
+            pytest.param(
+                "SELECT musicbrainz_id FROM artists WHERE artist = 'Black Sabbath'",
+                "5182c1d9-c7d2-4dad-afa0-ccfeada921a8",
+                id="updates-artist-mbid",
+            ),
+            pytest.param(
+                "SELECT COUNT(*) FROM genres WHERE LOWER(genre) IN ('heavy metal', 'punk')",
+                2,
+                id="inserts-genres",
+            ),
+            pytest.param(
+                """SELECT COUNT(*) FROM artist_genres ag
+                   JOIN artists a ON ag.artist_id = a.id
+                   WHERE a.artist = 'Black Sabbath'""",
+                3,
+                id="creates-artist-genre-relationships",
+            ),
+            pytest.param(
+                "SELECT COUNT(*) FROM artists WHERE LOWER(artist) IN ('ozzy osbourne', 'dio')",
+                2,
+                id="inserts-similar-artists",
+            ),
+            pytest.param(
+                """SELECT COUNT(*) FROM similar_artists sa
+                   JOIN artists a ON sa.artist_id = a.id
+                   WHERE a.artist = 'Black Sabbath'""",
+                2,
+                id="creates-similar-artist-relationships",
+            ),
+            pytest.param(
+                # An empty MBID from Last.fm should not be written
+                "SELECT COALESCE(musicbrainz_id, '') FROM artists WHERE artist = 'Unknown Artist'",
+                "",
+                id="handles-artist-with-no-mbid",
+            ),
+            pytest.param(
+                """SELECT COUNT(*) FROM (
+                       SELECT LOWER(genre) FROM genres GROUP BY LOWER(genre) HAVING COUNT(*) > 1
+                   ) duplicates""",
+                0,
+                id="no-duplicate-genres",
+            ),
+        ],
+    )
+    def test_populated_state(self, populated_db, query, expected):
+        """Each query's single value should match the mocked Last.fm responses."""
+        assert populated_db.execute_select_query(query)[0][0] == expected
 
 
 class TestInsertLastFmArtistData:
     """Tests for insert_last_fm_artist_data() function."""
 
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")  # Skip the 1s rate limiting delay
-    def test_updates_artist_mbid(self, mock_sleep, mock_api, clean_test_tables):
-        """Should update artist musicbrainz_id from Last.fm response."""
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            "SELECT musicbrainz_id FROM artists WHERE artist = 'Black Sabbath'"
-        )
-        clean_test_tables.close()
-
-        assert result[0][0] == "5182c1d9-c7d2-4dad-afa0-ccfeada921a8"
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_inserts_genres(self, mock_sleep, mock_api, clean_test_tables):
-        """Should insert genres from Last.fm tags into genres table."""
-        mock_api.side_effect = mock_get_artist_info
+    @pytest.fixture(autouse=True)
+    def mock_api(self):
+        """Patch the Last.fm lookup once per test; each test sets its side_effect."""
+        with patch("db.db_update.lastfm.get_artist_info") as mock_api:
+            yield mock_api
 
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            "SELECT genre FROM genres WHERE LOWER(genre) IN ('heavy metal', 'punk')"
-        )
-        clean_test_tables.close()
-
-        genres = [r[0] for r in result]
-        assert "heavy metal" in genres or "Heavy Metal" in [g.title() for g in genres]
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_creates_artist_genre_relationships(self, mock_sleep, mock_api, clean_test_tables):
-        """Should create artist_genres relationships."""
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            """SELECT COUNT(*) FROM artist_genres ag
-               JOIN artists a ON ag.artist_id = a.id
-               WHERE a.artist = 'Black Sabbath'"""
-        )
-        clean_test_tables.close()
-
-        # Black Sabbath should have 3 genre relationships
-        assert result[0][0] == 3
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_inserts_similar_artists(self, mock_sleep, mock_api, clean_test_tables):
-        """Should insert similar artists into artists table."""
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            "SELECT artist FROM artists WHERE LOWER(artist) IN ('ozzy osbourne', 'dio')"
-        )
-        clean_test_tables.close()
-
-        artists = [r[0].lower() for r in result]
-        assert "ozzy osbourne" in artists or "dio" in artists
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_creates_similar_artist_relationships(self, mock_sleep, mock_api, clean_test_tables):
-        """Should create similar_artists relationships."""
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            """SELECT COUNT(*) FROM similar_artists sa
-               JOIN artists a ON sa.artist_id = a.id
-               WHERE a.artist = 'Black Sabbath'"""
-        )
-        clean_test_tables.close()
-
-        # Black Sabbath should have 2 similar artist relationships
-        assert result[0][0] == 2
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_handles_artist_with_no_mbid(self, mock_sleep, mock_api, clean_test_tables):
-        """Should handle artists with empty MBID gracefully."""
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        result = clean_test_tables.execute_select_query(
-            "SELECT musicbrainz_id FROM artists WHERE artist = 'Unknown Artist'"
-        )
-        clean_test_tables.close()
-
-        # MBID should be NULL or empty (not updated from empty string)
-        assert result[0][0] is None or result[0][0] == ""
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_handles_api_failure(self, mock_sleep, mock_api, clean_test_tables):
+    def test_handles_api_failure(self, mock_api, clean_test_tables):
         """Should continue processing when API returns None for some artists."""
         # First call succeeds, second returns None
         mock_api.side_effect = [
@@ -230,82 +194,78 @@ class TestInsertLastFmArtistData:
         ]
 
         # Should not raise exception
-        dbu.insert_last_fm_artist_data(clean_test_tables)
+        dbu.insert_last_fm_artist_data(clean_test_tables, rate_limit_delay=0)
 
         # Black Sabbath should still be updated
-        clean_test_tables.connect()
         result = clean_test_tables.execute_select_query(
             "SELECT musicbrainz_id FROM artists WHERE artist = 'Black Sabbath'"
         )
-        clean_test_tables.close()
 
         assert result[0][0] == "5182c1d9-c7d2-4dad-afa0-ccfeada921a8"
 
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_no_duplicate_genres(self, mock_sleep, mock_api, clean_test_tables):
-        """Should not create duplicate genres when processing multiple artists."""
-        # Both artists have some overlapping genres (if any)
-        mock_api.side_effect = mock_get_artist_info
-
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-
-        clean_test_tables.connect()
-        # Check for duplicates
-        result = clean_test_tables.execute_select_query(
-            """SELECT LOWER(genre), COUNT(*) as cnt
-               FROM genres
-               GROUP BY LOWER(genre)
-               HAVING COUNT(*) > 1"""
-        )
-        clean_test_tables.close()
-
-        # Should have no duplicates
-        assert len(result) == 0
-
-    @patch("db.db_update.lastfm.get_artist_info")
-    @patch("db.db_update.sleep")
-    def test_no_duplicate_artist_genre_relationships(self, mock_sleep, mock_api, clean_test_tables):
+    def test_no_duplicate_artist_genre_relationships(self, mock_api, clean_test_tables):
         """Should not create duplicate artist_genre relationships."""
-        mock_api.side_effect = mock_get_artist_info
+        mock_api.side_effect = SAMPLE_RESPONSES.get
 
         # Run twice to ensure no duplicates created
-        dbu.insert_last_fm_artist_data(clean_test_tables)
-        dbu.insert_last_fm_artist_data(clean_test_tables)
+        dbu.insert_last_fm_artist_data(clean_test_tables, rate_limit_delay=0)
+        dbu.insert_last_fm_artist_data(clean_test_tables, rate_limit_delay=0)
 
-        clean_test_tables.connect()
         result = clean_test_tables.execute_select_query(
-            """SELECT artist_id, genre_id, COUNT(*) as cnt
-               FROM artist_genres
-               GROUP BY artist_id, genre_id
-               HAVING COUNT(*) > 1"""
+            """SELECT EXISTS (
+                   SELECT 1 FROM artist_genres ag1
+                   INNER JOIN artist_genres ag2
+                       ON ag1.artist_id = ag2.artist_id
+                       AND ag1.genre_id = ag2.genre_id
+                       AND ag1.id < ag2.id
+               )"""
         )
-        clean_test_tables.close()
 
-        assert len(result) == 0
+        assert result[0][0] == 0
 
 
 class TestGenreHelpers:
     """Tests for genre-related helper functions."""
 
-    def test_populate_genres_table_from_track_data(self, test_db):
+    def test_populate_genres_table_from_track_data(self, db_test):
         """Test extracting genres from track_data.genre column."""
-        test_db.connect()
-
         # Insert test track with genre
-        test_db.execute_query(
+        db_test.execute_query(
             """INSERT INTO track_data (id, title, artist, genre, plex_id, filepath, location)
                VALUES (99001, 'Test Track', 'Test Artist', "['Rock', 'Alternative']",
                        'plex99001', '/test/path', '/test/location')"""
         )
 
         try:
-            genres = dbu.populate_genres_table_from_track_data(test_db)
+            genres = dbu.populate_genres_table_from_track_data(db_test)
             # Should extract Rock and Alternative
             assert "rock" in [g.lower() for g in genres] or len(genres) >= 0
         finally:
-            test_db.execute_query("DELETE FROM track_data WHERE id = 99001")
-            test_db.close()
+            db_test.execute_query("DELETE FROM track_data WHERE id = 99001")
+
+
+    def test_populate_genres_from_track_data(self, db_test):
+        """Set-based genre sync should link each listed genre once, even when re-run."""
+        db_test.execute_query(
+            """INSERT INTO track_data (id, title, artist, album, genre, plex_id, filepath, location)
+               VALUES (99002, 'Test Track', 'Test Artist', 'Test Album', "['Rock', 'Alternative']",
+                       99002, '/test/path', '/test/location')"""
+        )
+
+        try:
+            dbu.populate_genres_from_track_data(db_test)
+            dbu.populate_genres_from_track_data(db_test)
+
+            result = db_test.execute_select_query(
+                """SELECT LOWER(g.genre)
+                   FROM track_genres tg
+                   INNER JOIN genres g ON g.id = tg.genre_id
+                   WHERE tg.track_id = 99002"""
+            )
+            assert sorted(r[0] for r in result) == ["alternative", "rock"]
+        finally:
+            db_test.execute_query("DELETE FROM track_genres WHERE track_id = 99002")
+            db_test.execute_query("DELETE FROM track_data WHERE id = 99002")
 
 
 class TestIntegration:
@@ -315,12 +275,10 @@ class TestIntegration:
     """
 
     @pytest.mark.integration
-    def test_real_lastfm_to_db_flow(self, test_db):
+    def test_real_lastfm_to_db_flow(self, db_test):
         """Test real Last.fm API call and database update."""
-        test_db.connect()
-
         # Insert a test artist
-        test_db.execute_query("INSERT INTO artists (id, artist) VALUES (99999, 'Radiohead')")
+        db_test.execute_query("INSERT INTO artists (id, artist) VALUES (99999, 'Radiohead')")
 
         try:
             # Get real Last.fm data
@@ -332,16 +290,15 @@ class TestIntegration:
             assert len(mbid) == 36
 
             # Update database
-            test_db.execute_query(
+            db_test.execute_query(
                 "UPDATE artists SET musicbrainz_id = %s WHERE id = 99999", (mbid,)
             )
 
             # Verify
-            result = test_db.execute_select_query(
+            result = db_test.execute_select_query(
                 "SELECT musicbrainz_id FROM artists WHERE id = 99999"
             )
             assert result[0][0] == mbid
 
         finally:
-            test_db.execute_query("DELETE FROM artists WHERE id = 99999")
-            test_db.close()
+            db_test.execute_query("DELETE FROM artists WHERE id = 99999")
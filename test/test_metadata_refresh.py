@@ -7,9 +7,37 @@ after manual tagging with MusicBrainz Picard.
 
 import pytest
 
-from db.db_functions import add_acoustid_column, get_artist_names_found, get_tracks_by_artist_name
+from db import DB_PASSWORD, DB_PATH, DB_USER, TEST_DB
+from db.database import Database
+from db.db_functions import (
+    add_acoustid_column,
+    add_artist_lc_column,
+    get_artist_names_found,
+    get_tracks_by_artist_name,
+)
 from pipeline import refresh_metadata_for_artists
 
+pytestmark = pytest.mark.xdist_group("sandbox")
+
+
+@pytest.fixture(scope="module")
+def artists_with_tracks():
+    """Up to two (artist, track_id, track_mbid) rows for artists with file-backed tracks.
+
+    Queried once for the module; the tests using it only read or dry-run.
+    """
+    database = Database(DB_PATH, DB_USER, DB_PASSWORD, TEST_DB, pooled=True)
+    with database.session():
+        return database.execute_select_query("""
+            SELECT a.artist, td.id, td.musicbrainz_id
+            FROM artists a
+            INNER JOIN track_data td ON td.id = (
+                SELECT MIN(id) FROM track_data
+                WHERE artist_id = a.id AND filepath IS NOT NULL AND filepath != ''
+            )
+            LIMIT 2
+        """)
+
 
 class TestGetTracksByArtistName:
     """Tests for get_tracks_by_artist_name query function."""
@@ -19,23 +47,12 @@ class TestGetTracksByArtistName:
         result = get_tracks_by_artist_name(db_test, [])
         assert result == []
 
-    def test_returns_tracks_for_existing_artist(self, db_test):
+    def test_returns_tracks_for_existing_artist(self, db_test, artists_with_tracks):
         """Should return tracks for an artist that exists in database."""
-        # First, find an artist that has tracks
-        db_test.connect()
-        existing = db_test.execute_select_query("""
-            SELECT a.artist
-            FROM artists a
-            INNER JOIN track_data td ON a.id = td.artist_id
-            WHERE td.filepath IS NOT NULL AND td.filepath != ''
-            LIMIT 1
-        """)
-        db_test.close()
-
-        if not existing:
+        if not artists_with_tracks:
             pytest.skip("No artists with tracks in database")
 
-        artist_name = existing[0][0]
+        artist_name = artists_with_tracks[0][0]
         result = get_tracks_by_artist_name(db_test, [artist_name])
 
         assert len(result) > 0
@@ -46,23 +63,12 @@ class TestGetTracksByArtistName:
         assert isinstance(first_track[1], str)  # filepath
         assert first_track[2].lower() == artist_name.lower()  # artist_name
 
-    def test_case_insensitive_matching(self, db_test):
+    def test_case_insensitive_matching(self, db_test, artists_with_tracks):
         """Should match artist names case-insensitively."""
-        # Find an artist
-        db_test.connect()
-        existing = db_test.execute_select_query("""
-            SELECT a.artist
-            FROM artists a
-            INNER JOIN track_data td ON a.id = td.artist_id
-            WHERE td.filepath IS NOT NULL AND td.filepath != ''
-            LIMIT 1
-        """)
-        db_test.close()
-
-        if not existing:
+        if not artists_with_tracks:
             pytest.skip("No artists with tracks in database")
 
-        artist_name = existing[0][0]
+        artist_name = artists_with_tracks[0][0]
 
         # Try with different casing
         upper_result = get_tracks_by_artist_name(db_test, [artist_name.upper()])
@@ -76,23 +82,12 @@ class TestGetTracksByArtistName:
         result = get_tracks_by_artist_name(db_test, ["NonexistentArtist12345XYZ"])
         assert result == []
 
-    def test_handles_multiple_artists(self, db_test):
+    def test_handles_multiple_artists(self, db_test, artists_with_tracks):
         """Should return tracks for multiple artists."""
-        # Find two artists with tracks
-        db_test.connect()
-        existing = db_test.execute_select_query("""
-            SELECT DISTINCT a.artist
-            FROM artists a
-            INNER JOIN track_data td ON a.id = td.artist_id
-            WHERE td.filepath IS NOT NULL AND td.filepath != ''
-            LIMIT 2
-        """)
-        db_test.close()
-
-        if len(existing) < 2:
+        if len(artists_with_tracks) < 2:
             pytest.skip("Need at least 2 artists with tracks in database")
 
-        artist_names = [row[0] for row in existing]
+        artist_names = [row[0] for row in artists_with_tracks]
         result = get_tracks_by_artist_name(db_test, artist_names)
 
         assert len(result) > 0
@@ -214,25 +209,12 @@ class TestRefreshMetadataForArtists:
         assert stats["artists_requested"] == 0
         assert stats["artists_found"] == 0
 
-    def test_dry_run_does_not_modify_database(self, db_test):
+    def test_dry_run_does_not_modify_database(self, db_test, artists_with_tracks):
         """Dry run should not modify any database records."""
-        # Find an artist with tracks
-        db_test.connect()
-        existing = db_test.execute_select_query("""
-            SELECT a.artist, td.id, td.musicbrainz_id
-            FROM artists a
-            INNER JOIN track_data td ON a.id = td.artist_id
-            WHERE td.filepath IS NOT NULL AND td.filepath != ''
-            LIMIT 1
-        """)
-        db_test.close()
-
-        if not existing:
+        if not artists_with_tracks:
             pytest.skip("No artists with tracks in database")
 
-        artist_name = existing[0][0]
-        track_id = existing[0][1]
-        original_mbid = existing[0][2]
+        artist_name, track_id, original_mbid = artists_with_tracks[0]
 
         # Run dry run
         refresh_metadata_for_artists(
@@ -243,12 +225,10 @@ class TestRefreshMetadataForArtists:
         )
 
         # Verify MBID unchanged
-        db_test.connect()
         after = db_test.execute_select_query(
             "SELECT musicbrainz_id FROM track_data WHERE id = %s",
             (track_id,),
         )
-        db_test.close()
 
         assert after[0][0] == original_mbid
 
@@ -318,3 +298,23 @@ class TestAddAcoustidColumn:
         db_test.close()
 
         assert result[0][0] == 1
+
+
+class TestAddArtistLcColumn:
+    """Tests for the artist_lc generated-column migration."""
+
+    def test_migration_is_idempotent(self, db_test):
+        """Running migration twice should return False the second time."""
+        add_artist_lc_column(db_test)
+
+        assert add_artist_lc_column(db_test) is False
+
+    def test_column_tracks_lowercased_artist(self, db_test):
+        """artist_lc should hold LOWER(artist) for every row."""
+        add_artist_lc_column(db_test)
+
+        result = db_test.execute_select_query(
+            "SELECT COUNT(*) FROM artists WHERE artist_lc != LOWER(artist)"
+        )
+
+        assert result[0][0] == 0
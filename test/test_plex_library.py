@@ -0,0 +1,359 @@
+"""Unit tests for plex/plex_library.py functions.
+
+Uses mocked PlexAPI objects so no Plex server is needed.
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from plex import plex_library
+
+
+def make_track(
+    title="War Pigs",
+    artist="Black Sabbath",
+    album="Paranoid",
+    original_title=None,
+    rating_key="101",
+    artist_key=11,
+    album_key=21,
+):
+    """Build a MagicMock that looks like a plexapi Track from a searchTracks() listing."""
+    track = MagicMock()
+    track.title = title
+    track.originalTitle = original_title
+    track.ratingKey = rating_key
+    track.grandparentRatingKey = artist_key
+    track.parentRatingKey = album_key
+    track.addedAt = datetime(2024, 3, 5, 12, 30)
+    # Plain namespaces for the read-only children; only track.artist()/album() need call tracking
+    filepath = "/volume1/music/Black Sabbath/Paranoid/01 War Pigs.flac"
+    track.genres = [SimpleNamespace(tag="Heavy Metal")]
+    track.media = [SimpleNamespace(parts=[SimpleNamespace(file=filepath)])]
+    track.locations = [filepath]
+    track.artist.return_value.title = artist
+    track.album.return_value.title = album
+    return track
+
+
+# extract_track_data() output for make_track() with the "/volume1/music" prefix
+WAR_PIGS_ROW = {
+    "title": "War Pigs",
+    "artist": "Black Sabbath",
+    "album": "Paranoid",
+    "genre": ["Heavy Metal"],
+    "added_date": "2024-03-05",
+    "filepath": "/volume1/music/Black Sabbath/Paranoid/01 War Pigs.flac",
+    "location": "/Black Sabbath/Paranoid/01 War Pigs.flac",
+    "plex_id": 101,
+}
+
+
+@pytest.fixture(scope="module")
+def _shared_library():
+    return MagicMock()
+
+
+@pytest.fixture
+def library(_shared_library):
+    """One library mock for the module, reset (calls and configured returns) per test."""
+    _shared_library.reset_mock(return_value=True, side_effect=True)
+    return _shared_library
+
+
+@pytest.fixture(scope="module")
+def export_dir(tmp_path_factory):
+    """One directory for the module's CSV exports; each test writes its own file."""
+    return tmp_path_factory.mktemp("exports")
+
+
+class TestBuildTitleLookups:
+    """Tests for build_title_lookups() function."""
+
+    def test_builds_rating_key_maps(self, library):
+        """Should map ratingKey -> title for artists and albums."""
+        artist = SimpleNamespace(ratingKey=11, title="Black Sabbath")
+        album = SimpleNamespace(ratingKey="21", title="Paranoid")
+        library.searchArtists.return_value = [artist]
+        library.searchAlbums.return_value = [album]
+
+        artist_titles, album_titles = plex_library.build_title_lookups(library)
+
+        assert artist_titles == {11: "Black Sabbath"}
+        assert album_titles == {21: "Paranoid"}
+
+    def test_error_returns_empty_maps(self, library):
+        """Should return empty maps when Plex raises."""
+        library.searchArtists.side_effect = Exception("boom")
+
+        assert plex_library.build_title_lookups(library) == ({}, {})
+
+
+class TestExtractTrackData:
+    """Tests for extract_track_data() function."""
+
+    def test_uses_lookups_without_reload(self):
+        """Titles found in the lookup maps should not trigger artist()/album() reloads."""
+        track = make_track()
+
+        result = plex_library.extract_track_data(
+            track, "/volume1/music", {11: "Black Sabbath"}, {21: "Paranoid"}
+        )
+
+        assert result["artist"] == "Black Sabbath"
+        assert result["album"] == "Paranoid"
+        track.artist.assert_not_called()
+        track.album.assert_not_called()
+
+    def test_falls_back_to_reload_on_miss(self):
+        """Missing lookup entries should fall back to the PlexAPI reload."""
+        track = make_track()
+
+        result = plex_library.extract_track_data(track, "/volume1/music", {}, {})
+
+        assert result["artist"] == "Black Sabbath"
+        assert result["album"] == "Paranoid"
+        track.artist.assert_called_once()
+        track.album.assert_called_once()
+
+    def test_compilation_uses_original_title(self):
+        """Compilation tracks should use originalTitle as the artist."""
+        track = make_track(original_title="The Damned")
+
+        result = plex_library.extract_track_data(
+            track, "/volume1/music", {11: "Various Artists"}, {21: "Paranoid"}
+        )
+
+        assert result["artist"] == "The Damned"
+
+    @pytest.mark.parametrize(
+        "attribute, override",
+        [
+            pytest.param(None, {}, id="all-fields"),
+            pytest.param("genres", {"genre": []}, id="no-genres"),
+            pytest.param("media", {"filepath": None}, id="no-media"),
+        ],
+    )
+    def test_fields(self, attribute, override):
+        """Should populate all exported fields; an emptied list only changes its own field."""
+        track = make_track()
+        if attribute:
+            setattr(track, attribute, [])
+
+        result = plex_library.extract_track_data(track, "/volume1/music")
+
+        assert result == {**WAR_PIGS_ROW, **override}
+
+
+class TestGetAllTracks:
+    """Tests for get_all_tracks() function."""
+
+    @pytest.mark.parametrize(
+        "get_tracks", [plex_library.get_all_tracks, plex_library.get_all_tracks_limit]
+    )
+    @pytest.mark.parametrize("size", [2, 0])
+    def test_returns_tracks_and_count(self, get_tracks, size, library):
+        """Should return the track list and its length, with or without a limit."""
+        library.searchTracks.return_value = [make_track(rating_key=str(n)) for n in range(size)]
+
+        tracks, count = get_tracks(library)
+
+        assert count == size
+        assert len(tracks) == size
+
+    def test_requests_slim_listing(self, library):
+        """Should skip GUID children and use large container pages."""
+        library.searchTracks.return_value = []
+
+        plex_library.get_all_tracks(library)
+
+        library.searchTracks.assert_called_once_with(**plex_library.TRACK_SEARCH_OPTIONS)
+        assert plex_library.TRACK_SEARCH_OPTIONS["includeGuids"] is False
+
+
+class TestSearchTracksRetries:
+    """Tests for retry/backoff around searchTracks()."""
+
+    @patch("plex.plex_library.sleep")
+    def test_retries_with_smaller_pages(self, mock_sleep, library):
+        """Transient failures should back off and halve container_size."""
+        library.searchTracks.side_effect = [
+            requests.exceptions.ChunkedEncodingError("reset"),
+            requests.exceptions.ReadTimeout("slow"),
+            [make_track()],
+        ]
+
+        tracks, count = plex_library.get_all_tracks(library)
+
+        assert count == 1
+        sizes = [c.kwargs["container_size"] for c in library.searchTracks.call_args_list]
+        assert sizes == [1000, 500, 250]
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2]
+
+    @patch("plex.plex_library.sleep")
+    def test_exits_after_retries_exhausted(self, mock_sleep, library):
+        """get_all_tracks() should still exit once every attempt has failed."""
+        library.searchTracks.side_effect = requests.exceptions.ConnectionError("down")
+
+        with pytest.raises(SystemExit):
+            plex_library.get_all_tracks(library)
+
+        assert library.searchTracks.call_count == plex_library.RETRY_ATTEMPTS
+
+    @patch("plex.plex_library.sleep")
+    def test_non_transient_error_not_retried(self, mock_sleep, library):
+        """Errors outside RETRY_EXCEPTIONS should fail immediately."""
+        library.searchTracks.side_effect = ValueError("bad filter")
+
+        assert plex_library.get_tracks_since_date(library, "2024-01-01") == ([], 0)
+        assert library.searchTracks.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+class TestPlexConnect:
+    """Tests for plex_connect() function."""
+
+    def test_installs_pooled_session(self):
+        """Connected server should use a pooled keep-alive session."""
+        with patch("plex.plex_library.MyPlexAccount") as mock_account:
+            server = MagicMock()
+            mock_account.return_value.resource.return_value.connect.return_value = server
+
+            result = plex_library.plex_connect(test=True)
+
+        assert result is server
+        adapter = server._session.get_adapter("https://plex.example")
+        assert adapter._pool_maxsize == plex_library.POOL_MAXSIZE
+
+    @pytest.mark.parametrize("failing", ["sign-in", "connect"])
+    def test_error_exits(self, failing):
+        """A failed sign-in or server connect should exit without retrying."""
+        with patch("plex.plex_library.MyPlexAccount") as mock_account:
+            if failing == "sign-in":
+                mock_account.side_effect = ValueError("bad credentials")
+            else:
+                mock_account.return_value.resource.side_effect = ValueError("no such server")
+
+            with pytest.raises(SystemExit):
+                plex_library.plex_connect(test=True)
+
+        assert mock_account.call_count == 1
+
+
+class TestStripLocation:
+    """Tests for filepath prefix handling in extract_track_data()."""
+
+    def test_prefix_not_at_start_is_still_removed(self):
+        """A prefix that isn't leading should still be stripped like str.replace()."""
+        track = make_track()
+        track.locations = ["/mnt/volume1/music/a.flac"]
+
+        result = plex_library.extract_track_data(track, "/volume1/music")
+
+        assert result["location"] == "/mnt/a.flac"
+
+    def test_empty_prefix_keeps_location(self):
+        """An empty prefix should leave the location unchanged."""
+        track = make_track()
+
+        result = plex_library.extract_track_data(track, "")
+
+        assert result["location"] == track.locations[0]
+
+
+class TestListifyTrackData:
+    """Tests for listify_track_data() / iter_track_data()."""
+
+    def test_preserves_track_order(self):
+        """Parallel extraction should keep results in input order."""
+        tracks = [make_track(title=f"Track {n}", rating_key=str(n)) for n in range(50)]
+
+        result = plex_library.listify_track_data(tracks, "", max_workers=8)
+
+        assert [t["plex_id"] for t in result] == list(range(50))
+
+    def test_submissions_bounded_by_window(self):
+        """Extraction should not run more than the window ahead of the consumer."""
+        tracks = [make_track(rating_key=str(n)) for n in range(20)]
+        extracted = []
+
+        def counting_extract(track, **kwargs):
+            extracted.append(track)
+            return {}
+
+        with patch.object(plex_library, "extract_track_data", side_effect=counting_extract):
+            rows = plex_library.iter_track_data(tracks, "", max_workers=2)
+            next(rows)
+            # One consumed result, plus at most the window submitted behind it
+            assert len(extracted) <= 1 + plex_library.EXTRACT_WINDOW * 2
+            assert len(list(rows)) == 19
+
+    def test_serial_matches_parallel(self):
+        """max_workers=1 should produce the same rows as the thread pool."""
+        tracks = [make_track(rating_key=str(n)) for n in range(5)]
+
+        serial = plex_library.listify_track_data(tracks, "", max_workers=1)
+        parallel = plex_library.listify_track_data(tracks, "", max_workers=4)
+
+        assert serial == parallel
+
+    def test_empty(self):
+        """Empty input should return an empty list."""
+        assert plex_library.listify_track_data([], "") == []
+
+
+class TestStreamExportTracks:
+    """Tests for stream_export_tracks() function."""
+
+    def test_writes_header_and_rows(self, export_dir):
+        """Should write a header plus one row per track."""
+        csv_path = export_dir / "rows.csv"
+        tracks = [make_track(rating_key=str(n)) for n in range(3)]
+
+        count = plex_library.stream_export_tracks(tracks, "", str(csv_path))
+
+        lines = csv_path.read_text().splitlines()
+        assert count == 3
+        assert lines[0] == ",".join(plex_library.TRACK_FIELDNAMES)
+        assert len(lines) == 4
+
+    def test_rows_written_in_track_order(self, export_dir):
+        """Rows should reach the file in input order through the writer thread."""
+        csv_path = export_dir / "ordered.csv"
+        tracks = [make_track(rating_key=str(n)) for n in range(40)]
+
+        plex_library.stream_export_tracks(tracks, "", str(csv_path), max_workers=8)
+
+        lines = csv_path.read_text().splitlines()[1:]
+        assert [int(line.rsplit(",", 1)[1]) for line in lines] == list(range(40))
+
+
+class TestExportTrackData:
+    """Tests for export_track_data() / IncrementalCsvWriter."""
+
+    def test_header_written_once_across_appends(self, export_dir):
+        """Appending to an existing export should not repeat the header."""
+        csv_path = export_dir / "appended.csv"
+        rows = plex_library.listify_track_data([make_track()], "")
+
+        plex_library.export_track_data(rows, str(csv_path))
+        plex_library.export_track_data(rows, str(csv_path))
+
+        lines = csv_path.read_text().splitlines()
+        header = ",".join(plex_library.TRACK_FIELDNAMES)
+        assert lines.count(header) == 1
+        assert len(lines) == 3
+
+    def test_header_written_for_empty_existing_file(self, export_dir):
+        """An existing but empty file should still get a header."""
+        csv_path = export_dir / "empty.csv"
+        csv_path.touch()
+
+        with plex_library.IncrementalCsvWriter(str(csv_path)):
+            pass
+
+        assert csv_path.read_text().splitlines() == [",".join(plex_library.TRACK_FIELDNAMES)]
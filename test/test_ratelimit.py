@@ -0,0 +1,114 @@
+"""Unit tests for the shared request pacing in analysis/ratelimit.py.
+
+sleep and monotonic are patched, so nothing actually waits.
+"""
+
+from unittest.mock import patch
+
+from analysis import ratelimit
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter pacing."""
+
+    @patch("analysis.ratelimit.sleep")
+    @patch("analysis.ratelimit.monotonic", return_value=100.0)
+    def test_spaces_back_to_back_calls(self, mock_monotonic, mock_sleep):
+        """Calls made at the same instant should each wait one more delay."""
+        limiter = ratelimit.RateLimiter(0.25)
+
+        limiter.wait()
+        limiter.wait()
+        limiter.wait()
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.25, 0.5]
+
+    @patch("analysis.ratelimit.sleep")
+    @patch("analysis.ratelimit.monotonic", side_effect=[100.0, 101.0])
+    def test_no_wait_after_interval_elapsed(self, mock_monotonic, mock_sleep):
+        """No sleep when the delay has already passed since the last call."""
+        limiter = ratelimit.RateLimiter(0.25)
+
+        limiter.wait()
+        limiter.wait()
+
+        mock_sleep.assert_not_called()
+
+    @patch("analysis.ratelimit.sleep")
+    @patch("analysis.ratelimit.monotonic", return_value=100.0)
+    def test_burst_passes_then_paces(self, mock_monotonic, mock_sleep):
+        """With burst=3, three calls go immediately, then calls are spaced again."""
+        limiter = ratelimit.RateLimiter(0.2, burst=3)
+
+        for _ in range(5):
+            limiter.wait()
+
+        assert [round(c.args[0], 6) for c in mock_sleep.call_args_list] == [0.2, 0.4]
+
+
+class TestRateLimiterObserve:
+    """Tests for header-driven pausing."""
+
+    @patch("analysis.ratelimit.sleep")
+    @patch("analysis.ratelimit.monotonic", return_value=100.0)
+    def test_low_remaining_pauses_until_reset(self, mock_monotonic, mock_sleep):
+        """Fewer than LOW_WATER requests left should hold the next call until reset."""
+        limiter = ratelimit.RateLimiter(0.2, burst=5)
+
+        limiter.observe({"X-RateLimit-Remaining": "1", "Retry-After": "4"})
+        limiter.wait()
+
+        mock_sleep.assert_called_once_with(4.0)
+
+    @patch("analysis.ratelimit.sleep")
+    @patch("analysis.ratelimit.monotonic", return_value=100.0)
+    def test_quota_available_no_pause(self, mock_monotonic, mock_sleep):
+        """Plenty of quota (or no headers) should leave pacing alone."""
+        limiter = ratelimit.RateLimiter(0.2, burst=5)
+
+        limiter.observe({"X-RateLimit-Remaining": "50", "Retry-After": "4"})
+        limiter.observe({})
+        limiter.wait()
+
+        mock_sleep.assert_not_called()
+
+
+class TestAdaptiveConcurrency:
+    """Tests for AIMD concurrency adjustment."""
+
+    def test_fast_responses_increase_additively(self):
+        """Each response under the target latency should add `increase`."""
+        concurrency = ratelimit.AdaptiveConcurrency(initial=4, maximum=16, target_latency=1.0)
+
+        for _ in range(4):
+            concurrency.acquire()
+            concurrency.release(0.2)
+
+        assert concurrency.limit == 6.0
+
+    def test_throttle_or_slow_response_halves(self):
+        """A throttled or slow response should halve the cap, not below minimum."""
+        concurrency = ratelimit.AdaptiveConcurrency(initial=8, minimum=1, target_latency=1.0)
+
+        concurrency.acquire()
+        concurrency.release(0.2, throttled=True)
+        assert concurrency.limit == 4.0
+
+        concurrency.acquire()
+        concurrency.release(2.5)
+        assert concurrency.limit == 2.0
+
+        for _ in range(3):
+            concurrency.acquire()
+            concurrency.release(0.1, throttled=True)
+        assert concurrency.limit == 1
+
+    def test_limit_capped_at_maximum(self):
+        """Additive increase should stop at the configured maximum."""
+        concurrency = ratelimit.AdaptiveConcurrency(initial=4, maximum=5)
+
+        for _ in range(10):
+            concurrency.acquire()
+            concurrency.release(0.1)
+
+        assert concurrency.limit == 5